@@ -12,6 +12,7 @@ from .models import (
     Chat,
     ChatMember,
     ChatMessage,
+    TextSketch,
 )
 
 
@@ -97,3 +98,14 @@ class CommunityMembershipAdmin(admin.ModelAdmin):
     list_display = ("id", "community", "user", "is_admin", "joined_at")
     list_filter = ("is_admin", "community")
     search_fields = ("community__name", "user__username", "user__display_name")
+
+
+# ========= Почти-дубли (помечаются при записи, core/services/duplicates.py) =========
+
+@admin.register(TextSketch)
+class TextSketchAdmin(admin.ModelAdmin):
+    list_display = ("id", "author", "post", "comment", "duplicate_of", "similarity", "created_at")
+    list_filter = (("duplicate_of", admin.EmptyFieldListFilter), "created_at")
+    search_fields = ("author__username",)
+    raw_id_fields = ("post", "comment", "author", "duplicate_of")
+    exclude = ("signature",)
@@ -6,6 +6,8 @@ from django.utils import timezone
 
 from core.models import Post, Comment, Like
 from core.ai.llm_client import llm_generate
+from core.services import duplicates
+from core.services.comments import ancestors
 
 
 # ===========================
@@ -40,11 +42,14 @@ def weighted_choice_comment_with_persona_bias(user):
     - участия пользователя в ветке
     - игнорируем собственные комментарии (не разговариваем с собой)
     """
-    qs = Comment.objects.select_related("post", "author", "parent")
+    qs = Comment.objects.select_related("post", "author")
     comments = list(qs)
     if not comments:
         return None
 
+    # id собственных комментариев — участие в ветке проверяем по материализованному пути
+    my_comment_ids = set(Comment.objects.filter(author=user).values_list("id", flat=True))
+
     now = timezone.now()
     weighted = []
 
@@ -64,14 +69,8 @@ def weighted_choice_comment_with_persona_bias(user):
         if c.post.author_id == user.id:
             base_weight *= 4.0
 
-        # если пользователь участвовал в ветке
-        participated = False
-        t = c
-        while t.parent_id is not None:
-            if t.author_id == user.id:
-                participated = True
-                break
-            t = t.parent  # уже select_related
+        # если пользователь участвовал в ветке (предки, кроме корня)
+        participated = any(cid in my_comment_ids for cid in c.ancestor_ids[1:])
 
         if participated:
             base_weight *= 3.0
@@ -169,16 +168,12 @@ Germify — соцсеть, где посты могут быть обрывоч
 def build_reply_prompt(persona: dict, parent_comment: Comment) -> str:
     post = parent_comment.post
 
-    # собираем историю ветки (предки, без самого parent_comment)
-    thread = []
-    current = parent_comment
-    while current.parent_id is not None:
-        thread.append(current.parent)
-        current = current.parent
+    # собираем историю ветки (предки, без самого parent_comment) — один запрос по пути
+    thread = ancestors(parent_comment)
 
     if thread:
         thread_history = "\n".join(
-            f"[{c.author.username}]: \"{c.text}\"" for c in reversed(thread)
+            f"[{c.author.username}]: \"{c.text}\"" for c in thread
         )
     else:
         thread_history = "(нет предыдущей истории)"
@@ -254,6 +249,10 @@ def ai_create_post(persona: dict):
     if not text:
         return None
 
+    # модель любит повторяться — почти-дубль чьего угодно недавнего текста не публикуем
+    if duplicates.find_any(text) is not None:
+        return None
+
     post = Post.objects.create(author=user, text=text.strip())
     return post
 
@@ -303,7 +302,7 @@ def ai_create_comment(persona: dict):
 
     prompt = build_comment_prompt(persona, post)
     text = llm_generate(prompt)
-    if not text:
+    if not text or duplicates.find_any(text) is not None:
         return None
 
     Comment.objects.create(
@@ -344,7 +343,7 @@ def ai_reply_to_comment(persona: dict):
 
     prompt = build_reply_prompt(persona, parent_comment)
     text = llm_generate(prompt)
-    if not text:
+    if not text or duplicates.find_any(text) is not None:
         return None
 
     Comment.objects.create(
@@ -8,3 +8,151 @@ POST_TEXT_MAX_LENGTH = 2000
 
 # Максимум вложений (файлов) в одном посте
 MAX_ATTACHMENTS_PER_POST = 10
+
+# Домашняя лента (fan-out-on-write).
+# Авторы/сообщества с аудиторией больше порога не рассылаются по лентам —
+# их посты подмешиваются при чтении (fan-out-on-read).
+FEED_FANOUT_MAX_AUDIENCE = 5000
+
+# Сколько последних постов автора/сообщества докладывать в ленту при подписке
+TIMELINE_BACKFILL_POSTS = 50
+
+# Размер страницы ленты
+FEED_PAGE_SIZE = 7
+
+# «Умная» лента (core/services/ranking.py, команда rank_timelines):
+# score = свежесть * (1 + вес * log(1 + лайки + 2·комментарии)) * (1 + вес * log(1 + близость к автору)),
+# свежесть = 1 / (1 + возраст_минут / шкала)
+FEED_RANK_TIME_SCALE_MINUTES = 120
+FEED_RANK_ENGAGEMENT_WEIGHT = 0.5
+FEED_RANK_AFFINITY_WEIGHT = 0.5
+# окно пересчёта: записи ленты старше получают score = 0 и идут хронологическим хвостом
+FEED_RANK_WINDOW_HOURS = 72
+# за сколько дней считать лайки/комментарии читателя к автору (близость)
+FEED_RANK_AFFINITY_DAYS = 30
+
+# Страница списка подписчиков / подписок
+FOLLOW_LIST_PAGE_SIZE = 20
+
+# Граф подписок в памяти процесса (core/services/follow_graph.py):
+# после скольких накопленных изменений пересобрать массивы в фоне
+FOLLOW_GRAPH_MAX_DELTA = 10000
+# сколько живёт запись журнала изменений в кэше (сек)
+FOLLOW_GRAPH_EVENT_TTL = 60 * 60
+# если процесс отстал больше чем на столько изменений — перезагрузить граф из таблицы
+FOLLOW_GRAPH_MAX_REPLAY = 5000
+# сколько ждать пропущенную запись журнала, отвечая из таблицы, прежде чем перезагрузить (сек)
+FOLLOW_GRAPH_GAP_TIMEOUT = 5
+# как часто перезагружать граф из таблицы в любом случае (сек)
+FOLLOW_GRAPH_RELOAD_INTERVAL = 60 * 60
+
+# «На кого подписаться» (core/services/suggestions.py, команда compute_follow_suggestions):
+# сколько хранить на пользователя, сколько показывать, сколько живёт расчёт (сек)
+FOLLOW_SUGGESTIONS_STORED = 20
+FOLLOW_SUGGESTIONS_SHOWN = 5
+FOLLOW_SUGGESTIONS_TTL = 2 * 24 * 60 * 60
+# вес общего сообщества относительно пути «друг друга»; сообщества крупнее порога не учитываются
+FOLLOW_SUGGESTIONS_COMMUNITY_WEIGHT = 0.5
+FOLLOW_SUGGESTIONS_MAX_COMMUNITY = 1000
+
+# «Похожие сообщества» (core/services/community_recs.py, команда compute_community_neighbors):
+# соседей на сообщество, сколько своих сообществ учитывать при показе, сколько показывать
+COMMUNITY_NEIGHBORS_K = 20
+COMMUNITY_RECS_MAX_SOURCES = 50
+COMMUNITY_RECS_SHOWN = 4
+
+# Страница каталога сообществ (/communities/, курсор по community_directory_idx)
+COMMUNITIES_PAGE_SIZE = 7
+
+# Страница списка участников сообщества (боковая колонка community_detail)
+COMMUNITY_MEMBERS_PAGE_SIZE = 7
+
+# Сколько строк-шардов на пост для счётчиков лайков/комментариев
+POST_COUNTER_SHARDS = 8
+# Фоновый поток процесса сворачивает шарды в колонки Post раз в столько секунд...
+POST_COUNTER_FOLD_INTERVAL = 60
+# ...или раньше, когда процесс записал столько дельт с прошлой свёртки
+POST_COUNTER_FOLD_AFTER = 1000
+
+# Материализованный путь комментария: id предков с нулями слева, через "/"
+COMMENT_PATH_SEGMENT_WIDTH = 10
+# Глубже этого уровня ответы прикрепляются к родителю родителя (путь ограничен по длине)
+COMMENT_MAX_DEPTH = 60
+
+# Превью комментариев в карточке поста (лента/профиль/сообщество): N последних верхнего уровня
+COMMENTS_PREVIEW_SIZE = 3
+# Страница догрузки комментариев/ответов (core.views.post_comments)
+COMMENTS_PAGE_SIZE = 10
+
+# Сколько живёт закэшированный фрагмент карточки поста (сек); старые версии просто истекают
+POST_FRAGMENT_TTL = 24 * 60 * 60
+
+# Поиск (core/services/search.py)
+SEARCH_PAGE_SIZE = 10
+# Сколько термов запроса учитывать (остальные отбрасываются)
+SEARCH_MAX_QUERY_TERMS = 8
+# Сколько постингов одного терма читать при ранжировании: у частых термов — документы,
+# где терм весит больше всего (SearchPosting.weight), остальные находятся только по другим термам
+SEARCH_MAX_POSTINGS = 20000
+# Ранжированный список запроса (лучшие SEARCH_MAX_RESULTS) кэшируется на время листания, сек
+SEARCH_MAX_RESULTS = 1000
+SEARCH_RESULTS_TTL = 5 * 60
+
+# Похожие посты (TF-IDF по тому же индексу, core/services/search.py)
+# Сколько самых информативных термов поста искать
+SIMILAR_POSTS_MAX_TERMS = 12
+# Сколько постингов одного терма читать — самых весомых (частые термы почти ничего не дают)
+SIMILAR_POSTS_MAX_POSTINGS = 2000
+# Порог похожести (1.0 — тот же текст) и размер блока на странице поста
+SIMILAR_POSTS_MIN_SCORE = 0.1
+SIMILAR_POSTS_SHOWN = 5
+
+# Нечёткий поиск сообществ (core/services/communities.py): кандидаты — по триграммному индексу,
+# сколько их оценивать (лучшие по Dice); оценка прежняя, по SequenceMatcher:
+# score = max(похожесть_названия * вес, похожесть_описания), порог и лимит выдачи
+COMMUNITY_FUZZY_CANDIDATES = 1000
+COMMUNITY_FUZZY_NAME_WEIGHT = 1.25
+COMMUNITY_FUZZY_MIN_SCORE = 0.60
+COMMUNITY_FUZZY_LIMIT = 200
+
+# Почти-дубли постов и комментариев (MinHash + LSH, core/services/duplicates.py)
+# Длина сигнатуры и число полос LSH (по DUPLICATE_MINHASH_SIZE / DUPLICATE_LSH_BANDS значений в полосе)
+DUPLICATE_MINHASH_SIZE = 64
+DUPLICATE_LSH_BANDS = 16
+# Оценка Жаккара по шинглам, с которой текст считается почти-дублем
+DUPLICATE_THRESHOLD = 0.8
+# Короче (после нормализации) — не проверяем: «+1» и «согласен» повторяются законно
+DUPLICATE_MIN_CHARS = 20
+# Сколько дней помнить сигнатуры (команда prune_text_sketches)
+DUPLICATE_WINDOW_DAYS = 7
+
+# «Сейчас в тренде» (core/services/trending.py, команда rollup_trending)
+# Окно и период полураспада веса активности, часы
+TRENDING_WINDOW_HOURS = 24
+TRENDING_HALF_LIFE_HOURS = 6
+# Строки моложе этого (сек) не сворачиваем: их транзакции могли ещё не закоммититься
+TRENDING_ROLLUP_LAG = 60
+# Сколько строк источника читать за раз
+TRENDING_ROLLUP_BATCH = 5000
+# Сколько мест хранить и сколько показывать в виджете
+TRENDING_STORED = 20
+TRENDING_SHOWN = 5
+
+# Уникальные просмотры постов (HyperLogLog, core/services/post_views.py)
+# 2^12 регистров = 4 КиБ на пост, стандартная ошибка ~1.6%
+POST_VIEWS_HLL_PRECISION = 12
+# Фоновый поток процесса пишет буфер показов в БД раз в столько секунд...
+POST_VIEWS_FLUSH_INTERVAL = 30
+# ...или раньше, когда набралось столько пар (пост, зритель)
+POST_VIEWS_BUFFER_MAX = 5000
+
+# «Уже показанные» посты пользователя (скользящий фильтр Блума, core/services/seen.py)
+# Постов в одном поколении фильтра и доля ложных срабатываний в нём;
+# поколений два: ~4.7 КиБ на пользователя, помнятся последние 2000–4000 показов
+SEEN_FILTER_CAPACITY = 2000
+SEEN_FILTER_ERROR_RATE = 0.01
+# Копия в кэше обновляется на каждой странице ленты, в БД — раз в столько новых показов
+SEEN_FILTER_PERSIST_EVERY = 50
+SEEN_FILTER_CACHE_TTL = 60 * 60 * 24
+# Сколько раз дочитывать ленту, чтобы набрать страницу непоказанных постов
+SEEN_FILTER_MAX_READS = 4
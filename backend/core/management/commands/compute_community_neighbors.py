@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Community
+from core.services import community_recs
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает похожие сообщества (косинус по участникам) для сообществ, "
+        "у которых менялся состав, и их соседей."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Пересчитать все сообщества")
+
+    def handle(self, *args, **options):
+        matrix = community_recs.Memberships.from_db()
+
+        if options["full"]:
+            ids = Community.objects.values_list("id", flat=True)
+        else:
+            ids = community_recs.affected_ids(matrix, community_recs.stale_ids())
+
+        count = community_recs.recompute(matrix, sorted(ids))
+        self.stdout.write(self.style.SUCCESS(f"Готово! Пересчитано сообществ: {count}"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.models import User
+from core.services import suggestions
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает рекомендации «на кого подписаться» (друзья друзей + общие сообщества)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", dest="usernames", help="Только для этих пользователей")
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options["usernames"]:
+            users = users.filter(username__in=options["usernames"])
+
+        signals = suggestions.Signals.from_db()
+
+        total = stored = 0
+        for found in suggestions.compute(signals, users.order_by("id").values_list("id", flat=True).iterator()):
+            total += 1
+            stored += found
+
+        self.stdout.write(self.style.SUCCESS(f"Готово! Пользователей: {total}, рекомендаций: {stored}"))
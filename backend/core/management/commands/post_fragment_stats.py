@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.services.fragments import reset_stats, stats
+
+
+class Command(BaseCommand):
+    help = "Показывает попадания/промахи кэша фрагментов карточек постов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Обнулить счётчики после вывода")
+
+    def handle(self, *args, **options):
+        s = stats()
+        ratio = (s["hits"] / s["total"] * 100) if s["total"] else 0.0
+        self.stdout.write(f"Попаданий: {s['hits']}, промахов: {s['misses']}, hit ratio: {ratio:.1f}%")
+
+        if options["reset"]:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("Готово! Счётчики обнулены"))
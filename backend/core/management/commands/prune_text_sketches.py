@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.services import duplicates
+
+
+class Command(BaseCommand):
+    help = "Удаляет сигнатуры почти-дублей старше DUPLICATE_WINDOW_DAYS (вместе с LSH-корзинами)."
+
+    def handle(self, *args, **options):
+        deleted = duplicates.prune()
+        self.stdout.write(self.style.SUCCESS(f"Готово! Удалено строк: {deleted}"))
@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.services import ranking
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает оценки «умной» ленты (свежесть, лайки/комментарии, близость к автору)."
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        user_ids = User.objects.filter(is_active=True).order_by("id").values_list("id", flat=True).iterator()
+
+        users, entries = ranking.rank_all(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Готово! Лент: {users}, записей пересчитано: {entries}"))
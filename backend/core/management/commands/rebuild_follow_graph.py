@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.follow_graph import FollowGraph, reload_everywhere
+
+
+class Command(BaseCommand):
+    help = (
+        "Строит граф подписок (CSR) из таблицы Follow и показывает его размер. "
+        "С --reload все серверные процессы перезагрузят свой граф из таблицы."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reload",
+            action="store_true",
+            help="Сбросить журнал изменений в кэше: процессы ответят из таблицы и перезагрузят граф",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        graph = FollowGraph.from_db()
+        elapsed = time.monotonic() - started
+
+        stats = graph.stats()
+        self.stdout.write(f"Пользователей (узлов): {stats['nodes']}")
+        self.stdout.write(f"Подписок (рёбер): {stats['edges']}")
+        self.stdout.write(f"Память CSR: {stats['csr_bytes'] / 1024:.1f} КиБ")
+        self.stdout.write(f"Построение: {elapsed * 1000:.0f} мс")
+
+        if options["reload"]:
+            reload_everywhere()
+            self.stdout.write("Журнал изменений сброшен: процессы перезагрузят граф")
+        self.stdout.write(self.style.SUCCESS("Готово! Граф подписок построен"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Comment, Hashtag, Mention, MentionedPost, Post
+from core.services import tags
+
+
+class Command(BaseCommand):
+    help = "Пересобирает индекс #тегов и @упоминаний по текстам постов и комментариев."
+
+    def handle(self, *args, **options):
+        # теги удаляются вместе со связями, счётчики считаются заново
+        Hashtag.objects.all().delete()
+        Mention.objects.all().delete()
+        MentionedPost.objects.all().delete()
+
+        posts = 0
+        for post in Post.objects.only("id", "text", "text_html", "text_html_version", "created_at").iterator():
+            tags.index_post(post)
+            posts += 1
+
+        comments = 0
+        for comment in Comment.objects.only("id", "post_id", "text", "created_at").iterator():
+            tags.index_comment(comment)
+            comments += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово! Постов: {posts}, комментариев: {comments}, тегов: {Hashtag.objects.count()}"
+            )
+        )
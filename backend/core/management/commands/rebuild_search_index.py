@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Community, Post, SearchPosting, User
+from core.services import search
+
+
+class Command(BaseCommand):
+    help = "Пересобирает поисковый индекс (посты, пользователи, сообщества) с нуля."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            choices=[k for k, _ in SearchPosting.KIND_CHOICES],
+            help="Пересобрать только один тип документов",
+        )
+
+    def handle(self, *args, **options):
+        sources = {
+            SearchPosting.KIND_POST: lambda: (
+                (p.id, search.post_terms(p)) for p in Post.objects.only("id", "text").iterator()
+            ),
+            SearchPosting.KIND_USER: lambda: (
+                (u.id, search.user_terms(u))
+                for u in User.objects.only("id", "username", "display_name", "bio").iterator()
+            ),
+            SearchPosting.KIND_COMMUNITY: lambda: (
+                (c.id, search.community_terms(c))
+                for c in Community.objects.only("id", "name", "slug", "description").iterator()
+            ),
+        }
+        kinds = [options["kind"]] if options["kind"] else list(sources)
+
+        for kind in kinds:
+            count = search.rebuild(kind, sources[kind]())
+            self.stdout.write(f"{kind}: {count}")
+
+        self.stdout.write(self.style.SUCCESS("Готово! Поисковый индекс пересобран"))
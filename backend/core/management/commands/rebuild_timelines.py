@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.services.timeline import rebuild_for_user
+
+
+class Command(BaseCommand):
+    help = "Пересобирает материализованные домашние ленты из подписок и сообществ."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--depth", type=int, default=200, help="Сколько последних постов класть в ленту")
+        parser.add_argument("--user", help="username: пересобрать ленту только одного пользователя")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = User.objects.order_by("id")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+
+        total = 0
+        for user_id in users.values_list("id", flat=True).iterator():
+            rebuild_for_user(user_id, options["depth"])
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Готово! Пересобрано лент: {total}"))
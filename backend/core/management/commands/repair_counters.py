@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Comment, Community, Post, User
+from core.services.counters import (
+    fold_post_shards,
+    rebuild_comment_counters,
+    rebuild_community_counters,
+    rebuild_post_counters,
+    rebuild_user_counters,
+)
+
+
+class Command(BaseCommand):
+    help = "Сворачивает шарды счётчиков или пересчитывает лайки/комментарии, счётчики профилей и сообществ из исходных таблиц."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fold",
+            action="store_true",
+            help="Только свернуть накопленные дельты шардов в колонки Post (то же периодически делает фоновый поток процесса)",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def _batches(self, qs, size):
+        batch = []
+        for obj_id in qs.order_by("id").values_list("id", flat=True).iterator():
+            batch.append(obj_id)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def handle(self, *args, **options):
+        if options["fold"]:
+            touched = fold_post_shards()
+            self.stdout.write(self.style.SUCCESS(f"Готово! Свёрнуто постов: {touched}"))
+            return
+
+        size = options["batch_size"]
+
+        posts = 0
+        for batch in self._batches(Post.objects.all(), size):
+            rebuild_post_counters(batch)
+            posts += len(batch)
+
+        comments = 0
+        for batch in self._batches(Comment.objects.all(), size):
+            rebuild_comment_counters(batch)
+            comments += len(batch)
+
+        communities = 0
+        for batch in self._batches(Community.objects.all(), size):
+            rebuild_community_counters(batch)
+            communities += len(batch)
+
+        users = 0
+        for batch in self._batches(User.objects.all(), size):
+            rebuild_user_counters(batch)
+            users += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово! Пересчитано постов: {posts}, комментариев: {comments}, "
+                f"сообществ: {communities}, пользователей: {users}"
+            )
+        )
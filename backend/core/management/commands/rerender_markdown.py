@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Post
+from core.services.markup import RENDERER_VERSION
+
+
+class Command(BaseCommand):
+    help = "Пересобирает сохранённый HTML постов, отрендеренный старой версией markdown-пайплайна."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Пересобрать все посты, включая актуальные")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        size = options["batch_size"]
+
+        qs = Post.objects.only("id", "text", "text_html", "text_html_version")
+        if not options["all"]:
+            qs = qs.exclude(text_html_version=RENDERER_VERSION)
+
+        done = 0
+        last_id = 0
+        while True:
+            batch = list(qs.filter(id__gt=last_id).order_by("id")[:size])
+            if not batch:
+                break
+
+            for post in batch:
+                post.render_text()
+            Post.objects.bulk_update(batch, ["text_html", "text_html_version"])
+
+            done += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f"... {done}")
+
+        self.stdout.write(self.style.SUCCESS(f"Готово! Пересобрано постов: {done} (версия {RENDERER_VERSION})"))
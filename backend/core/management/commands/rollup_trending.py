@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.services import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Сворачивает новые лайки/комментарии/вступления/посты в почасовые счётчики "
+        "и пересчитывает «сейчас в тренде». Запускать по cron раз в несколько минут."
+    )
+
+    def handle(self, *args, **options):
+        for source, count in trending.rollup().items():
+            self.stdout.write(f"{source}: {count}")
+
+        stored = trending.recompute()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово! В тренде постов: {stored['post']}, сообществ: {stored['community']}"
+            )
+        )
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-17 10:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_chatmessageattachment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimelineEntry",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(verbose_name="Создано (пост)")),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline_entries",
+                        to="core.post",
+                        verbose_name="Пост",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline_entries",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Читатель",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="timelineentry",
+            constraint=models.UniqueConstraint(fields=("user", "post"), name="uniq_timeline_user_post"),
+        ),
+        migrations.AddIndex(
+            model_name="timelineentry",
+            index=models.Index(fields=["user", "-created_at", "-post"], name="timeline_user_range_idx"),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:00
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model("core", "Post")
+    Comment = apps.get_model("core", "Comment")
+
+    for p in (
+        Post.objects.annotate(
+            n_likes=Count("likes", distinct=True),
+            n_comments=Count("comments", distinct=True),
+            n_top=Count("comments", filter=Q(comments__parent__isnull=True), distinct=True),
+        )
+        .only("id")
+        .iterator()
+    ):
+        Post.objects.filter(id=p.id).update(
+            likes_count=p.n_likes,
+            comments_count=p.n_comments,
+            top_comments_count=p.n_top,
+        )
+
+    for c in (
+        Comment.objects.annotate(
+            n_likes=Count("likes", distinct=True),
+            n_replies=Count("replies", distinct=True),
+        )
+        .only("id")
+        .iterator()
+    ):
+        Comment.objects.filter(id=c.id).update(likes_count=c.n_likes, replies_count=c.n_replies)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_timelineentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Лайков"),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Комментариев"),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="top_comments_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Комментариев верхнего уровня"),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Лайков"),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="replies_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Ответов"),
+        ),
+        migrations.CreateModel(
+            name="PostCounterShard",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("shard", models.PositiveSmallIntegerField(verbose_name="Шард")),
+                ("likes", models.IntegerField(default=0)),
+                ("comments", models.IntegerField(default=0)),
+                ("top_comments", models.IntegerField(default=0)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counter_shards",
+                        to="core.post",
+                        verbose_name="Пост",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="postcountershard",
+            constraint=models.UniqueConstraint(fields=("post", "shard"), name="uniq_post_counter_shard"),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
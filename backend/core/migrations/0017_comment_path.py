@@ -0,0 +1,66 @@
+# Generated by Django 5.2.8 on 2026-10-17 12:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+SEGMENT_WIDTH = 10
+MAX_DEPTH = 60
+BATCH_SIZE = 1000
+
+
+def backfill_paths(apps, schema_editor):
+    Comment = apps.get_model("core", "Comment")
+
+    # Родитель всегда создан раньше ответа, поэтому обхода по id достаточно.
+    # Старые цепочки глубже MAX_DEPTH обрезаются как в Comment.save: ответ переезжает к предку
+    # глубины MAX_DEPTH - 1 (иначе путь не помещается в max_length=700).
+    paths = {}
+    batch = []
+    reparented = set()
+    for c in Comment.objects.order_by("id").only("id", "parent_id").iterator():
+        parent_path = paths.get(c.parent_id, "") if c.parent_id else ""
+        if parent_path.count("/") > MAX_DEPTH:
+            reparented.add(c.parent_id)
+            parent_path = parent_path[: MAX_DEPTH * (SEGMENT_WIDTH + 1)]
+            c.parent_id = int(parent_path[-(SEGMENT_WIDTH + 1) : -1])
+            reparented.add(c.parent_id)
+        c.path = f"{parent_path}{c.id:0{SEGMENT_WIDTH}d}/"
+        c.depth = parent_path.count("/")
+        paths[c.id] = c.path
+        batch.append(c)
+        if len(batch) >= BATCH_SIZE:
+            Comment.objects.bulk_update(batch, ["parent", "path", "depth"])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ["parent", "path", "depth"])
+
+    # прежний и новый родитель перенесённых ответов: пересчёт replies_count (0016)
+    reparented = sorted(reparented)
+    for i in range(0, len(reparented), BATCH_SIZE):
+        rows = Comment.objects.filter(id__in=reparented[i : i + BATCH_SIZE]).annotate(n=Count("replies")).only("id")
+        Comment.objects.bulk_update([Comment(id=r.id, replies_count=r.n) for r in rows], ["replies_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_post_comment_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.CharField(blank=True, default="", editable=False, max_length=700, verbose_name="Путь в дереве"),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="depth",
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Глубина"),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["post", "path"], name="comment_post_path_idx"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_comment_path"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["post", "parent", "-created_at", "-id"], name="comment_thread_page_idx"),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0018_comment_thread_page_idx"),
+    ]
+
+    # Существующие посты рендерятся командой rerender_markdown (до этого — на лету).
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="text_html",
+            field=models.TextField(blank=True, default="", editable=False, verbose_name="HTML текста"),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="text_html_version",
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Версия рендера"),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-17 15:00
+
+from django.db import migrations, models
+
+
+KIND_CHOICES = [("post", "Пост"), ("user", "Пользователь"), ("community", "Сообщество")]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0019_post_text_html"),
+    ]
+
+    # Индекс заполняется командой rebuild_search_index, дальше поддерживается сигналами.
+    operations = [
+        migrations.CreateModel(
+            name="SearchPosting",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("term", models.CharField(max_length=64, verbose_name="Терм")),
+                ("kind", models.CharField(choices=KIND_CHOICES, max_length=16, verbose_name="Тип документа")),
+                ("object_id", models.PositiveBigIntegerField(verbose_name="ID документа")),
+                ("tf", models.PositiveIntegerField(verbose_name="Частота терма")),
+                ("doc_length", models.PositiveIntegerField(verbose_name="Длина документа")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["kind", "object_id"], name="search_posting_doc_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("term", "kind", "object_id"), name="uniq_search_posting")
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="SearchCorpusStat",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(choices=KIND_CHOICES, max_length=16, unique=True, verbose_name="Тип документа")),
+                ("documents", models.IntegerField(default=0, verbose_name="Документов")),
+                ("total_length", models.BigIntegerField(default=0, verbose_name="Суммарная длина")),
+            ],
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-17 16:00
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+WORD_RE = re.compile(r"[0-9a-zа-я]+")
+
+
+def trigrams(text):
+    grams = set()
+    for word in WORD_RE.findall((text or "").lower().replace("ё", "е")):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def backfill_trigrams(apps, schema_editor):
+    Community = apps.get_model("core", "Community")
+    CommunityTrigram = apps.get_model("core", "CommunityTrigram")
+
+    for c in Community.objects.only("id", "name", "description").iterator():
+        rows = [
+            CommunityTrigram(community_id=c.id, field=field, trigram=gram, set_size=len(grams))
+            for field, grams in (("name", trigrams(c.name)), ("desc", trigrams(c.description)))
+            for gram in grams
+        ]
+        CommunityTrigram.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0020_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CommunityTrigram",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("field", models.CharField(choices=[("name", "Название"), ("desc", "Описание")], max_length=4, verbose_name="Поле")),
+                ("trigram", models.CharField(max_length=3, verbose_name="Триграмма")),
+                ("set_size", models.PositiveIntegerField(verbose_name="Триграмм в поле")),
+                (
+                    "community",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trigrams",
+                        to="core.community",
+                        verbose_name="Сообщество",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("trigram", "field", "community"), name="uniq_community_trigram")
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_trigrams, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:00
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_stats(apps, schema_editor):
+    Community = apps.get_model("core", "Community")
+    CommunityMembership = apps.get_model("core", "CommunityMembership")
+    Post = apps.get_model("core", "Post")
+
+    members = dict(
+        CommunityMembership.objects.values("community_id").annotate(n=Count("id")).values_list("community_id", "n")
+    )
+    posts = {
+        r["community_id"]: (r["n"], r["last"])
+        for r in Post.objects.filter(community__isnull=False)
+        .values("community_id")
+        .annotate(n=Count("id"), last=Max("created_at"))
+    }
+    for community_id in Community.objects.values_list("id", flat=True).iterator():
+        n, last = posts.get(community_id, (0, None))
+        Community.objects.filter(id=community_id).update(
+            members_count=members.get(community_id, 0),
+            posts_count=n,
+            has_posts=bool(n),
+            last_post_at=last,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0021_communitytrigram"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="community",
+            name="members_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Участников"),
+        ),
+        migrations.AddField(
+            model_name="community",
+            name="posts_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Постов"),
+        ),
+        migrations.AddField(
+            model_name="community",
+            name="has_posts",
+            field=models.BooleanField(default=False, verbose_name="Есть посты"),
+        ),
+        migrations.AddField(
+            model_name="community",
+            name="last_post_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Последний пост"),
+        ),
+        migrations.AddIndex(
+            model_name="community",
+            index=models.Index(
+                fields=["-has_posts", "-last_post_at", "-created_at"], name="community_directory_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
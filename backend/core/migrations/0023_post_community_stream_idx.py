@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0022_community_stats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["community", "-created_at", "-id"], name="post_community_stream_idx"),
+        ),
+    ]
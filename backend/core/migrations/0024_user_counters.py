@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    User = apps.get_model("core", "User")
+    Follow = apps.get_model("core", "Follow")
+    Post = apps.get_model("core", "Post")
+
+    followers = dict(Follow.objects.values("following_id").annotate(n=Count("id")).values_list("following_id", "n"))
+    following = dict(Follow.objects.values("follower_id").annotate(n=Count("id")).values_list("follower_id", "n"))
+    posts = dict(Post.objects.values("author_id").annotate(n=Count("id")).values_list("author_id", "n"))
+
+    for user_id in User.objects.values_list("id", flat=True).iterator():
+        User.objects.filter(id=user_id).update(
+            followers_count=followers.get(user_id, 0),
+            following_count=following.get(user_id, 0),
+            posts_count=posts.get(user_id, 0),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0023_post_community_stream_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Подписчиков"),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="following_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Подписок"),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="posts_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Постов"),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["author", "-created_at", "-id"], name="post_author_stream_idx"),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
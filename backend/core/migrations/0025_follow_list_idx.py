@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0024_user_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(fields=["following", "-created_at", "-id"], name="follow_followers_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(fields=["follower", "-created_at", "-id"], name="follow_following_idx"),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0025_follow_list_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="communitymembership",
+            index=models.Index(
+                fields=["community", "-is_admin", "-joined_at", "-id"], name="membership_list_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0026_membership_list_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FollowSuggestion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("score", models.FloatField(verbose_name="Оценка")),
+                ("mutual_follows", models.PositiveIntegerField(default=0, verbose_name="Общих подписок")),
+                ("shared_communities", models.PositiveIntegerField(default=0, verbose_name="Общих сообществ")),
+                ("expires_at", models.DateTimeField(verbose_name="Действует до")),
+                (
+                    "suggested",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Кого предложить",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="follow_suggestions",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Кому",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["user", "-score"], name="follow_suggestion_user_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("user", "suggested"), name="uniq_follow_suggestion"),
+                ],
+            },
+        ),
+    ]
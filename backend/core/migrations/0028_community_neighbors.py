@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0027_followsuggestion"),
+    ]
+
+    # neighbors_computed_at = NULL: первый запуск compute_community_neighbors посчитает всех
+    operations = [
+        migrations.AddField(
+            model_name="community",
+            name="members_changed_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Состав изменён"),
+        ),
+        migrations.AddField(
+            model_name="community",
+            name="neighbors_computed_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Соседи посчитаны"),
+        ),
+        migrations.CreateModel(
+            name="CommunityNeighbor",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("similarity", models.FloatField(verbose_name="Похожесть")),
+                (
+                    "community",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="neighbors",
+                        to="core.community",
+                        verbose_name="Сообщество",
+                    ),
+                ),
+                (
+                    "neighbor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.community",
+                        verbose_name="Похожее сообщество",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["community", "-similarity"], name="community_neighbor_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("community", "neighbor"), name="uniq_community_neighbor"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0028_community_neighbors"),
+    ]
+
+    # Существующие записи получают оценки при первом запуске rank_timelines.
+    operations = [
+        migrations.AddField(
+            model_name="timelineentry",
+            name="score",
+            field=models.FloatField(default=0.0, verbose_name="Оценка"),
+        ),
+        migrations.AddIndex(
+            model_name="timelineentry",
+            index=models.Index(fields=["user", "-score", "-post"], name="timeline_user_rank_idx"),
+        ),
+    ]
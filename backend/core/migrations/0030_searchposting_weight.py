@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:00
+
+import math
+
+from django.db import migrations, models
+
+
+def backfill_weights(apps, schema_editor):
+    SearchPosting = apps.get_model("core", "SearchPosting")
+
+    def flush(rows):
+        norm = math.sqrt(sum((1.0 + math.log(r.tf)) ** 2 for r in rows)) or 1.0
+        for r in rows:
+            r.weight = (1.0 + math.log(r.tf)) / norm
+        SearchPosting.objects.bulk_update(rows, ["weight"], batch_size=1000)
+
+    doc, rows = None, []
+    for posting in SearchPosting.objects.only("id", "kind", "object_id", "tf").order_by("kind", "object_id").iterator():
+        if (posting.kind, posting.object_id) != doc and rows:
+            flush(rows)
+            rows = []
+        doc = (posting.kind, posting.object_id)
+        rows.append(posting)
+    if rows:
+        flush(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0029_timelineentry_score"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchposting",
+            name="weight",
+            field=models.FloatField(default=0.0, verbose_name="Вес терма"),
+        ),
+        migrations.RunPython(backfill_weights, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0030_searchposting_weight"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # Сигнатуры появляются у новых и отредактированных текстов: сравнивать имеет смысл
+    # только с недавними (DUPLICATE_WINDOW_DAYS), так что бэкфилл не нужен.
+    operations = [
+        migrations.CreateModel(
+            name="TextSketch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("signature", models.BinaryField(verbose_name="Сигнатура")),
+                ("similarity", models.FloatField(default=0.0, verbose_name="Похожесть")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Создано")),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор",
+                    ),
+                ),
+                (
+                    "comment",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sketch",
+                        to="core.comment",
+                        verbose_name="Комментарий",
+                    ),
+                ),
+                (
+                    "duplicate_of",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="core.textsketch",
+                        verbose_name="Почти-дубль",
+                    ),
+                ),
+                (
+                    "post",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sketch",
+                        to="core.post",
+                        verbose_name="Пост",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["created_at"], name="text_sketch_created_idx")],
+            },
+        ),
+        migrations.CreateModel(
+            name="TextSketchBucket",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("bucket", models.BigIntegerField(verbose_name="Корзина")),
+                (
+                    "sketch",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="buckets",
+                        to="core.textsketch",
+                        verbose_name="Сигнатура",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["bucket"], name="text_sketch_bucket_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0031_textsketch"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # Индекс по существующим постам строит команда rebuild_hashtags
+    # (и rerender_markdown — ссылки на теги в уже сохранённом HTML).
+    operations = [
+        migrations.CreateModel(
+            name="Hashtag",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=64, unique=True, verbose_name="Тег")),
+                ("posts_count", models.PositiveIntegerField(default=0, verbose_name="Постов")),
+                ("last_used_at", models.DateTimeField(blank=True, null=True, verbose_name="Последний пост")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Создан")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PostHashtag",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(verbose_name="Создано (пост)")),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hashtag_links",
+                        to="core.post",
+                        verbose_name="Пост",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="post_links",
+                        to="core.hashtag",
+                        verbose_name="Тег",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("tag", "post"), name="uniq_post_hashtag")],
+                "indexes": [
+                    models.Index(fields=["tag", "-created_at", "-post"], name="hashtag_post_range_idx"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="Mention",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(verbose_name="Создано (текст)")),
+                (
+                    "comment",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.comment",
+                        verbose_name="Комментарий",
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.post",
+                        verbose_name="Пост",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="mentions",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Кого упомянули",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["user", "-created_at", "-id"], name="mention_user_range_idx"),
+                ],
+            },
+        ),
+    ]
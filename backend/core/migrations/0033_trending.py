@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0032_hashtags_mentions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrendingBucket",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("post", "Пост"), ("community", "Сообщество")], max_length=16, verbose_name="Тип"
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField(verbose_name="ID объекта")),
+                ("hour", models.DateTimeField(verbose_name="Час")),
+                ("likes", models.PositiveIntegerField(default=0, verbose_name="Лайков")),
+                ("comments", models.PositiveIntegerField(default=0, verbose_name="Комментариев")),
+                ("members", models.PositiveIntegerField(default=0, verbose_name="Новых участников")),
+                ("posts", models.PositiveIntegerField(default=0, verbose_name="Новых постов")),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("kind", "object_id", "hour"), name="uniq_trending_bucket"),
+                ],
+                "indexes": [models.Index(fields=["hour"], name="trending_bucket_hour_idx")],
+            },
+        ),
+        migrations.CreateModel(
+            name="TrendingItem",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("post", "Пост"), ("community", "Сообщество")], max_length=16, verbose_name="Тип"
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField(verbose_name="ID объекта")),
+                ("rank", models.PositiveSmallIntegerField(verbose_name="Место")),
+                ("score", models.FloatField(verbose_name="Оценка")),
+                ("computed_at", models.DateTimeField(verbose_name="Посчитано")),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("kind", "rank"), name="uniq_trending_rank")],
+            },
+        ),
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("source", models.CharField(max_length=32, unique=True, verbose_name="Источник")),
+                ("last_id", models.PositiveBigIntegerField(default=0, verbose_name="Последний учтённый id")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Обновлено")),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0033_trending"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="views_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Просмотров"),
+        ),
+        migrations.CreateModel(
+            name="PostViewSketch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("registers", models.BinaryField(verbose_name="Регистры")),
+                (
+                    "post",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="view_sketch",
+                        to="core.post",
+                        verbose_name="Пост",
+                    ),
+                ),
+            ],
+        ),
+    ]
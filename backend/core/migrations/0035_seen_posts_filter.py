@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0034_post_views"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeenPostsFilter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("data", models.BinaryField(verbose_name="Фильтр")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Обновлён")),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seen_filter",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0035_seen_posts_filter"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="searchposting",
+            index=models.Index(fields=["term", "kind", "-weight", "-object_id"], name="search_posting_impact_idx"),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_df(apps, schema_editor):
+    SearchPosting = apps.get_model("core", "SearchPosting")
+    SearchTermStat = apps.get_model("core", "SearchTermStat")
+
+    rows = SearchPosting.objects.values_list("term", "kind").annotate(n=Count("id")).order_by()
+    SearchTermStat.objects.bulk_create(
+        (SearchTermStat(term=term, kind=kind, documents=n) for term, kind, n in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0036_search_posting_impact_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchTermStat",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("term", models.CharField(max_length=64, verbose_name="Терм")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("post", "Пост"), ("user", "Пользователь"), ("community", "Сообщество")],
+                        max_length=16,
+                        verbose_name="Тип документа",
+                    ),
+                ),
+                ("documents", models.IntegerField(default=0, verbose_name="Документов")),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("term", "kind"), name="uniq_search_term_stat")],
+            },
+        ),
+        migrations.RunPython(backfill_df, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill(apps, schema_editor):
+    Mention = apps.get_model("core", "Mention")
+    MentionedPost = apps.get_model("core", "MentionedPost")
+
+    rows = Mention.objects.values_list("user_id", "post_id").annotate(last=Max("created_at")).order_by()
+    MentionedPost.objects.bulk_create(
+        (MentionedPost(user_id=user_id, post_id=post_id, last_mentioned_at=last) for user_id, post_id, last in rows),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0037_searchtermstat"),
+    ]
+
+    operations = [
+        # лента упоминаний читает MentionedPost
+        migrations.RemoveIndex(model_name="mention", name="mention_user_range_idx"),
+        migrations.CreateModel(
+            name="MentionedPost",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("last_mentioned_at", models.DateTimeField(verbose_name="Последнее упоминание")),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.post",
+                        verbose_name="Пост",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Кого упомянули",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("user", "post"), name="uniq_mentioned_post")],
+                "indexes": [
+                    models.Index(fields=["user", "-last_mentioned_at", "-post"], name="mentioned_post_range_idx")
+                ],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
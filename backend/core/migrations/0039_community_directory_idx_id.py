@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0038_mentionedpost"),
+    ]
+
+    operations = [
+        # -id в конце: каталог листается курсором (has_posts, last_post_at, created_at, id)
+        migrations.RemoveIndex(
+            model_name="community",
+            name="community_directory_idx",
+        ),
+        migrations.AddIndex(
+            model_name="community",
+            index=models.Index(
+                fields=["-has_posts", "-last_post_at", "-created_at", "-id"], name="community_directory_idx"
+            ),
+        ),
+    ]
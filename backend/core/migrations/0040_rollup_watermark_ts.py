@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Max
+
+# source -> (model, timestamp field), as in core/services/trending.SOURCES
+SOURCES = {
+    "like": ("Like", "created_at"),
+    "comment": ("Comment", "created_at"),
+    "membership": ("CommunityMembership", "joined_at"),
+    "post": ("Post", "created_at"),
+}
+
+
+def watermark_from_id(apps, schema_editor):
+    """Rows up to last_id were counted: continue after the latest timestamp among them."""
+
+    RollupWatermark = apps.get_model("core", "RollupWatermark")
+    for watermark in RollupWatermark.objects.filter(last_id__gt=0):
+        if watermark.source not in SOURCES:
+            continue
+        model_name, ts_field = SOURCES[watermark.source]
+        model = apps.get_model("core", model_name)
+        last_ts = model.objects.filter(id__lte=watermark.last_id).aggregate(ts=Max(ts_field))["ts"]
+        RollupWatermark.objects.filter(id=watermark.id).update(last_ts=last_ts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0039_community_directory_idx_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="rollupwatermark",
+            name="last_ts",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Время последней учтённой строки"),
+        ),
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(fields=["created_at", "id"], name="like_rollup_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["created_at", "id"], name="comment_rollup_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="communitymembership",
+            index=models.Index(fields=["joined_at", "id"], name="membership_rollup_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["created_at", "id"], name="post_rollup_idx"),
+        ),
+        migrations.RunPython(watermark_from_id, migrations.RunPython.noop),
+    ]
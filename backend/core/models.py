@@ -5,8 +5,13 @@ from django.db import models
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 import mimetypes
+from django.utils.safestring import mark_safe
 from django.utils.text import slugify
 
+from .constants import COMMENT_MAX_DEPTH, COMMENT_PATH_SEGMENT_WIDTH
+from .services.markup import RENDERER_VERSION, render_markdown
+from .services.trigrams import trigrams
+
 
 class Community(models.Model):
     """Минимальная модель сообщества."""
@@ -24,8 +29,22 @@ class Community(models.Model):
     created_at = models.DateTimeField("Создано", auto_now_add=True)
     updated_at = models.DateTimeField("Обновлено", auto_now=True)
 
+    # Денормализованная статистика для каталога /communities/ (core/services/counters.py).
+    # has_posts хранится отдельно: сортировка каталога идёт целиком по индексу.
+    members_count = models.PositiveIntegerField("Участников", default=0)
+    posts_count = models.PositiveIntegerField("Постов", default=0)
+    has_posts = models.BooleanField("Есть посты", default=False)
+    last_post_at = models.DateTimeField("Последний пост", null=True, blank=True)
+    # Рекомендации похожих сообществ (core/services/community_recs.py): строка пересчитывается,
+    # если состав участников менялся после последнего расчёта соседей.
+    members_changed_at = models.DateTimeField("Состав изменён", null=True, blank=True)
+    neighbors_computed_at = models.DateTimeField("Соседи посчитаны", null=True, blank=True)
+
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["-has_posts", "-last_post_at", "-created_at", "-id"], name="community_directory_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -54,9 +73,22 @@ class Community(models.Model):
             self.slug = slug
         super().save(*args, **kwargs)
 
-    @property
-    def members_count(self):
-        return self.memberships.count()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"name", "description"} & set(update_fields):
+            self.update_trigrams()
+
+    def update_trigrams(self):
+        """Пересобрать строки CommunityTrigram (нечёткий поиск в /communities/)."""
+        rows = [
+            CommunityTrigram(community=self, field=field, trigram=gram, set_size=len(grams))
+            for field, grams in (
+                (CommunityTrigram.FIELD_NAME, trigrams(self.name)),
+                (CommunityTrigram.FIELD_DESCRIPTION, trigrams(self.description)),
+            )
+            for gram in grams
+        ]
+        CommunityTrigram.objects.filter(community=self).delete()
+        CommunityTrigram.objects.bulk_create(rows)
 
     def is_member(self, user):
         if not user or not user.is_authenticated:
@@ -88,29 +120,94 @@ class CommunityMembership(models.Model):
     class Meta:
         unique_together = ("community", "user")
         ordering = ["-joined_at"]
+        indexes = [
+            # список участников: админы, затем новые; keyset (is_admin, joined_at, id)
+            models.Index(fields=["community", "-is_admin", "-joined_at", "-id"], name="membership_list_idx"),
+            # rollup_trending: новые строки по водяному знаку (joined_at, id)
+            models.Index(fields=["joined_at", "id"], name="membership_rollup_idx"),
+        ]
 
     def __str__(self):
         role = "admin" if self.is_admin else "member"
         return f"{self.user} in {self.community} ({role})"
 
 
+class CommunityNeighbor(models.Model):
+    """Похожее сообщество: косинус по составу участников (команда compute_community_neighbors)."""
+
+    community = models.ForeignKey(
+        Community,
+        on_delete=models.CASCADE,
+        related_name="neighbors",
+        verbose_name="Сообщество",
+    )
+    neighbor = models.ForeignKey(
+        Community,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Похожее сообщество",
+    )
+    similarity = models.FloatField("Похожесть")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["community", "neighbor"], name="uniq_community_neighbor"),
+        ]
+        indexes = [
+            models.Index(fields=["community", "-similarity"], name="community_neighbor_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.community_id} ~ {self.neighbor_id} ({self.similarity:.3f})"
+
+
+class CommunityTrigram(models.Model):
+    """Триграммный индекс названия/описания сообщества.
+
+    set_size — число триграмм всего поля, чтобы похожесть (Dice) считалась
+    по одной выборке строк с общими триграммами, без чтения самих сообществ.
+    """
+
+    FIELD_NAME = "name"
+    FIELD_DESCRIPTION = "desc"
+    FIELD_CHOICES = [
+        (FIELD_NAME, "Название"),
+        (FIELD_DESCRIPTION, "Описание"),
+    ]
+
+    community = models.ForeignKey(
+        Community,
+        on_delete=models.CASCADE,
+        related_name="trigrams",
+        verbose_name="Сообщество",
+    )
+    field = models.CharField("Поле", max_length=4, choices=FIELD_CHOICES)
+    trigram = models.CharField("Триграмма", max_length=3)
+    set_size = models.PositiveIntegerField("Триграмм в поле")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["trigram", "field", "community"], name="uniq_community_trigram"),
+        ]
+
+    def __str__(self):
+        return f"{self.trigram!r} -> {self.community_id}/{self.field}"
+
+
 class User(AbstractUser):
     # @userid — это username (унаследован от AbstractUser) — НЕ МЕНЯЕМ
     display_name = models.CharField("Отображаемое имя", max_length=150, blank=True)
     avatar = models.ImageField("Аватар", upload_to="avatars/", blank=True, null=True)
     bio = models.TextField("О себе", blank=True)
 
+    # Денормализованные счётчики профиля (core/services/counters.py, repair_counters).
+    followers_count = models.PositiveIntegerField("Подписчиков", default=0)
+    following_count = models.PositiveIntegerField("Подписок", default=0)
+    posts_count = models.PositiveIntegerField("Постов", default=0)
+
     def __str__(self):
         return self.display_name or self.username
 
-    @property
-    def followers_count(self):
-        return self.followers.count()
-
-    @property
-    def following_count(self):
-        return self.following.count()
-
 
 class Follow(models.Model):
     follower = models.ForeignKey(
@@ -127,11 +224,51 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ("follower", "following")
+        indexes = [
+            # списки подписчиков / подписок: keyset (created_at, id) внутри одного пользователя
+            models.Index(fields=["following", "-created_at", "-id"], name="follow_followers_idx"),
+            models.Index(fields=["follower", "-created_at", "-id"], name="follow_following_idx"),
+        ]
 
     def __str__(self):
         return f"{self.follower} → {self.following}"
 
 
+class FollowSuggestion(models.Model):
+    """Предрасчитанная рекомендация «на кого подписаться» (команда compute_follow_suggestions).
+
+    Строки живут до expires_at: показ — одно чтение по индексу (user, -score).
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="follow_suggestions",
+        verbose_name="Кому",
+    )
+    suggested = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Кого предложить",
+    )
+    score = models.FloatField("Оценка")
+    mutual_follows = models.PositiveIntegerField("Общих подписок", default=0)
+    shared_communities = models.PositiveIntegerField("Общих сообществ", default=0)
+    expires_at = models.DateTimeField("Действует до")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "suggested"], name="uniq_follow_suggestion"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-score"], name="follow_suggestion_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} → {self.suggested_id} ({self.score:.3f})"
+
+
 class Post(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -140,6 +277,10 @@ class Post(models.Model):
         verbose_name="Автор",
     )
     text = models.TextField("Текст")
+    # Markdown, отрендеренный при сохранении (core/services/markup.py).
+    # Версия рендера отстала — пересобирается командой rerender_markdown.
+    text_html = models.TextField("HTML текста", blank=True, default="", editable=False)
+    text_html_version = models.PositiveSmallIntegerField("Версия рендера", default=0, editable=False)
     created_at = models.DateTimeField("Создано", auto_now_add=True)
 
     # Если заполнено — пост относится к сообществу.
@@ -154,17 +295,119 @@ class Post(models.Model):
     # Если True — отображать как "от лица сообщества".
     as_community = models.BooleanField("Опубликовать от лица сообщества", default=False)
 
+    # Денормализованные счётчики (см. core/services/counters.py).
+    # Свежие дельты копятся в PostCounterShard и периодически сворачиваются сюда.
+    likes_count = models.PositiveIntegerField("Лайков", default=0)
+    comments_count = models.PositiveIntegerField("Комментариев", default=0)
+    top_comments_count = models.PositiveIntegerField("Комментариев верхнего уровня", default=0)
+    # Оценка уникальных зрителей (HyperLogLog в PostViewSketch, core/services/post_views.py)
+    views_count = models.PositiveIntegerField("Просмотров", default=0)
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # лента сообщества / профиля: keyset (created_at, id) внутри сообщества или автора
+            models.Index(fields=["community", "-created_at", "-id"], name="post_community_stream_idx"),
+            models.Index(fields=["author", "-created_at", "-id"], name="post_author_stream_idx"),
+            # rollup_trending: новые строки по водяному знаку (created_at, id)
+            models.Index(fields=["created_at", "id"], name="post_rollup_idx"),
+        ]
 
     def __str__(self):
         return f"{self.author}: {self.text[:30]}"
 
+    def render_text(self):
+        self.text_html = render_markdown(self.text)
+        self.text_html_version = RENDERER_VERSION
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "text" in update_fields:
+            self.render_text()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "text_html", "text_html_version"}
+        super().save(*args, **kwargs)
+
+    @property
+    def rendered_text(self):
+        """Готовый HTML; для ещё не пересобранных строк — рендер на лету (без сохранения)."""
+        if self.text_html_version != RENDERER_VERSION:
+            return mark_safe(render_markdown(self.text))
+        return mark_safe(self.text_html)
+
     @property
     def is_community_post(self):
         return bool(self.community_id and self.as_community)
 
 
+class PostViewSketch(models.Model):
+    """HyperLogLog-скетч зрителей поста: 2^POST_VIEWS_HLL_PRECISION однобайтовых регистров."""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="view_sketch",
+        verbose_name="Пост",
+    )
+    registers = models.BinaryField("Регистры")
+
+    def __str__(self):
+        return f"PostViewSketch({self.post_id})"
+
+
+class SeenPostsFilter(models.Model):
+    """Сохранённая копия фильтра «уже показанных» постов пользователя (core/services/seen.py)."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seen_filter",
+        verbose_name="Пользователь",
+    )
+    data = models.BinaryField("Фильтр")
+    updated_at = models.DateTimeField("Обновлён", auto_now=True)
+
+    def __str__(self):
+        return f"SeenPostsFilter({self.user_id})"
+
+
+class TimelineEntry(models.Model):
+    """Материализованная домашняя лента: пост, разосланный подписчику при создании.
+
+    created_at копируется из поста, чтобы страница ленты читалась одним
+    диапазоном по индексу (user, -created_at, -post) без join на Post.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+        verbose_name="Читатель",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+        verbose_name="Пост",
+    )
+    created_at = models.DateTimeField("Создано (пост)")
+    # Оценка «умной» ленты (core/services/ranking.py): при вставке — только свежесть,
+    # периодически пересчитывается командой rank_timelines.
+    score = models.FloatField("Оценка", default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"], name="uniq_timeline_user_post"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-post"], name="timeline_user_range_idx"),
+            models.Index(fields=["user", "-score", "-post"], name="timeline_user_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"TimelineEntry({self.user_id} <- {self.post_id})"
+
+
 class Like(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -182,11 +425,107 @@ class Like(models.Model):
 
     class Meta:
         unique_together = ("user", "post")
+        indexes = [
+            # rollup_trending: новые строки по водяному знаку (created_at, id)
+            models.Index(fields=["created_at", "id"], name="like_rollup_idx"),
+        ]
 
     def __str__(self):
         return f"Like({self.user} -> {self.post_id})"
 
 
+class PostCounterShard(models.Model):
+    """Шард дельт счётчиков поста.
+
+    Лайк/комментарий обновляет одну случайную из POST_COUNTER_SHARDS строк,
+    поэтому писатели вирусного поста не выстраиваются в очередь за одной строкой Post.
+    """
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="counter_shards",
+        verbose_name="Пост",
+    )
+    shard = models.PositiveSmallIntegerField("Шард")
+    likes = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    top_comments = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["post", "shard"], name="uniq_post_counter_shard"),
+        ]
+
+    def __str__(self):
+        return f"PostCounterShard({self.post_id}#{self.shard})"
+
+
+class SearchPosting(models.Model):
+    """Строка инвертированного индекса поиска: терм -> документ (core/services/search.py).
+
+    Документ — пост, пользователь или сообщество (kind + object_id).
+    Длина документа продублирована в каждой строке, чтобы BM25 считался без join.
+    weight — вес терма в нормированном log-tf векторе документа (похожие посты).
+    """
+
+    KIND_POST = "post"
+    KIND_USER = "user"
+    KIND_COMMUNITY = "community"
+    KIND_CHOICES = [
+        (KIND_POST, "Пост"),
+        (KIND_USER, "Пользователь"),
+        (KIND_COMMUNITY, "Сообщество"),
+    ]
+
+    term = models.CharField("Терм", max_length=64)
+    kind = models.CharField("Тип документа", max_length=16, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField("ID документа")
+    tf = models.PositiveIntegerField("Частота терма")
+    doc_length = models.PositiveIntegerField("Длина документа")
+    weight = models.FloatField("Вес терма", default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["term", "kind", "object_id"], name="uniq_search_posting"),
+        ]
+        indexes = [
+            models.Index(fields=["kind", "object_id"], name="search_posting_doc_idx"),
+            # постинги частого терма читаются от самых весомых (поиск и похожие посты)
+            models.Index(fields=["term", "kind", "-weight", "-object_id"], name="search_posting_impact_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.kind}#{self.object_id}"
+
+
+class SearchCorpusStat(models.Model):
+    """Статистика корпуса для BM25: число документов и суммарная длина по типу."""
+
+    kind = models.CharField("Тип документа", max_length=16, unique=True, choices=SearchPosting.KIND_CHOICES)
+    documents = models.IntegerField("Документов", default=0)
+    total_length = models.BigIntegerField("Суммарная длина", default=0)
+
+    def __str__(self):
+        return f"SearchCorpusStat({self.kind}: {self.documents})"
+
+
+class SearchTermStat(models.Model):
+    """Документная частота терма (df) для idf: в скольких документах типа он встречается."""
+
+    term = models.CharField("Терм", max_length=64)
+    kind = models.CharField("Тип документа", max_length=16, choices=SearchPosting.KIND_CHOICES)
+    documents = models.IntegerField("Документов", default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["term", "kind"], name="uniq_search_term_stat"),
+        ]
+
+    def __str__(self):
+        return f"SearchTermStat({self.kind}: {self.term} = {self.documents})"
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -211,12 +550,53 @@ class Comment(models.Model):
     text = models.TextField("Текст комментария")
     created_at = models.DateTimeField("Создано", auto_now_add=True)
 
+    # Денормализованные счётчики
+    likes_count = models.PositiveIntegerField("Лайков", default=0)
+    replies_count = models.PositiveIntegerField("Ответов", default=0)
+
+    # Материализованный путь "0000000012/0000000034/": сортировка по нему = порядок вывода дерева,
+    # поддерево — префикс, предки — id из пути (см. core/services/comments.py)
+    path = models.CharField("Путь в дереве", max_length=700, blank=True, default="", editable=False)
+    depth = models.PositiveSmallIntegerField("Глубина", default=0, editable=False)
+
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["post", "path"], name="comment_post_path_idx"),
+            # превью и постраничная догрузка: ветка (post, parent) от новых к старым
+            models.Index(fields=["post", "parent", "-created_at", "-id"], name="comment_thread_page_idx"),
+            # rollup_trending: новые строки по водяному знаку (created_at, id)
+            models.Index(fields=["created_at", "id"], name="comment_rollup_idx"),
+        ]
 
     def __str__(self):
         return f"Комментарий от {self.author} к посту {self.post_id}"
 
+    def save(self, *args, **kwargs):
+        parent_path = None
+        if not self.path:
+            parent_path = self.parent.path if self.parent_id else ""
+            if self.parent_id and self.parent.depth >= COMMENT_MAX_DEPTH:
+                # глубже нельзя: ответ уходит к родителю родителя (его путь — путь родителя
+                # без последнего сегмента, без лишнего запроса); add_reply сообщает нового родителя
+                self.parent_id = self.parent.parent_id
+                parent_path = parent_path[: -(COMMENT_PATH_SEGMENT_WIDTH + 1)]
+        super().save(*args, **kwargs)
+        if parent_path is not None:
+            # id известен только после INSERT — дописываем путь вторым UPDATE
+            self.path = f"{parent_path}{self.pk:0{COMMENT_PATH_SEGMENT_WIDTH}d}/"
+            self.depth = parent_path.count("/")
+            Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+
+    @property
+    def path_ids(self):
+        """id от корня ветки до самого комментария включительно."""
+        return [int(part) for part in self.path.split("/") if part]
+
+    @property
+    def ancestor_ids(self):
+        return self.path_ids[:-1]
+
 
 class CommentLike(models.Model):
     user = models.ForeignKey(
@@ -240,6 +620,244 @@ class CommentLike(models.Model):
         return f"CommentLike({self.user} -> {self.comment_id})"
 
 
+class TextSketch(models.Model):
+    """MinHash-сигнатура текста поста или комментария (core/services/duplicates.py).
+
+    Почти-дубли ищутся по LSH-корзинам (TextSketchBucket), а не сравнением с историей.
+    duplicate_of — найденный при записи почти-дубль чужого текста (для модерации).
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="sketch",
+        verbose_name="Пост",
+    )
+    comment = models.OneToOneField(
+        Comment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="sketch",
+        verbose_name="Комментарий",
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Автор",
+    )
+    signature = models.BinaryField("Сигнатура")
+    duplicate_of = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Почти-дубль",
+    )
+    similarity = models.FloatField("Похожесть", default=0.0)
+    created_at = models.DateTimeField("Создано", auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"], name="text_sketch_created_idx"),
+        ]
+
+    def __str__(self):
+        target = f"post#{self.post_id}" if self.post_id else f"comment#{self.comment_id}"
+        return f"TextSketch({target})"
+
+
+class TextSketchBucket(models.Model):
+    """LSH-корзина сигнатуры: хэш одной полосы (band) MinHash-значений."""
+
+    sketch = models.ForeignKey(
+        TextSketch,
+        on_delete=models.CASCADE,
+        related_name="buckets",
+        verbose_name="Сигнатура",
+    )
+    bucket = models.BigIntegerField("Корзина")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["bucket"], name="text_sketch_bucket_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.bucket} -> {self.sketch_id}"
+
+
+class Hashtag(models.Model):
+    """#тег из текста постов (core/services/tags.py). name — в нижнем регистре, «ё» → «е»."""
+
+    name = models.CharField("Тег", max_length=64, unique=True)
+    posts_count = models.PositiveIntegerField("Постов", default=0)
+    last_used_at = models.DateTimeField("Последний пост", null=True, blank=True)
+    created_at = models.DateTimeField("Создан", auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class PostHashtag(models.Model):
+    """Тег поста. created_at копируется из поста: страница тега читается одним
+    диапазоном по индексу (tag, -created_at, -post) без join на Post."""
+
+    tag = models.ForeignKey(
+        Hashtag,
+        on_delete=models.CASCADE,
+        related_name="post_links",
+        verbose_name="Тег",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="hashtag_links",
+        verbose_name="Пост",
+    )
+    created_at = models.DateTimeField("Создано (пост)")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tag", "post"], name="uniq_post_hashtag"),
+        ]
+        indexes = [
+            models.Index(fields=["tag", "-created_at", "-post"], name="hashtag_post_range_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.tag_id} <- {self.post_id}"
+
+
+class Mention(models.Model):
+    """Упоминание @пользователя в посте (comment пуст) или в комментарии к нему."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="mentions",
+        verbose_name="Кого упомянули",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Пост",
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Комментарий",
+    )
+    created_at = models.DateTimeField("Создано (текст)")
+
+    def __str__(self):
+        return f"@{self.user_id} in {self.post_id}"
+
+
+class MentionedPost(models.Model):
+    """Пост, где пользователь упомянут (в тексте или комментариях): одна строка на пару, для ленты упоминаний.
+
+    last_mentioned_at — самое свежее из его Mention; ведётся core/services/tags.py.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Кого упомянули",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Пост",
+    )
+    last_mentioned_at = models.DateTimeField("Последнее упоминание")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"], name="uniq_mentioned_post"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-last_mentioned_at", "-post"], name="mentioned_post_range_idx"),
+        ]
+
+    def __str__(self):
+        return f"@{self.user_id} in {self.post_id}"
+
+
+class TrendingBucket(models.Model):
+    """Почасовые счётчики активности поста/сообщества (core/services/trending.py).
+
+    Пополняются командой rollup_trending только новыми строками источников
+    (см. RollupWatermark); старше окна TRENDING_WINDOW_HOURS — удаляются.
+    """
+
+    KIND_POST = "post"
+    KIND_COMMUNITY = "community"
+    KIND_CHOICES = [
+        (KIND_POST, "Пост"),
+        (KIND_COMMUNITY, "Сообщество"),
+    ]
+
+    kind = models.CharField("Тип", max_length=16, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField("ID объекта")
+    hour = models.DateTimeField("Час")
+    likes = models.PositiveIntegerField("Лайков", default=0)
+    comments = models.PositiveIntegerField("Комментариев", default=0)
+    members = models.PositiveIntegerField("Новых участников", default=0)
+    posts = models.PositiveIntegerField("Новых постов", default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id", "hour"], name="uniq_trending_bucket"),
+        ]
+        indexes = [
+            models.Index(fields=["hour"], name="trending_bucket_hour_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}#{self.object_id} @ {self.hour:%Y-%m-%d %H}:00"
+
+
+class TrendingItem(models.Model):
+    """Материализованный топ «сейчас в тренде»: виджет читает только эти строки."""
+
+    kind = models.CharField("Тип", max_length=16, choices=TrendingBucket.KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField("ID объекта")
+    rank = models.PositiveSmallIntegerField("Место")
+    score = models.FloatField("Оценка")
+    computed_at = models.DateTimeField("Посчитано")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "rank"], name="uniq_trending_rank"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.rank}: {self.object_id}"
+
+
+class RollupWatermark(models.Model):
+    """До какой строки (время, id) таблица-источник уже свёрнута в TrendingBucket."""
+
+    source = models.CharField("Источник", max_length=32, unique=True)
+    last_ts = models.DateTimeField("Время последней учтённой строки", null=True, blank=True)
+    last_id = models.PositiveBigIntegerField("Последний учтённый id", default=0)
+    updated_at = models.DateTimeField("Обновлено", auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}: {self.last_ts} #{self.last_id}"
+
+
 class Message(models.Model):
     sender = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import F, QuerySet, Window
+from django.db.models.functions import RowNumber
+
+from core.constants import COMMENTS_PAGE_SIZE, COMMENTS_PREVIEW_SIZE
+from core.models import Comment, Post
+from core.services.pagination import Cursor, encode_cursor, keyset_page
+
+
+def thread_queryset(post_ids: Iterable[int]) -> QuerySet:
+    """All comments of the posts in render order: one range read over (post, path)."""
+
+    return (
+        Comment.objects.filter(post_id__in=list(post_ids))
+        .select_related("author")
+        .order_by("post_id", "path")
+    )
+
+
+def build_forest(comments: Iterable[Comment]) -> List[Comment]:
+    """Link path-ordered comments into a tree without extra queries.
+
+    Every comment gets `tree_children` (list, creation order); parent FK cache is
+    filled from the same rows, so templates can read c.parent.author for free.
+    Returns the top-level comments.
+    """
+
+    by_id: Dict[int, Comment] = {}
+    roots: List[Comment] = []
+    for c in comments:
+        c.tree_children = []
+        by_id[c.id] = c
+        parent = by_id.get(c.parent_id) if c.parent_id else None
+        if parent is not None:
+            c.parent = parent
+            parent.tree_children.append(c)
+        elif c.parent_id is None:
+            roots.append(c)
+    return roots
+
+
+def attach_threads(posts: Iterable[Post]) -> List[Post]:
+    """Load comment trees of all given posts in one query (sets post.comment_tree)."""
+
+    posts = list(posts)
+    grouped: Dict[int, List[Comment]] = defaultdict(list)
+    for c in thread_queryset(p.id for p in posts):
+        grouped[c.post_id].append(c)
+
+    for p in posts:
+        p.comment_tree = build_forest(grouped.get(p.id, []))
+    return posts
+
+
+def attach_previews(posts: Iterable[Post], size: int = COMMENTS_PREVIEW_SIZE) -> List[Post]:
+    """Attach the `size` newest top-level comments of every post (one window query).
+
+    Sets post.comment_tree (oldest first, replies are loaded lazily) and
+    post.comments_cursor: cursor of the rest of the thread, "" when the preview is all of it.
+    """
+
+    posts = list(posts)
+    if not posts:
+        return posts
+
+    # size + 1 per post: the extra row only tells us whether there is more
+    ranked = (
+        Comment.objects.filter(post_id__in=[p.id for p in posts], parent__isnull=True)
+        .annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F("post_id")],
+                order_by=[F("created_at").desc(), F("id").desc()],
+            )
+        )
+        .filter(rank__lte=size + 1)
+        .select_related("author")
+    )
+    grouped: Dict[int, List[Comment]] = defaultdict(list)
+    for c in ranked:
+        grouped[c.post_id].append(c)
+
+    for p in posts:
+        rows = sorted(grouped.get(p.id, []), key=lambda c: c.rank)
+        preview = rows[:size]
+        p.comment_tree = preview[::-1]
+        p.comments_cursor = (
+            encode_cursor((preview[-1].created_at, preview[-1].id)) if len(rows) > size else ""
+        )
+    return posts
+
+
+def comments_page(
+    post_id: int,
+    parent: Optional[Comment] = None,
+    before: Optional[Cursor] = None,
+    limit: int = COMMENTS_PAGE_SIZE,
+) -> Tuple[List[Comment], Optional[Cursor]]:
+    """One page of top-level comments (or direct replies to `parent`), newest first."""
+
+    qs = Comment.objects.filter(post_id=post_id).select_related("author")
+    if parent is None:
+        qs = qs.filter(parent__isnull=True)
+    else:
+        qs = qs.filter(parent_id=parent.id)
+
+    items, next_cursor = keyset_page(qs, limit, before)
+    if parent is not None:
+        for c in items:
+            c.parent = parent
+    return items, next_cursor
+
+
+def load_subtree(comment: Comment) -> List[Comment]:
+    """The comment and all its descendants, in render order (prefix scan on path)."""
+
+    return list(
+        Comment.objects.filter(post_id=comment.post_id, path__startswith=comment.path)
+        .select_related("author")
+        .order_by("path")
+    )
+
+
+def ancestors(comment: Comment) -> List[Comment]:
+    """Ancestor chain from the thread root down to the direct parent (one pk lookup)."""
+
+    ids = comment.ancestor_ids
+    if not ids:
+        return []
+    return list(Comment.objects.filter(id__in=ids).select_related("author").order_by("path"))
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import heapq
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Count, Q, QuerySet
+
+from core.constants import (
+    COMMUNITY_FUZZY_CANDIDATES,
+    COMMUNITY_FUZZY_LIMIT,
+    COMMUNITY_FUZZY_MIN_SCORE,
+    COMMUNITY_FUZZY_NAME_WEIGHT,
+)
+from core.models import Community, CommunityMembership, CommunityTrigram
+from core.services.pagination import DirectoryCursor, MemberCursor
+from core.services.trigrams import similarity, trigrams
+
+
+def fuzzy_candidates(query: str, limit: int = COMMUNITY_FUZZY_CANDIDATES) -> List[int]:
+    """Ids of the communities sharing trigrams with the query, most similar (Dice) first.
+
+    One indexed lookup of the query's trigrams, grouped per (community, field):
+    only communities sharing at least one trigram are ever touched.
+    """
+
+    grams = trigrams(query)
+    if not grams:
+        return []
+
+    rows = (
+        CommunityTrigram.objects.filter(trigram__in=grams)
+        .values("community_id", "field", "set_size")
+        .annotate(shared=Count("id"))
+    )
+
+    best: Dict[int, float] = {}
+    for r in rows:
+        sim = similarity(r["shared"], len(grams), r["set_size"])
+        if r["field"] == CommunityTrigram.FIELD_NAME:
+            sim *= COMMUNITY_FUZZY_NAME_WEIGHT
+        best[r["community_id"]] = max(best.get(r["community_id"], 0.0), sim)
+
+    return heapq.nlargest(limit, best, key=lambda community_id: (best[community_id], community_id))
+
+
+def fuzzy_search(query: str, limit: int = COMMUNITY_FUZZY_LIMIT) -> List[int]:
+    """Ids of communities whose name/description look like the query, best first.
+
+    The rule of the old full scan, applied to fuzzy_candidates() only:
+    score = max(ratio(query, name) * COMMUNITY_FUZZY_NAME_WEIGHT, ratio(query, description))
+    >= COMMUNITY_FUZZY_MIN_SCORE, ratio being SequenceMatcher's; ties by the name ratio, then
+    the description ratio. Trigram Dice alone misses short typos ("ктоты" shares one trigram
+    with "котики"), so it only picks whom to score. A community sharing no trigram with
+    the query ("нгии" for "книги") is not found.
+    """
+
+    candidates = fuzzy_candidates(query)
+    if not candidates:
+        return []
+
+    query_lower = query.lower()
+    scored = []
+    for community_id, name, description in Community.objects.filter(id__in=candidates).values_list(
+        "id", "name", "description"
+    ):
+        ns = SequenceMatcher(None, query_lower, (name or "").lower()).ratio()
+        ds = SequenceMatcher(None, query_lower, (description or "").lower()).ratio()
+        score = max(ns * COMMUNITY_FUZZY_NAME_WEIGHT, ds)
+        if score >= COMMUNITY_FUZZY_MIN_SCORE:
+            scored.append((score, ns, ds, community_id))
+
+    return [community_id for *_, community_id in heapq.nlargest(limit, scored)]
+
+
+def directory_page(
+    qs: QuerySet,
+    limit: int,
+    after: Optional[DirectoryCursor] = None,
+    ranked: bool = False,
+) -> Tuple[List[Community], Optional[DirectoryCursor]]:
+    """One page of the communities directory: with posts first, by latest post, then newest.
+
+    Order (-has_posts, -last_post_at, -created_at, -id) is community_directory_idx, so
+    the plain directory is a range read at any page: no COUNT(*) and no OFFSET.
+    Search results (ranked=True) come first by their annotated search_rank.
+    """
+
+    if after is not None:
+        rank, has_posts, last_post_at, created_at, last_id = after
+        tail = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=last_id)
+        if has_posts:
+            rest = Q(has_posts=False) | Q(has_posts=True, last_post_at__lt=last_post_at) | (
+                Q(has_posts=True, last_post_at=last_post_at) & tail
+            )
+        else:
+            # без постов last_post_at пуст: дальше только такие же, по created_at
+            rest = Q(has_posts=False) & tail
+        if ranked:
+            rest = Q(search_rank__gt=rank) | (Q(search_rank=rank) & rest)
+        qs = qs.filter(rest)
+
+    order = ("-has_posts", "-last_post_at", "-created_at", "-id")
+    items = list(qs.order_by(*(("search_rank",) + order if ranked else order))[: limit + 1])
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    last = items[-1]
+    rank = last.search_rank if ranked else None
+    return items, (rank, last.has_posts, last.last_post_at, last.created_at, last.id)
+
+
+def members_page(
+    community_id: int,
+    limit: int,
+    after: Optional[MemberCursor] = None,
+) -> Tuple[List[CommunityMembership], Optional[MemberCursor]]:
+    """One page of members: admins first, then newest; cursor (is_admin, joined_at, id).
+
+    A range read over membership_list_idx — no COUNT(*) and no OFFSET.
+    """
+
+    qs = CommunityMembership.objects.filter(community_id=community_id).select_related("user")
+    if after is not None:
+        is_admin, joined_at, last_id = after
+        qs = qs.filter(
+            Q(is_admin__lt=is_admin)
+            | Q(is_admin=is_admin, joined_at__lt=joined_at)
+            | Q(is_admin=is_admin, joined_at=joined_at, id__lt=last_id)
+        )
+    items = list(qs.order_by("-is_admin", "-joined_at", "-id")[: limit + 1])
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    last = items[-1]
+    return items, (last.is_admin, last.joined_at, last.id)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import heapq
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.constants import COMMUNITY_NEIGHBORS_K, COMMUNITY_RECS_MAX_SOURCES, COMMUNITY_RECS_SHOWN
+from core.models import Community, CommunityMembership, CommunityNeighbor, User
+
+_BULK_BATCH_SIZE = 1000
+
+
+# ---------------------------------------------------------------------------
+# Batch computation (compute_community_neighbors command)
+# ---------------------------------------------------------------------------
+
+class Memberships:
+    """The community × user matrix as two adjacency maps (columns and rows)."""
+
+    def __init__(self, pairs: Iterable[Tuple[int, int]]):
+        # taken before reading: a join during the load leaves the row stale for the next run
+        self.loaded_at = timezone.now()
+        self.members: Dict[int, Set[int]] = defaultdict(set)
+        self.communities: Dict[int, List[int]] = defaultdict(list)
+        for community_id, user_id in pairs:
+            self.members[community_id].add(user_id)
+            self.communities[user_id].append(community_id)
+
+    @classmethod
+    def from_db(cls) -> "Memberships":
+        return cls(CommunityMembership.objects.values_list("community_id", "user_id").iterator(chunk_size=10000))
+
+    def co_members(self, community_id: int) -> Dict[int, int]:
+        """|A ∩ B| for every B sharing a member with A: one sparse row of M·Mᵀ."""
+
+        counts: Dict[int, int] = defaultdict(int)
+        for user_id in self.members.get(community_id, ()):
+            for other in self.communities[user_id]:
+                counts[other] += 1
+        counts.pop(community_id, None)
+        return counts
+
+    def neighbors(self, community_id: int, k: int = COMMUNITY_NEIGHBORS_K) -> List[Tuple[int, float]]:
+        """Top-k communities by cosine |A ∩ B| / sqrt(|A|·|B|)."""
+
+        size = len(self.members.get(community_id, ()))
+        scored = (
+            (shared / math.sqrt(size * len(self.members[other])), other)
+            for other, shared in self.co_members(community_id).items()
+        )
+        return [(other, sim) for sim, other in heapq.nlargest(k, scored)]
+
+
+def stale_ids() -> List[int]:
+    """Communities whose members changed after their neighbors were computed."""
+
+    return list(
+        Community.objects.filter(
+            Q(neighbors_computed_at__isnull=True) | Q(members_changed_at__gt=F("neighbors_computed_at"))
+        ).values_list("id", flat=True)
+    )
+
+
+def affected_ids(matrix: Memberships, changed: Iterable[int]) -> Set[int]:
+    """Changed communities, everyone sharing a member with them, and everyone listing them.
+
+    Only these rows can get a different cosine: the others' overlaps and sizes are unchanged.
+    The co-members come from the new matrix, so a community that shared only a departed
+    member with a changed one is found through its stored CommunityNeighbor row instead.
+    """
+
+    changed = set(changed)
+    result = set(changed)
+    for community_id in changed:
+        result.update(matrix.co_members(community_id))
+    result.update(
+        CommunityNeighbor.objects.filter(neighbor_id__in=changed).values_list("community_id", flat=True)
+    )
+    return result
+
+
+def store(community_id: int, neighbors: List[Tuple[int, float]], computed_at) -> None:
+    with transaction.atomic():
+        CommunityNeighbor.objects.filter(community_id=community_id).delete()
+        CommunityNeighbor.objects.bulk_create(
+            [CommunityNeighbor(community_id=community_id, neighbor_id=n, similarity=sim) for n, sim in neighbors],
+            batch_size=_BULK_BATCH_SIZE,
+        )
+        Community.objects.filter(id=community_id).update(neighbors_computed_at=computed_at)
+
+
+def recompute(matrix: Memberships, community_ids: Iterable[int]) -> int:
+    count = 0
+    for community_id in community_ids:
+        store(community_id, matrix.neighbors(community_id), matrix.loaded_at)
+        count += 1
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Request path
+# ---------------------------------------------------------------------------
+
+def for_user(user: User, limit: int = COMMUNITY_RECS_SHOWN) -> List[Community]:
+    """Communities the user may like: stored neighbors of their communities, summed.
+
+    Indexed reads of the user's memberships and of the neighbor rows of those communities,
+    then a merge in memory.
+    """
+
+    if not user.is_authenticated:
+        return []
+
+    mine = list(
+        CommunityMembership.objects.filter(user=user)
+        .order_by("-joined_at")
+        .values_list("community_id", flat=True)[:COMMUNITY_RECS_MAX_SOURCES]
+    )
+    if not mine:
+        return []
+
+    scores: Dict[int, float] = defaultdict(float)
+    for neighbor_id, sim in CommunityNeighbor.objects.filter(community_id__in=mine).values_list(
+        "neighbor_id", "similarity"
+    ):
+        scores[neighbor_id] += sim
+
+    joined = set(mine)
+    if len(mine) >= COMMUNITY_RECS_MAX_SOURCES:
+        # not every membership was read: check the candidates explicitly
+        joined.update(
+            CommunityMembership.objects.filter(user=user, community_id__in=list(scores)).values_list(
+                "community_id", flat=True
+            )
+        )
+    best = heapq.nlargest(
+        limit, ((score, cid) for cid, score in scores.items() if cid not in joined)
+    )
+    by_id = Community.objects.in_bulk([cid for _, cid in best])
+    return [by_id[cid] for _, cid in best if cid in by_id]
@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from core.constants import POST_COUNTER_FOLD_AFTER, POST_COUNTER_FOLD_INTERVAL, POST_COUNTER_SHARDS
+from core.models import Comment, CommentLike, Community, CommunityMembership, Follow, Like, Post, PostCounterShard, User
+
+# Post likes/comments are written as deltas to one of POST_COUNTER_SHARDS random shard rows,
+# so a hot post does not serialize its likers on one row. A daemon thread of every process
+# that writes deltas folds all pending shards into the Post columns every
+# POST_COUNTER_FOLD_INTERVAL seconds, or sooner once the process has written
+# POST_COUNTER_FOLD_AFTER deltas since the last fold. Readers of the plain columns
+# (ordering, admin) lag by at most about one interval; pages add pending_post_deltas
+# on top and are exact. `repair_counters --fold` does the same fold by hand.
+
+# shard field -> Post column
+_POST_FIELDS = {
+    "likes": "likes_count",
+    "comments": "comments_count",
+    "top_comments": "top_comments_count",
+}
+
+_BATCH_SIZE = 500
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+def bump_post(post_id: int, likes: int = 0, comments: int = 0, top_comments: int = 0) -> None:
+    """Atomically add deltas to one random counter shard of the post."""
+
+    deltas = {"likes": likes, "comments": comments, "top_comments": top_comments}
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+
+    shard = random.randrange(POST_COUNTER_SHARDS)
+    updates = {k: F(k) + v for k, v in deltas.items()}
+
+    if not PostCounterShard.objects.filter(post_id=post_id, shard=shard).update(**updates):
+        try:
+            with transaction.atomic():
+                PostCounterShard.objects.create(post_id=post_id, shard=shard, **deltas)
+        except IntegrityError:
+            # Shard row created concurrently (or the post is already gone).
+            PostCounterShard.objects.filter(post_id=post_id, shard=shard).update(**updates)
+
+    _note_bump()
+
+
+def bump_comment(comment_id: int, likes: int = 0, replies: int = 0) -> None:
+    updates = {}
+    if likes:
+        updates["likes_count"] = Greatest(F("likes_count") + likes, Value(0))
+    if replies:
+        updates["replies_count"] = Greatest(F("replies_count") + replies, Value(0))
+    if updates:
+        Comment.objects.filter(id=comment_id).update(**updates)
+
+
+def bump_follow(follower_id: int, following_id: int, delta: int) -> None:
+    User.objects.filter(id=follower_id).update(following_count=Greatest(F("following_count") + delta, Value(0)))
+    User.objects.filter(id=following_id).update(followers_count=Greatest(F("followers_count") + delta, Value(0)))
+
+
+def bump_user_posts(user_id: int, delta: int) -> None:
+    User.objects.filter(id=user_id).update(posts_count=Greatest(F("posts_count") + delta, Value(0)))
+
+
+def bump_community_members(community_id: int, delta: int) -> None:
+    Community.objects.filter(id=community_id).update(
+        members_count=Greatest(F("members_count") + delta, Value(0)),
+        members_changed_at=timezone.now(),
+    )
+
+
+def community_post_added(community_id: int, created_at) -> None:
+    Community.objects.filter(id=community_id).update(
+        posts_count=F("posts_count") + 1,
+        has_posts=True,
+        last_post_at=Greatest(Coalesce(F("last_post_at"), Value(created_at)), Value(created_at)),
+    )
+
+
+def community_post_removed(community_id: int) -> None:
+    """The removed post may have been the latest one: last_post_at is re-read from the posts."""
+
+    posts = Post.objects.filter(community_id=OuterRef("id"))
+    Community.objects.filter(id=community_id).update(
+        posts_count=Greatest(F("posts_count") - 1, Value(0)),
+        has_posts=Exists(posts),
+        last_post_at=Subquery(posts.order_by("-created_at").values("created_at")[:1]),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def pending_post_deltas(post_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """Not yet folded shard deltas for the given posts (one indexed query)."""
+
+    rows = (
+        PostCounterShard.objects.filter(post_id__in=list(post_ids))
+        .values("post_id")
+        .annotate(likes_sum=Sum("likes"), comments_sum=Sum("comments"), top_sum=Sum("top_comments"))
+    )
+    return {
+        r["post_id"]: {
+            "likes_count": r["likes_sum"] or 0,
+            "comments_count": r["comments_sum"] or 0,
+            "top_comments_count": r["top_sum"] or 0,
+        }
+        for r in rows
+    }
+
+
+def apply_pending(posts: Iterable[Post]) -> List[Post]:
+    """Add pending shard deltas onto already loaded Post instances (for rendering)."""
+
+    posts = list(posts)
+    pending = pending_post_deltas(p.id for p in posts)
+    for p in posts:
+        for column, delta in pending.get(p.id, {}).items():
+            setattr(p, column, max(getattr(p, column) + delta, 0))
+    return posts
+
+
+def post_counts(post_id: int) -> Dict[str, int]:
+    """Current counters of one post: folded column + pending shards."""
+
+    post = Post.objects.only("id", *_POST_FIELDS.values()).get(id=post_id)
+    apply_pending([post])
+    return {column: getattr(post, column) for column in _POST_FIELDS.values()}
+
+
+# ---------------------------------------------------------------------------
+# Background fold
+# ---------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_bumps = 0
+_wake = threading.Event()
+_folder: Optional[threading.Thread] = None
+
+
+def _note_bump() -> None:
+    global _bumps, _folder
+    with _lock:
+        _bumps += 1
+        # started lazily: after a fork the parent's thread does not exist in the child
+        if _folder is None or not _folder.is_alive():
+            _folder = threading.Thread(target=_run, name="post-counters-fold", daemon=True)
+            _folder.start()
+        if _bumps >= POST_COUNTER_FOLD_AFTER:
+            _wake.set()
+
+
+def _run() -> None:
+    global _bumps
+    while True:
+        _wake.wait(POST_COUNTER_FOLD_INTERVAL)
+        _wake.clear()
+        with _lock:
+            _bumps = 0
+        try:
+            fold_post_shards()
+        except Exception:
+            # the shards stay in place and are folded next time
+            logger.exception("post counters: fold failed")
+        close_old_connections()
+
+
+# ---------------------------------------------------------------------------
+# Maintenance (fold thread above, repair_counters command)
+# ---------------------------------------------------------------------------
+
+def fold_post_shards() -> int:
+    """Move shard deltas into the Post columns. Returns the number of posts touched."""
+
+    touched = 0
+    while True:
+        post_ids = list(
+            PostCounterShard.objects.values_list("post_id", flat=True).distinct()[:_BATCH_SIZE]
+        )
+        if not post_ids:
+            return touched
+
+        with transaction.atomic():
+            shards = list(PostCounterShard.objects.select_for_update().filter(post_id__in=post_ids))
+            totals: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+            for s in shards:
+                for field in _POST_FIELDS:
+                    totals[s.post_id][field] += getattr(s, field)
+
+            for post_id, delta in totals.items():
+                Post.objects.filter(id=post_id).update(
+                    **{
+                        column: Greatest(F(column) + delta[field], Value(0))
+                        for field, column in _POST_FIELDS.items()
+                    }
+                )
+            PostCounterShard.objects.filter(id__in=[s.id for s in shards]).delete()
+
+        touched += len(totals)
+
+
+def rebuild_post_counters(post_ids: List[int]) -> None:
+    """Recount a batch of posts from Like/Comment and drop their shards."""
+
+    likes = dict(
+        Like.objects.filter(post_id__in=post_ids).values("post_id").annotate(n=Count("id")).values_list("post_id", "n")
+    )
+    comment_rows = (
+        Comment.objects.filter(post_id__in=post_ids)
+        .values("post_id")
+        .annotate(n=Count("id"), top=Count("id", filter=Q(parent__isnull=True)))
+    )
+    comments = {r["post_id"]: (r["n"], r["top"]) for r in comment_rows}
+
+    with transaction.atomic():
+        PostCounterShard.objects.filter(post_id__in=post_ids).delete()
+        for post_id in post_ids:
+            n, top = comments.get(post_id, (0, 0))
+            Post.objects.filter(id=post_id).update(
+                likes_count=likes.get(post_id, 0),
+                comments_count=n,
+                top_comments_count=top,
+            )
+
+
+def rebuild_comment_counters(comment_ids: List[int]) -> None:
+    """Recount likes/replies for a batch of comments."""
+
+    likes = dict(
+        CommentLike.objects.filter(comment_id__in=comment_ids)
+        .values("comment_id")
+        .annotate(n=Count("id"))
+        .values_list("comment_id", "n")
+    )
+    replies = dict(
+        Comment.objects.filter(parent_id__in=comment_ids)
+        .values("parent_id")
+        .annotate(n=Count("id"))
+        .values_list("parent_id", "n")
+    )
+    with transaction.atomic():
+        for comment_id in comment_ids:
+            Comment.objects.filter(id=comment_id).update(
+                likes_count=likes.get(comment_id, 0),
+                replies_count=replies.get(comment_id, 0),
+            )
+
+
+def rebuild_community_counters(community_ids: List[int]) -> None:
+    """Recount members/posts and the latest post time for a batch of communities."""
+
+    members = dict(
+        CommunityMembership.objects.filter(community_id__in=community_ids)
+        .values("community_id")
+        .annotate(n=Count("id"))
+        .values_list("community_id", "n")
+    )
+    posts = {
+        r["community_id"]: (r["n"], r["last"])
+        for r in Post.objects.filter(community_id__in=community_ids)
+        .values("community_id")
+        .annotate(n=Count("id"), last=Max("created_at"))
+    }
+    with transaction.atomic():
+        for community_id in community_ids:
+            n, last = posts.get(community_id, (0, None))
+            Community.objects.filter(id=community_id).update(
+                members_count=members.get(community_id, 0),
+                posts_count=n,
+                has_posts=bool(n),
+                last_post_at=last,
+            )
+
+
+def rebuild_user_counters(user_ids: List[int]) -> None:
+    """Recount followers/following/posts for a batch of users."""
+
+    followers = dict(
+        Follow.objects.filter(following_id__in=user_ids)
+        .values("following_id")
+        .annotate(n=Count("id"))
+        .values_list("following_id", "n")
+    )
+    following = dict(
+        Follow.objects.filter(follower_id__in=user_ids)
+        .values("follower_id")
+        .annotate(n=Count("id"))
+        .values_list("follower_id", "n")
+    )
+    posts = dict(
+        Post.objects.filter(author_id__in=user_ids).values("author_id").annotate(n=Count("id")).values_list("author_id", "n")
+    )
+    with transaction.atomic():
+        for user_id in user_ids:
+            User.objects.filter(id=user_id).update(
+                followers_count=followers.get(user_id, 0),
+                following_count=following.get(user_id, 0),
+                posts_count=posts.get(user_id, 0),
+            )
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import random
+import re
+from array import array
+from datetime import timedelta
+from hashlib import blake2b
+from typing import List, NamedTuple, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.constants import (
+    DUPLICATE_LSH_BANDS,
+    DUPLICATE_MIN_CHARS,
+    DUPLICATE_MINHASH_SIZE,
+    DUPLICATE_THRESHOLD,
+    DUPLICATE_WINDOW_DAYS,
+)
+from core.models import Comment, Post, TextSketch, TextSketchBucket
+
+# MinHash over character 5-shingles of the normalised text, banded for LSH:
+# two texts share a bucket when all DUPLICATE_MINHASH_SIZE / DUPLICATE_LSH_BANDS values
+# of some band agree, i.e. with probability 1 - (1 - J^rows)^bands. With 16 bands of 4
+# that is >99.9% at Jaccard 0.8 and ~2% at 0.3; candidates are then checked on the
+# full signature. A write costs one signature and one indexed lookup of 16 buckets.
+
+_SHINGLE = 5
+_WORD_RE = re.compile(r"[0-9a-zа-я]+")
+_PRIME = (1 << 61) - 1
+_UINT64 = "Q"
+
+# (a·x + b) mod p — a fixed family of hash functions, the same in every process
+_rng = random.Random(0x6D696E68)
+_COEFFS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(DUPLICATE_MINHASH_SIZE)]
+_ROWS = DUPLICATE_MINHASH_SIZE // DUPLICATE_LSH_BANDS
+
+
+class Match(NamedTuple):
+    sketch_id: int
+    post_id: Optional[int]
+    comment_id: Optional[int]
+    author_id: int
+    similarity: float
+
+
+# ---------------------------------------------------------------------------
+# Sketches
+# ---------------------------------------------------------------------------
+
+def normalize(text: str) -> str:
+    return " ".join(_WORD_RE.findall((text or "").lower().replace("ё", "е")))
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def signature(text: str) -> Optional[array]:
+    """MinHash signature of the text, or None for texts too short to judge."""
+
+    norm = normalize(text)
+    if len(norm) < DUPLICATE_MIN_CHARS:
+        return None
+    shingles = {_hash64(norm[i:i + _SHINGLE]) for i in range(len(norm) - _SHINGLE + 1)}
+    return array(_UINT64, [min((a * x + b) % _PRIME for x in shingles) for a, b in _COEFFS])
+
+
+def buckets(sig: array) -> List[int]:
+    """One signed 64-bit bucket per band; the band number is part of the hash."""
+
+    result = []
+    for band in range(DUPLICATE_LSH_BANDS):
+        chunk = array(_UINT64, [band]) + sig[band * _ROWS:(band + 1) * _ROWS]
+        result.append(int.from_bytes(blake2b(chunk.tobytes(), digest_size=8).digest(), "big", signed=True))
+    return result
+
+
+def similarity(a: array, b: array) -> float:
+    """Jaccard estimate: the share of agreeing MinHash values."""
+
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def _load(data: bytes) -> array:
+    sig = array(_UINT64)
+    sig.frombytes(bytes(data))
+    return sig
+
+
+# ---------------------------------------------------------------------------
+# Lookup
+# ---------------------------------------------------------------------------
+
+def find(sig: Optional[array], author_id: Optional[int] = None, exclude: Optional[int] = None) -> Optional[Match]:
+    """The most similar remembered text above DUPLICATE_THRESHOLD (of `author_id` only, if given)."""
+
+    if sig is None:
+        return None
+
+    since = timezone.now() - timedelta(days=DUPLICATE_WINDOW_DAYS)
+    candidates = TextSketch.objects.filter(
+        id__in=TextSketchBucket.objects.filter(bucket__in=buckets(sig)).values("sketch_id"),
+        created_at__gte=since,
+    )
+    if author_id is not None:
+        candidates = candidates.filter(author_id=author_id)
+    if exclude is not None:
+        candidates = candidates.exclude(id=exclude)
+
+    best: Optional[Match] = None
+    for sketch_id, post_id, comment_id, other_author, data in candidates.values_list(
+        "id", "post_id", "comment_id", "author_id", "signature"
+    ):
+        value = similarity(sig, _load(data))
+        if value >= DUPLICATE_THRESHOLD and (best is None or value > best.similarity):
+            best = Match(sketch_id, post_id, comment_id, other_author, value)
+    return best
+
+
+def find_own(text: str, author_id: int) -> Optional[Match]:
+    """A recent near-duplicate of `text` by the same author (posts and comments alike)."""
+
+    return find(signature(text), author_id=author_id)
+
+
+def find_any(text: str) -> Optional[Match]:
+    return find(signature(text))
+
+
+# ---------------------------------------------------------------------------
+# Maintenance (signals, prune_text_sketches command)
+# ---------------------------------------------------------------------------
+
+def _remember(owner: dict, author_id: int, text: str) -> None:
+    with transaction.atomic():
+        TextSketch.objects.filter(**owner).delete()
+        sig = signature(text)
+        if sig is None:
+            return
+        sketch = TextSketch.objects.create(author_id=author_id, signature=sig.tobytes(), **owner)
+        # flag a copy of someone else's recent text; the author's own copies are stopped at write time
+        match = find(sig, exclude=sketch.id)
+        if match is not None and match.author_id != author_id:
+            sketch.duplicate_of_id = match.sketch_id
+            sketch.similarity = match.similarity
+            sketch.save(update_fields=["duplicate_of", "similarity"])
+        TextSketchBucket.objects.bulk_create(
+            [TextSketchBucket(sketch=sketch, bucket=bucket) for bucket in buckets(sig)]
+        )
+
+
+def remember_post(post: Post) -> None:
+    _remember({"post_id": post.id}, post.author_id, post.text)
+
+
+def remember_comment(comment: Comment) -> None:
+    _remember({"comment_id": comment.id}, comment.author_id, comment.text)
+
+
+def prune(now=None) -> int:
+    """Forget sketches older than the window (buckets go with them)."""
+
+    since = (now or timezone.now()) - timedelta(days=DUPLICATE_WINDOW_DAYS)
+    deleted, _ = TextSketch.objects.filter(created_at__lt=since).delete()
+    return deleted
@@ -0,0 +1,375 @@
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+import time
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connections
+
+from core.constants import (
+    FOLLOW_GRAPH_EVENT_TTL,
+    FOLLOW_GRAPH_GAP_TIMEOUT,
+    FOLLOW_GRAPH_MAX_DELTA,
+    FOLLOW_GRAPH_MAX_REPLAY,
+    FOLLOW_GRAPH_RELOAD_INTERVAL,
+)
+from core.models import Follow
+
+# Follow graph in CSR form (NumPy int32 offsets + targets), both directions.
+#
+#   out: follower  -> whom they follow     in: following -> who follows them
+#
+# Rows are sorted, so a membership test is a binary search inside one row. Edges added
+# or removed after the build are kept in small per-node delta sets.
+#
+# Server processes keep one graph each (start() from asgi.py / wsgi.py loads it in the
+# background) and answer follow checks of the request path from it. Processes stay in
+# step through a change log in the shared cache: every committed follow/unfollow takes
+# the next number of "follow_graph:version" and is stored under that number. Before
+# answering, a process reads the version (one cache GET) and replays what it has not
+# seen, so a follow is visible to every worker by the next request. Answers come from
+# the Follow table (and the graph reloads in the background) until the graph is loaded,
+# while an event is missing (reloading after FOLLOW_GRAPH_GAP_TIMEOUT), and when the log
+# itself is gone (cache flush, rebuild_follow_graph --reload). The graph is also reloaded
+# every FOLLOW_GRAPH_RELOAD_INTERVAL seconds and after FOLLOW_GRAPH_MAX_DELTA changes,
+# off the request path; the old one keeps answering until the swap.
+# Management commands and tests never call start() and always ask Follow.
+
+_INT32 = np.int32
+
+_VERSION_KEY = "follow_graph:version"
+_EVENT_KEY = "follow_graph:event:{}"
+
+
+class _CSR:
+    __slots__ = ("offsets", "targets")
+
+    def __init__(self, offsets: np.ndarray, targets: np.ndarray):
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def build(cls, src: np.ndarray, dst: np.ndarray, size: int) -> "_CSR":
+        """CSR of the (src, dst) pairs; every row comes out sorted."""
+
+        order = np.lexsort((dst, src))
+        offsets = np.zeros(size + 1, dtype=_INT32)
+        offsets[1:] = np.cumsum(np.bincount(src, minlength=size))
+        return cls(offsets, dst[order].astype(_INT32))
+
+    def row(self, node: int) -> np.ndarray:
+        if node + 1 >= len(self.offsets):
+            return self.targets[:0]
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def degree(self, node: int) -> int:
+        if node + 1 >= len(self.offsets):
+            return 0
+        return int(self.offsets[node + 1] - self.offsets[node])
+
+    def has(self, node: int, target: int) -> bool:
+        row = self.row(node)
+        i = int(np.searchsorted(row, target))
+        return i < len(row) and row[i] == target
+
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.targets.nbytes
+
+
+class _Side:
+    """One direction: base CSR + edges added/removed since it was built."""
+
+    __slots__ = ("base", "added", "removed")
+
+    def __init__(self, base: _CSR):
+        self.base = base
+        self.added: Dict[int, Set[int]] = {}
+        self.removed: Dict[int, Set[int]] = {}
+
+    def has(self, node: int, target: int) -> bool:
+        if target in self.added.get(node, ()):
+            return True
+        return self.base.has(node, target) and target not in self.removed.get(node, ())
+
+    def add(self, node: int, target: int) -> None:
+        if self.base.has(node, target):
+            self.removed.get(node, set()).discard(target)
+        else:
+            self.added.setdefault(node, set()).add(target)
+
+    def remove(self, node: int, target: int) -> None:
+        if self.base.has(node, target):
+            self.removed.setdefault(node, set()).add(target)
+        else:
+            self.added.get(node, set()).discard(target)
+
+    def row(self, node: int) -> List[int]:
+        row = self.base.row(node).tolist()
+        removed = self.removed.get(node)
+        if removed:
+            row = [t for t in row if t not in removed]
+        added = self.added.get(node)
+        return sorted(row + list(added)) if added else row
+
+    def degree(self, node: int) -> int:
+        return self.base.degree(node) + len(self.added.get(node, ())) - len(self.removed.get(node, ()))
+
+    def delta_size(self) -> int:
+        return sum(map(len, self.added.values())) + sum(map(len, self.removed.values()))
+
+    def delta_nbytes(self) -> int:
+        sets = [*self.added.values(), *self.removed.values()]
+        return sys.getsizeof(self.added) + sys.getsizeof(self.removed) + sum(
+            sys.getsizeof(s) + 28 * len(s) for s in sets
+        )
+
+
+class FollowGraph:
+    def __init__(self, edges: Iterable[Tuple[int, int]]):
+        """`edges` — (follower_id, following_id) pairs, in any order."""
+
+        flat = np.fromiter(chain.from_iterable(edges), dtype=np.int64)
+        src, dst = flat[0::2], flat[1::2]
+        size = int(flat.max()) + 1 if len(flat) else 1
+        self.out = _Side(_CSR.build(src, dst, size))
+        self.in_ = _Side(_CSR.build(dst, src, size))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_db(cls) -> "FollowGraph":
+        return cls(Follow.objects.values_list("follower_id", "following_id").iterator(chunk_size=10000))
+
+    # --- queries ------------------------------------------------------------
+
+    def follows(self, follower_id: int, following_id: int) -> bool:
+        with self._lock:
+            return self.out.has(follower_id, following_id)
+
+    def following_among(self, follower_id: int, user_ids: Iterable[int]) -> Set[int]:
+        """Which of `user_ids` the user follows (a page worth of ids, no query)."""
+
+        with self._lock:
+            return {uid for uid in user_ids if self.out.has(follower_id, uid)}
+
+    def is_mutual(self, a: int, b: int) -> bool:
+        with self._lock:
+            return self.out.has(a, b) and self.out.has(b, a)
+
+    def following(self, user_id: int) -> List[int]:
+        with self._lock:
+            return self.out.row(user_id)
+
+    def followers(self, user_id: int) -> List[int]:
+        with self._lock:
+            return self.in_.row(user_id)
+
+    def friends(self, user_id: int) -> List[int]:
+        """Mutual follows: the intersection of two sorted rows."""
+
+        with self._lock:
+            out, in_ = self.out.row(user_id), self.in_.row(user_id)
+        return np.intersect1d(out, in_, assume_unique=True).tolist()
+
+    def following_count(self, user_id: int) -> int:
+        with self._lock:
+            return self.out.degree(user_id)
+
+    def followers_count(self, user_id: int) -> int:
+        with self._lock:
+            return self.in_.degree(user_id)
+
+    # --- updates ------------------------------------------------------------
+
+    def add(self, follower_id: int, following_id: int) -> None:
+        with self._lock:
+            self.out.add(follower_id, following_id)
+            self.in_.add(following_id, follower_id)
+
+    def remove(self, follower_id: int, following_id: int) -> None:
+        with self._lock:
+            self.out.remove(follower_id, following_id)
+            self.in_.remove(following_id, follower_id)
+
+    def delta_size(self) -> int:
+        with self._lock:
+            return self.out.delta_size()
+
+    # --- stats --------------------------------------------------------------
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "nodes": len(self.out.base.offsets) - 1,
+                "edges": len(self.out.base.targets)
+                + sum(map(len, self.out.added.values()))
+                - sum(map(len, self.out.removed.values())),
+                "pending_delta": self.out.delta_size(),
+                "csr_bytes": self.out.base.nbytes() + self.in_.base.nbytes(),
+                "delta_bytes": self.out.delta_nbytes() + self.in_.delta_nbytes(),
+            }
+
+
+# ---------------------------------------------------------------------------
+# Process-wide graph (server processes)
+# ---------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_enabled = False
+_graph: Optional[FollowGraph] = None
+_applied = 0  # last change log number folded into _graph
+_loaded_at = 0.0
+_gap_since: Optional[float] = None
+_loader: Optional[threading.Thread] = None
+
+
+def start() -> None:
+    """Serve follow checks from this process's graph; it loads in the background."""
+
+    global _enabled
+    _enabled = True
+    _reload()
+
+
+def _reload() -> None:
+    global _loader
+    with _lock:
+        # after a fork the parent's thread does not exist in the child
+        if _loader is None or not _loader.is_alive():
+            _loader = threading.Thread(target=_load_in_background, name="follow-graph-load", daemon=True)
+            _loader.start()
+
+
+def _load_in_background() -> None:
+    try:
+        load()
+    except Exception:
+        logger.exception("follow graph: load failed")
+    finally:
+        connections.close_all()
+
+
+def load() -> FollowGraph:
+    """Build the graph from Follow and make it this process's graph.
+
+    The log version is read first: changes committed during the build have higher
+    numbers and are replayed on top (replaying an edge already in the table is harmless).
+    """
+
+    global _graph, _applied, _loaded_at, _gap_since
+    _start_log()
+    version = cache.get(_VERSION_KEY) or 0
+    graph = FollowGraph.from_db()
+    with _lock:
+        _graph, _applied, _loaded_at, _gap_since = graph, version, time.monotonic(), None
+    return graph
+
+
+def _start_log() -> None:
+    # A new log starts at the current time in microseconds, not at 0: after a cache flush
+    # the numbers are far ahead of what any process has applied, so none of them replays
+    # the new log on top of the old one (it reloads instead).
+    cache.add(_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+
+
+def publish(follower_id: int, following_id: int, follows: bool) -> None:
+    """Append a committed follow (follows=True) or unfollow to the change log."""
+
+    try:
+        _start_log()
+        version = cache.incr(_VERSION_KEY)
+        cache.set(_EVENT_KEY.format(version), (follower_id, following_id, follows), FOLLOW_GRAPH_EVENT_TTL)
+    except Exception:
+        # readers see a gap or a missing version and reload from the table
+        logger.exception("follow graph: change %s -> %s not published", follower_id, following_id)
+
+
+def reload_everywhere() -> None:
+    """Drop the change log: every server process answers from Follow until it has reloaded."""
+
+    cache.delete(_VERSION_KEY)
+
+
+def current() -> Optional[FollowGraph]:
+    """This process's graph with the change log replayed, or None when Follow must be asked."""
+
+    global _applied, _gap_since
+    if not _enabled:
+        return None
+    if _graph is None:
+        _reload()  # still loading, or the last load failed
+        return None
+    applied = _applied
+    try:
+        version = cache.get(_VERSION_KEY)
+        behind = version is not None and version > applied
+        events = (
+            cache.get_many([_EVENT_KEY.format(n) for n in range(applied + 1, version + 1)])
+            if behind and version - applied <= FOLLOW_GRAPH_MAX_REPLAY
+            else {}
+        )
+    except Exception:
+        logger.exception("follow graph: change log unavailable")
+        return None
+
+    with _lock:
+        graph = _graph
+        if version is None or version < applied or version - applied > FOLLOW_GRAPH_MAX_REPLAY:
+            # the log was flushed or this process is too far behind
+            stale = True
+        else:
+            # strictly in order and only past _applied: an older add must not undo a newer remove
+            while _applied < version:
+                event = events.get(_EVENT_KEY.format(_applied + 1))
+                if event is None:
+                    break
+                follower_id, following_id, follows = event
+                (graph.add if follows else graph.remove)(follower_id, following_id)
+                _applied += 1
+            if _applied < version:
+                # the event is being written right now, or it is lost
+                _gap_since = _gap_since or time.monotonic()
+                stale = time.monotonic() - _gap_since > FOLLOW_GRAPH_GAP_TIMEOUT
+                if not stale:
+                    return None
+            else:
+                _gap_since = None
+                stale = False
+        due = time.monotonic() - _loaded_at > FOLLOW_GRAPH_RELOAD_INTERVAL
+
+    if stale:
+        _reload()
+        return None
+    if due or graph.delta_size() >= FOLLOW_GRAPH_MAX_DELTA:
+        # the current graph stays in use until the new one is swapped in
+        _reload()
+    return graph
+
+
+def follows(follower_id: int, following_id: int) -> bool:
+    graph = current()
+    if graph is None:
+        return Follow.objects.filter(follower_id=follower_id, following_id=following_id).exists()
+    return graph.follows(follower_id, following_id)
+
+
+def following_among(follower_id: int, user_ids: Iterable[int]) -> Set[int]:
+    """Which of `user_ids` the user follows."""
+
+    user_ids = list(user_ids)
+    if not user_ids:
+        return set()
+    graph = current()
+    if graph is None:
+        return set(
+            Follow.objects.filter(follower_id=follower_id, following_id__in=user_ids).values_list(
+                "following_id", flat=True
+            )
+        )
+    return graph.following_among(follower_id, user_ids)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from core.models import Follow, User
+from core.services.pagination import Cursor, keyset_page
+
+
+def _page(qs, side: str, limit: int, before: Optional[Cursor]) -> Tuple[List[User], Optional[Cursor]]:
+    rows, next_cursor = keyset_page(qs.select_related(side), limit, before)
+    users = []
+    for f in rows:
+        u = getattr(f, side)
+        u.followed_at = f.created_at
+        users.append(u)
+    return users, next_cursor
+
+
+def followers_page(
+    user_id: int, limit: int, before: Optional[Cursor] = None
+) -> Tuple[List[User], Optional[Cursor]]:
+    """Who follows the user, newest first (range read over follow_followers_idx).
+
+    Every returned user gets `followed_at`; the cursor is (Follow.created_at, Follow.id).
+    """
+
+    return _page(Follow.objects.filter(following_id=user_id), "follower", limit, before)
+
+
+def following_page(
+    user_id: int, limit: int, before: Optional[Cursor] = None
+) -> Tuple[List[User], Optional[Cursor]]:
+    """Whom the user follows, newest first (range read over follow_following_idx)."""
+
+    return _page(Follow.objects.filter(follower_id=user_id), "following", limit, before)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import time
+from typing import Dict, Iterable
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from core.constants import POST_FRAGMENT_TTL
+from core.models import Post
+from core.services.markup import RENDERER_VERSION
+
+# Viewer-independent part of a post card: text (markdown) + attachments.
+# Rendered with {"post": post} only — no request, no user — so it is safe to share.
+BODY_TEMPLATE = "core/partials/post_body.html"
+
+_VERSION_KEY = "post:fragver:{}"
+# renderer version in the key: a markdown pipeline change must not serve old bodies
+_BODY_KEY = "post:body:{}:{}:r" + str(RENDERER_VERSION)
+_STATS_KEY = "post:fragstats:{}"
+
+
+def _new_version() -> int:
+    # Time-based stamp instead of a counter: if the version key gets evicted,
+    # the next one is still newer than anything cached before.
+    return time.time_ns() // 1000
+
+
+def _incr(key: str, delta: int) -> None:
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=None):
+            cache.incr(key, delta)
+
+
+# ---------------------------------------------------------------------------
+# Versions / invalidation
+# ---------------------------------------------------------------------------
+
+def versions(post_ids: Iterable[int]) -> Dict[int, int]:
+    """Current version stamps of the posts (one get_many, one set_many for new ones)."""
+
+    keys = {_VERSION_KEY.format(pid): pid for pid in post_ids}
+    found = cache.get_many(list(keys))
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {pid: found[key] for key, pid in keys.items()}
+
+
+def invalidate(post_id: int) -> None:
+    """Bump the version: every cached fragment of the post becomes unreachable."""
+
+    cache.set(_VERSION_KEY.format(post_id), _new_version(), timeout=None)
+
+
+def forget(post_id: int) -> None:
+    """Post deleted: drop the version key (fragments expire on their own)."""
+
+    cache.delete(_VERSION_KEY.format(post_id))
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def prime(posts: Iterable[Post]) -> None:
+    """Look up cached bodies of a whole page in two cache round trips.
+
+    Sets post._body_key / post._body_html (None on a miss) for render_body().
+    """
+
+    posts = [p for p in posts if not hasattr(p, "_body_key")]
+    if not posts:
+        return
+
+    vers = versions(p.id for p in posts)
+    for p in posts:
+        p._body_key = _BODY_KEY.format(p.id, vers[p.id])
+
+    found = cache.get_many([p._body_key for p in posts])
+    for p in posts:
+        p._body_html = found.get(p._body_key)
+
+    hits = sum(1 for p in posts if p._body_html is not None)
+    _incr(_STATS_KEY.format("hit"), hits)
+    _incr(_STATS_KEY.format("miss"), len(posts) - hits)
+
+
+def render_body(post: Post) -> str:
+    prime([post])
+    if post._body_html is None:
+        post._body_html = render_to_string(BODY_TEMPLATE, {"post": post})
+        cache.set(post._body_key, post._body_html, POST_FRAGMENT_TTL)
+    return post._body_html
+
+
+# ---------------------------------------------------------------------------
+# Stats
+# ---------------------------------------------------------------------------
+
+def stats() -> Dict[str, int]:
+    values = cache.get_many([_STATS_KEY.format("hit"), _STATS_KEY.format("miss")])
+    hits = values.get(_STATS_KEY.format("hit"), 0)
+    misses = values.get(_STATS_KEY.format("miss"), 0)
+    return {"hits": hits, "misses": misses, "total": hits + misses}
+
+
+def reset_stats() -> None:
+    cache.delete_many([_STATS_KEY.format("hit"), _STATS_KEY.format("miss")])
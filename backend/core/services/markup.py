@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import re
+from urllib.parse import urlsplit
+
+import markdown
+from django.urls import reverse
+from markdown.blockprocessors import HashHeaderProcessor
+from markdown.extensions import Extension
+from markdown.inlinepatterns import InlineProcessor
+from markdown.treeprocessors import Treeprocessor
+from markdown.util import AtomicString
+from xml.etree import ElementTree as etree
+
+# Bump whenever the pipeline output changes (extensions, options, sanitizing):
+# `manage.py rerender_markdown` re-renders every post stored with an older version.
+RENDERER_VERSION = 3
+
+# #tags and @mentions (core/services/tags.py indexes the links rendered from these).
+# Not inside words, URLs, entities or links: "a#b", "/#x", "&#39;", "](#x)", "[#x](url)".
+HASHTAG_RE = r"(?<![\w#&/\[])(?<!\]\()#(\w{1,64})"
+MENTION_RE = r"(?<![\w@/\[])@(\w[\w.+-]{0,149})"
+
+_EXTENSIONS = ["fenced_code", "codehilite"]
+_SAFE_SCHEMES = {"", "http", "https", "mailto"}
+_URL_NOISE = re.compile(r"[\x00-\x20\x7f]+")
+
+
+def _is_safe_url(url: str) -> bool:
+    # browsers ignore whitespace/control chars inside the scheme ("java\tscript:")
+    try:
+        scheme = urlsplit(_URL_NOISE.sub("", url)).scheme
+    except ValueError:
+        return False
+    return scheme.lower() in _SAFE_SCHEMES
+
+
+class _SafeUrls(Treeprocessor):
+    def run(self, root):
+        for el in root.iter():
+            for attr in ("href", "src"):
+                value = el.get(attr)
+                if value is not None and not _is_safe_url(value):
+                    el.set(attr, "#")
+
+
+class _HashHeader(HashHeaderProcessor):
+    # a space after the hashes is required, so "#tag" at the start of a line stays a tag
+    RE = re.compile(r"(?:^|\n)(?P<level>#{1,6})[ \t](?P<header>(?:\\.|[^\\])*?)#*(?:\n|$)")
+
+
+class _TagLink(InlineProcessor):
+    # no link inside the text of another link
+    ANCESTOR_EXCLUDES = ("a",)
+
+    def __init__(self, pattern, md, url_name: str, prefix: str):
+        super().__init__(pattern, md)
+        self.url_name = url_name
+        self.prefix = prefix
+
+    def handleMatch(self, m, data):
+        name = m.group(1).rstrip(".+-")
+        if self.prefix == "#" and not any(ch.isalpha() for ch in name):
+            return None, None, None
+        el = etree.Element("a")
+        el.set("href", reverse(self.url_name, args=[name.lower() if self.prefix == "#" else name]))
+        el.set("class", "hashtag" if self.prefix == "#" else "mention")
+        # atomic: the tag text is final, later inline patterns must not link it again
+        el.text = AtomicString(self.prefix + name)
+        return el, m.start(0), m.start(1) + len(name)
+
+
+class _Tags(Extension):
+    """#tag -> tag page, @username -> profile; after code spans, escapes and links, before emphasis."""
+
+    def extendMarkdown(self, md):
+        md.parser.blockprocessors.register(_HashHeader(md.parser), "hashheader", 70)
+        md.inlinePatterns.register(_TagLink(HASHTAG_RE, md, "hashtag", "#"), "hashtag", 105)
+        md.inlinePatterns.register(_TagLink(MENTION_RE, md, "user_profile", "@"), "mention", 104)
+
+
+class _Sanitize(Extension):
+    """Raw HTML in the source is escaped as text; javascript:/data: links are neutralized."""
+
+    def extendMarkdown(self, md):
+        md.preprocessors.deregister("html_block")
+        md.inlinePatterns.deregister("html")
+        md.treeprocessors.register(_SafeUrls(md), "safe_urls", 0)
+
+
+def render_markdown(text: str) -> str:
+    """Markdown -> sanitized HTML (the only place the pipeline is defined)."""
+
+    # Markdown instances keep state between calls and aren't thread-safe — one per call.
+    return markdown.Markdown(extensions=[*_EXTENSIONS, _Tags(), _Sanitize()]).convert(text or "")
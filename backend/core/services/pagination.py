@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+# (created_at, id) — граница страницы для keyset-пагинации
+Cursor = Tuple[datetime, int]
+# (score, id) — то же для выдачи, отсортированной по релевантности/рейтингу
+ScoreCursor = Tuple[float, int]
+# (is_admin, joined_at, id) — граница страницы списка участников сообщества
+MemberCursor = Tuple[bool, datetime, int]
+# (search_rank, has_posts, last_post_at, created_at, id) — граница страницы каталога сообществ;
+# search_rank — только у выдачи поиска (None в каталоге), last_post_at — None у сообществ без постов
+DirectoryCursor = Tuple[Optional[int], bool, Optional[datetime], datetime, int]
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    created_at, obj_id = cursor
+    raw = f"{created_at.isoformat()}|{int(obj_id)}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(value: Optional[str]) -> Optional[Cursor]:
+    """Parse an opaque cursor. Garbage input means "first page"."""
+
+    if not value:
+        return None
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        ts, _, obj_id = raw.partition("|")
+        return datetime.fromisoformat(ts), int(obj_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def encode_score_cursor(cursor: ScoreCursor) -> str:
+    score, obj_id = cursor
+    # repr() of a float round-trips exactly, so equal scores compare equal after decoding
+    raw = f"{float(score)!r}|{int(obj_id)}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_score_cursor(value: Optional[str]) -> Optional[ScoreCursor]:
+    if not value:
+        return None
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        score, _, obj_id = raw.partition("|")
+        return float(score), int(obj_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def encode_member_cursor(cursor: MemberCursor) -> str:
+    is_admin, joined_at, obj_id = cursor
+    raw = f"{int(bool(is_admin))}|{joined_at.isoformat()}|{int(obj_id)}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_member_cursor(value: Optional[str]) -> Optional[MemberCursor]:
+    if not value:
+        return None
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        is_admin, ts, obj_id = raw.split("|")
+        return is_admin == "1", datetime.fromisoformat(ts), int(obj_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def encode_directory_cursor(cursor: DirectoryCursor) -> str:
+    rank, has_posts, last_post_at, created_at, obj_id = cursor
+    parts = [
+        "" if rank is None else str(int(rank)),
+        str(int(bool(has_posts))),
+        last_post_at.isoformat() if last_post_at else "",
+        created_at.isoformat(),
+        str(int(obj_id)),
+    ]
+    return base64.urlsafe_b64encode("|".join(parts).encode()).decode().rstrip("=")
+
+
+def decode_directory_cursor(value: Optional[str]) -> Optional[DirectoryCursor]:
+    if not value:
+        return None
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        rank, has_posts, last_post_at, created_at, obj_id = raw.split("|")
+        return (
+            int(rank) if rank else None,
+            has_posts == "1",
+            datetime.fromisoformat(last_post_at) if last_post_at else None,
+            datetime.fromisoformat(created_at),
+            int(obj_id),
+        )
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_filter(
+    qs: QuerySet,
+    before: Optional[Cursor],
+    ts_field: str = "created_at",
+    id_field: str = "id",
+) -> QuerySet:
+    """Rows strictly after the cursor in (ts_field DESC, id_field DESC) order."""
+
+    if before is None:
+        return qs
+    ts, last_id = before
+    return qs.filter(Q(**{f"{ts_field}__lt": ts}) | Q(**{ts_field: ts, f"{id_field}__lt": last_id}))
+
+
+def keyset_page(
+    qs: QuerySet,
+    limit: int,
+    before: Optional[Cursor] = None,
+    ts_field: str = "created_at",
+    id_field: str = "id",
+) -> Tuple[List[Any], Optional[Cursor]]:
+    """One page in (ts_field DESC, id_field DESC) order and the cursor of the next one.
+
+    No COUNT(*) and no OFFSET: we fetch limit + 1 rows to know whether a next page exists,
+    and rows inserted above the cursor while the user scrolls don't shift the pages.
+    """
+
+    qs = keyset_filter(qs, before, ts_field, id_field).order_by(f"-{ts_field}", f"-{id_field}")
+    items = list(qs[: limit + 1])
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    last = items[-1]
+    return items, (getattr(last, ts_field), getattr(last, id_field))
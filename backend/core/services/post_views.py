@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import math
+import threading
+from collections import defaultdict
+from hashlib import blake2b
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.db import close_old_connections, transaction
+
+from core.constants import POST_VIEWS_BUFFER_MAX, POST_VIEWS_FLUSH_INTERVAL, POST_VIEWS_HLL_PRECISION
+from core.models import Post, PostViewSketch
+
+# Unique viewers per post: a HyperLogLog sketch of 2^p one-byte registers (4 KiB at p=12,
+# ~1.6% standard error) in PostViewSketch; the estimate is copied to Post.views_count.
+#
+# Impressions are (post_id, viewer hash) pairs in a per-process set — repeats within a
+# flush period cost nothing. A daemon thread of the process writes them in one batched
+# transaction every POST_VIEWS_FLUSH_INTERVAL seconds, or sooner once POST_VIEWS_BUFFER_MAX
+# pairs are waiting; requests never touch the database here. A killed process loses at
+# most one period of impressions, a failed write loses its batch (logged): the counts
+# are estimates anyway.
+
+_P = POST_VIEWS_HLL_PRECISION
+_M = 1 << _P
+_RANK_BITS = 64 - _P
+_ALPHA = 0.7213 / (1 + 1.079 / _M)
+
+
+# ---------------------------------------------------------------------------
+# HyperLogLog
+# ---------------------------------------------------------------------------
+
+def viewer_hash(viewer_key: str) -> int:
+    return int.from_bytes(blake2b(viewer_key.encode(), digest_size=8).digest(), "big")
+
+
+def empty() -> bytearray:
+    return bytearray(_M)
+
+
+def add(registers: bytearray, hashed: int) -> None:
+    index = hashed >> _RANK_BITS
+    rest = hashed & ((1 << _RANK_BITS) - 1)
+    rank = _RANK_BITS - rest.bit_length() + 1
+    if rank > registers[index]:
+        registers[index] = rank
+
+
+def estimate(registers: bytes) -> int:
+    """Cardinality estimate; linear counting while most registers are still empty."""
+
+    raw = _ALPHA * _M * _M / sum(2.0 ** -r for r in registers)
+    zeros = registers.count(0)
+    if raw <= 2.5 * _M and zeros:
+        return round(_M * math.log(_M / zeros))
+    return round(raw)
+
+
+# ---------------------------------------------------------------------------
+# Buffer
+# ---------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending: Set[Tuple[int, int]] = set()
+_wake = threading.Event()
+_flusher: Optional[threading.Thread] = None
+
+
+def viewer_key(request) -> Optional[str]:
+    """Who is looking: the user, else the session, else address + user agent."""
+
+    if request.user.is_authenticated:
+        return f"u{request.user.id}"
+    if request.session.session_key:
+        return f"s{request.session.session_key}"
+    address = request.META.get("REMOTE_ADDR")
+    if not address:
+        return None
+    return f"a{address}|{request.META.get('HTTP_USER_AGENT', '')}"
+
+
+def record(request, posts: Iterable[Post]) -> None:
+    """Count the posts as seen by this viewer (their own posts are not counted)."""
+
+    key = viewer_key(request)
+    if key is None:
+        return
+    hashed = viewer_hash(key)
+    user_id = request.user.id if request.user.is_authenticated else None
+
+    global _flusher
+    with _lock:
+        _pending.update((post.id, hashed) for post in posts if post.author_id != user_id)
+        # started lazily: after a fork the parent's thread does not exist in the child
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_run, name="post-views-flush", daemon=True)
+            _flusher.start()
+        if len(_pending) >= POST_VIEWS_BUFFER_MAX:
+            _wake.set()
+
+
+def flush() -> int:
+    """Write out whatever is buffered now; a failed write is logged and its batch dropped."""
+
+    global _pending
+    with _lock:
+        batch, _pending = _pending, set()
+    try:
+        return write(batch)
+    except Exception:
+        logger.exception("post views: dropped %d impressions", len(batch))
+        return 0
+
+
+def _run() -> None:
+    while True:
+        _wake.wait(POST_VIEWS_FLUSH_INTERVAL)
+        _wake.clear()
+        flush()
+        close_old_connections()
+
+
+atexit.register(flush)
+
+
+# ---------------------------------------------------------------------------
+# Batched write
+# ---------------------------------------------------------------------------
+
+def write(batch: Iterable[Tuple[int, int]]) -> int:
+    """Merge the impressions into the stored sketches: one transaction for the whole batch.
+
+    Rows are locked in post_id order, so concurrent flushes of other processes wait
+    instead of overwriting each other's registers.
+    """
+
+    by_post: Dict[int, list] = defaultdict(list)
+    for post_id, hashed in batch:
+        by_post[post_id].append(hashed)
+    if not by_post:
+        return 0
+
+    with transaction.atomic():
+        post_ids = list(Post.objects.filter(id__in=list(by_post)).values_list("id", flat=True))
+        PostViewSketch.objects.bulk_create(
+            [PostViewSketch(post_id=post_id, registers=bytes(empty())) for post_id in post_ids],
+            ignore_conflicts=True,
+        )
+        sketches = list(PostViewSketch.objects.select_for_update().filter(post_id__in=post_ids).order_by("post_id"))
+
+        counts = []
+        for sketch in sketches:
+            registers = bytearray(sketch.registers)
+            for hashed in by_post[sketch.post_id]:
+                add(registers, hashed)
+            sketch.registers = bytes(registers)
+            counts.append(Post(id=sketch.post_id, views_count=estimate(registers)))
+
+        PostViewSketch.objects.bulk_update(sketches, ["registers"])
+        Post.objects.bulk_update(counts, ["views_count"])
+    return len(sketches)
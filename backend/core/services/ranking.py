@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import Count
+from django.utils import timezone
+
+from core.constants import (
+    FEED_RANK_AFFINITY_DAYS,
+    FEED_RANK_AFFINITY_WEIGHT,
+    FEED_RANK_ENGAGEMENT_WEIGHT,
+    FEED_RANK_TIME_SCALE_MINUTES,
+    FEED_RANK_WINDOW_HOURS,
+)
+from core.models import Comment, Like, TimelineEntry
+from core.services import counters
+
+_BATCH_SIZE = 500
+
+
+# ---------------------------------------------------------------------------
+# Formula
+# ---------------------------------------------------------------------------
+
+def recency(created_at: datetime, now: Optional[datetime] = None) -> float:
+    """1 / (1 + age / scale): the decay of weighted_post_by_recency with a tunable time scale."""
+
+    age_minutes = max(((now or timezone.now()) - created_at).total_seconds() / 60.0, 0.0)
+    return 1.0 / (1.0 + age_minutes / FEED_RANK_TIME_SCALE_MINUTES)
+
+
+def score(recency_value: float, likes: int = 0, comments: int = 0, affinity: int = 0) -> float:
+    engagement = 1.0 + FEED_RANK_ENGAGEMENT_WEIGHT * math.log1p(likes + 2 * comments)
+    closeness = 1.0 + FEED_RANK_AFFINITY_WEIGHT * math.log1p(affinity)
+    return recency_value * engagement * closeness
+
+
+def provisional_score(created_at: datetime) -> float:
+    """Score of a new timeline entry until the next rank_timelines run: recency only."""
+
+    return score(recency(created_at))
+
+
+# ---------------------------------------------------------------------------
+# Batch job (rank_timelines command)
+# ---------------------------------------------------------------------------
+
+def affinities(user_ids: List[int], since: datetime) -> Dict[int, Dict[int, int]]:
+    """user -> author -> likes + 2·comments the user gave the author's posts recently."""
+
+    result: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    likes = (
+        Like.objects.filter(user_id__in=user_ids, created_at__gte=since)
+        .values_list("user_id", "post__author_id")
+        .annotate(n=Count("id"))
+    )
+    for user_id, author_id, n in likes:
+        result[user_id][author_id] += n
+    comments = (
+        Comment.objects.filter(author_id__in=user_ids, created_at__gte=since)
+        .values_list("author_id", "post__author_id")
+        .annotate(n=Count("id"))
+    )
+    for user_id, author_id, n in comments:
+        result[user_id][author_id] += 2 * n
+    return result
+
+
+def rank_users(user_ids: List[int], now: datetime) -> int:
+    """Rescore the recent timeline entries of a batch of users (two reads, one bulk update)."""
+
+    window_start = now - timedelta(hours=FEED_RANK_WINDOW_HOURS)
+    closeness = affinities(user_ids, now - timedelta(days=FEED_RANK_AFFINITY_DAYS))
+
+    entries = list(
+        TimelineEntry.objects.filter(user_id__in=user_ids, created_at__gte=window_start).values_list(
+            "id", "user_id", "created_at", "post_id", "post__author_id", "post__likes_count", "post__comments_count"
+        )
+    )
+    # likes/comments still in counter shards count as well (same numbers the post shows)
+    pending = counters.pending_post_deltas({entry[3] for entry in entries})
+    updates = []
+    for entry_id, user_id, created_at, post_id, author_id, likes, comments in entries:
+        delta = pending.get(post_id, {})
+        updates.append(
+            TimelineEntry(
+                id=entry_id,
+                score=score(
+                    recency(created_at, now),
+                    max(likes + delta.get("likes_count", 0), 0),
+                    max(comments + delta.get("comments_count", 0), 0),
+                    0 if author_id == user_id else closeness.get(user_id, {}).get(author_id, 0),
+                ),
+            )
+        )
+    TimelineEntry.objects.bulk_update(updates, ["score"], batch_size=_BATCH_SIZE)
+    return len(updates)
+
+
+def rank_all(user_ids: Iterable[int], now: Optional[datetime] = None) -> Tuple[int, int]:
+    """Rescore every user's window; entries that left it drop to 0. Returns (users, entries)."""
+
+    now = now or timezone.now()
+    TimelineEntry.objects.filter(
+        created_at__lt=now - timedelta(hours=FEED_RANK_WINDOW_HOURS), score__gt=0
+    ).update(score=0.0)
+
+    users = entries = 0
+    batch: List[int] = []
+    for user_id in user_ids:
+        batch.append(user_id)
+        if len(batch) >= _BATCH_SIZE:
+            entries += rank_users(batch, now)
+            users += len(batch)
+            batch = []
+    if batch:
+        entries += rank_users(batch, now)
+        users += len(batch)
+    return users, entries
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import heapq
+import math
+from collections import Counter, defaultdict
+from hashlib import blake2b
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from core.constants import (
+    SEARCH_MAX_POSTINGS,
+    SEARCH_MAX_QUERY_TERMS,
+    SEARCH_MAX_RESULTS,
+    SEARCH_RESULTS_TTL,
+    SIMILAR_POSTS_MAX_POSTINGS,
+    SIMILAR_POSTS_MAX_TERMS,
+    SIMILAR_POSTS_MIN_SCORE,
+)
+from core.models import Community, Post, SearchCorpusStat, SearchPosting, SearchTermStat, User
+from core.services.pagination import ScoreCursor
+from core.services.tokenizer import tokenize
+
+# BM25 parameters (the usual defaults)
+K1 = 1.2
+B = 0.75
+
+_BULK_BATCH_SIZE = 1000
+
+# Name-like fields count twice: a match in a title beats one in a long description.
+_NAME_WEIGHT = 2
+
+_RANKED_KEY = "search:ranked:{}"
+
+Ranked = List[Tuple[int, float]]
+
+
+# ---------------------------------------------------------------------------
+# Documents
+# ---------------------------------------------------------------------------
+
+def post_terms(post: Post) -> Counter:
+    return Counter(tokenize(post.text))
+
+
+def user_terms(user: User) -> Counter:
+    terms = Counter(tokenize(user.bio))
+    for term in tokenize(f"{user.username} {user.display_name}"):
+        terms[term] += _NAME_WEIGHT
+    return terms
+
+
+def community_terms(community: Community) -> Counter:
+    terms = Counter(tokenize(community.description))
+    for term in tokenize(f"{community.name} {community.slug}"):
+        terms[term] += _NAME_WEIGHT
+    return terms
+
+
+def term_weights(terms: Counter) -> Dict[str, float]:
+    """The document as a unit-length log-tf vector: (1 + ln tf) / norm."""
+
+    raw = {term: 1.0 + math.log(tf) for term, tf in terms.items()}
+    norm = math.sqrt(sum(w * w for w in raw.values())) or 1.0
+    return {term: w / norm for term, w in raw.items()}
+
+
+def _postings(kind: str, object_id: int, terms: Counter) -> List[SearchPosting]:
+    length = sum(terms.values())
+    return [
+        SearchPosting(
+            term=term, kind=kind, object_id=object_id, tf=terms[term], doc_length=length, weight=weight
+        )
+        for term, weight in term_weights(terms).items()
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Index maintenance
+# ---------------------------------------------------------------------------
+
+def _bump_corpus(kind: str, documents: int, length: int) -> None:
+    if not documents and not length:
+        return
+    updates = {"documents": F("documents") + documents, "total_length": F("total_length") + length}
+    if SearchCorpusStat.objects.filter(kind=kind).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            SearchCorpusStat.objects.create(kind=kind, documents=documents, total_length=length)
+    except IntegrityError:
+        SearchCorpusStat.objects.filter(kind=kind).update(**updates)
+
+
+def _bump_terms(kind: str, added: Set[str], removed: Set[str]) -> None:
+    """Keep SearchTermStat (df) in step with the postings: +1 / -1 per document gaining / losing a term."""
+
+    if added:
+        SearchTermStat.objects.bulk_create(
+            [SearchTermStat(term=term, kind=kind) for term in added], ignore_conflicts=True
+        )
+        SearchTermStat.objects.filter(kind=kind, term__in=added).update(documents=F("documents") + 1)
+    if removed:
+        SearchTermStat.objects.filter(kind=kind, term__in=removed).update(
+            documents=Greatest(F("documents") - 1, Value(0))
+        )
+
+
+def index_document(kind: str, object_id: int, terms: Counter) -> None:
+    """Replace the postings of one document. A document without terms is not in the corpus."""
+
+    length = sum(terms.values())
+    with transaction.atomic():
+        old = SearchPosting.objects.filter(kind=kind, object_id=object_id)
+        old_terms = dict(old.values_list("term", "tf"))
+        old_length = sum(old_terms.values())
+        old.delete()
+        SearchPosting.objects.bulk_create(_postings(kind, object_id, terms), batch_size=_BULK_BATCH_SIZE)
+        _bump_corpus(kind, int(bool(length)) - int(bool(old_length)), length - old_length)
+        _bump_terms(kind, set(terms) - set(old_terms), set(old_terms) - set(terms))
+
+
+def remove_document(kind: str, object_id: int) -> None:
+    index_document(kind, object_id, Counter())
+
+
+def index_post(post: Post) -> None:
+    index_document(SearchPosting.KIND_POST, post.id, post_terms(post))
+
+
+def index_user(user: User) -> None:
+    index_document(SearchPosting.KIND_USER, user.id, user_terms(user))
+
+
+def index_community(community: Community) -> None:
+    index_document(SearchPosting.KIND_COMMUNITY, community.id, community_terms(community))
+
+
+def rebuild(kind: str, documents: Iterable[Tuple[int, Counter]]) -> int:
+    """Drop the index of `kind` and bulk-load it from (object_id, terms) pairs."""
+
+    SearchPosting.objects.filter(kind=kind).delete()
+    SearchCorpusStat.objects.filter(kind=kind).delete()
+    SearchTermStat.objects.filter(kind=kind).delete()
+
+    count = 0
+    total = 0
+    df: Counter = Counter()
+    batch: List[SearchPosting] = []
+    for object_id, terms in documents:
+        length = sum(terms.values())
+        if not length:
+            continue
+        count += 1
+        total += length
+        df.update(terms.keys())
+        batch.extend(_postings(kind, object_id, terms))
+        if len(batch) >= _BULK_BATCH_SIZE:
+            SearchPosting.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        SearchPosting.objects.bulk_create(batch)
+
+    SearchCorpusStat.objects.create(kind=kind, documents=count, total_length=total)
+    SearchTermStat.objects.bulk_create(
+        [SearchTermStat(term=term, kind=kind, documents=n) for term, n in df.items()],
+        batch_size=_BULK_BATCH_SIZE,
+    )
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Query
+# ---------------------------------------------------------------------------
+
+def query_terms(query: str) -> List[str]:
+    return list(dict.fromkeys(tokenize(query)))[:SEARCH_MAX_QUERY_TERMS]
+
+
+def document_frequencies(kind: str, terms: Iterable[str]) -> Dict[str, int]:
+    """df of each term from SearchTermStat: one indexed read, whatever the posting list lengths."""
+
+    return dict(
+        SearchTermStat.objects.filter(kind=kind, term__in=list(terms), documents__gt=0).values_list(
+            "term", "documents"
+        )
+    )
+
+
+def score(kind: str, terms: List[str]) -> Dict[int, float]:
+    """BM25 scores of the documents that contain at least one of the terms.
+
+    A term found in more than SEARCH_MAX_POSTINGS documents contributes only through
+    the ones where it weighs most (SearchPosting.weight: high tf in a short text), read
+    over search_posting_impact_idx; its idf still comes from the full df (SearchTermStat).
+    """
+
+    corpus = SearchCorpusStat.objects.filter(kind=kind).first()
+    if corpus is None or corpus.documents <= 0:
+        return {}
+    n_docs = corpus.documents
+    avg_length = max(corpus.total_length / n_docs, 1.0)
+
+    df = document_frequencies(kind, terms)
+    scores: Dict[int, float] = defaultdict(float)
+    for term in terms:
+        if term not in df:
+            continue
+        rows = list(
+            SearchPosting.objects.filter(term=term, kind=kind)
+            .order_by("-weight", "-object_id")
+            .values_list("object_id", "tf", "doc_length")[:SEARCH_MAX_POSTINGS]
+        )
+        idf = _idf(n_docs, df[term])
+        for object_id, tf, doc_length in rows:
+            scores[object_id] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc_length / avg_length))
+    return scores
+
+
+def _idf(n_docs: int, df: int) -> float:
+    return math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+
+def similar_scores(kind: str, object_id: int) -> Dict[int, float]:
+    """TF-IDF similarity of every document sharing a term with an indexed one.
+
+    Vectors are log-tf, normalised at index time (SearchPosting.weight); every shared
+    term counts with idf² (Lucene's classic TF-IDF). df comes from SearchTermStat, and only
+    the document's SIMILAR_POSTS_MAX_TERMS most informative terms are looked up, each for
+    at most SIMILAR_POSTS_MAX_POSTINGS postings where it weighs most: a bounded number of
+    index range reads whatever the corpus size. The document itself would score 1.0.
+    """
+
+    own = dict(SearchPosting.objects.filter(kind=kind, object_id=object_id).values_list("term", "weight"))
+    corpus = SearchCorpusStat.objects.filter(kind=kind).first()
+    if not own or corpus is None or corpus.documents <= 1:
+        return {}
+
+    df = document_frequencies(kind, own)
+    # a term of this document alone says nothing about the others
+    idf = {term: _idf(corpus.documents, df[term]) for term in own if df.get(term, 0) > 1}
+    terms = sorted(idf, key=lambda term: own[term] * idf[term], reverse=True)[:SIMILAR_POSTS_MAX_TERMS]
+    self_score = sum((own[term] * idf[term]) ** 2 for term in terms)
+    if not self_score:
+        return {}
+
+    scores: Dict[int, float] = defaultdict(float)
+    for term in terms:
+        factor = idf[term] ** 2 * own[term] / self_score
+        rows = (
+            SearchPosting.objects.filter(term=term, kind=kind)
+            .order_by("-weight", "-object_id")
+            .values_list("object_id", "weight")[:SIMILAR_POSTS_MAX_POSTINGS]
+        )
+        for other_id, weight in rows:
+            scores[other_id] += factor * weight
+    scores.pop(object_id, None)
+    return {other_id: value for other_id, value in scores.items() if value >= SIMILAR_POSTS_MIN_SCORE}
+
+
+def _top(scores: Dict[int, float]) -> Ranked:
+    """The best SEARCH_MAX_RESULTS (object_id, score), best first; ties go to the newer id."""
+
+    # rounded: the same document must get the same score on every page request
+    return heapq.nlargest(
+        SEARCH_MAX_RESULTS,
+        ((object_id, round(value, 6)) for object_id, value in scores.items()),
+        key=lambda item: (item[1], item[0]),
+    )
+
+
+def _ranked(key: str, compute: Callable[[], Dict[int, float]]) -> Ranked:
+    """_top(compute()), cached for SEARCH_RESULTS_TTL.
+
+    Scoring reads the posting lists once per query; the following infinite-scroll pages
+    only slice the cached list. Documents indexed meanwhile show up after the TTL.
+    """
+
+    cache_key = _RANKED_KEY.format(blake2b(key.encode(), digest_size=16).hexdigest())
+    ranked = cache.get(cache_key)
+    if ranked is None:
+        ranked = _top(compute())
+        cache.set(cache_key, ranked, SEARCH_RESULTS_TTL)
+    return ranked
+
+
+def _page(
+    ranked: Ranked,
+    limit: int,
+    after: Optional[ScoreCursor],
+) -> Tuple[Ranked, Optional[ScoreCursor]]:
+    if after is not None:
+        ranked = [item for item in ranked if (item[1], item[0]) < after]
+
+    page = ranked[:limit]
+    if len(ranked) <= limit:
+        return page, None
+    object_id, value = page[-1]
+    return page, (value, object_id)
+
+
+def search(
+    kind: str,
+    query: str,
+    limit: int,
+    after: Optional[ScoreCursor] = None,
+) -> Tuple[List[Tuple[int, float]], Optional[ScoreCursor]]:
+    """One page of (object_id, score), best first, and the cursor of the next page (or None).
+
+    Ties are broken by id (newer first), so (score, id) is a stable keyset over the
+    cached ranking of the query (at most SEARCH_MAX_RESULTS documents).
+    """
+
+    terms = query_terms(query)
+    if not terms:
+        return [], None
+    # the score does not depend on the order of the terms
+    key = f"{kind}:{' '.join(sorted(terms))}"
+    return _page(_ranked(key, lambda: score(kind, terms)), limit, after)
+
+
+def similar(
+    kind: str,
+    object_id: int,
+    limit: int,
+    after: Optional[ScoreCursor] = None,
+) -> Tuple[List[Tuple[int, float]], Optional[ScoreCursor]]:
+    """Like search(), but the query is an indexed document (see similar_scores).
+
+    The ranking is cached like a query's, so post pages and ?similar= scrolling score once.
+    """
+
+    return _page(_ranked(f"similar:{kind}:{object_id}", lambda: similar_scores(kind, object_id)), limit, after)
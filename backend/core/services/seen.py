@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import math
+import struct
+from hashlib import blake2b
+from typing import Callable, Iterable, List, Optional, Tuple, TypeVar
+
+from django.core.cache import cache
+
+from core.constants import (
+    SEEN_FILTER_CACHE_TTL,
+    SEEN_FILTER_CAPACITY,
+    SEEN_FILTER_ERROR_RATE,
+    SEEN_FILTER_MAX_READS,
+    SEEN_FILTER_PERSIST_EVERY,
+)
+from core.models import Post, SeenPostsFilter
+
+# Posts already shown to a user in the feed: a rolling Bloom filter of two generations.
+# New ids go to `current`; once it holds SEEN_FILTER_CAPACITY ids it becomes `older`
+# and the previous older generation is dropped, so memory stays fixed (~4.7 KiB with the
+# defaults) and the user is shown again what they saw 2000-4000 impressions ago.
+# A false positive hides an unseen post from one feed read (~2% over both generations).
+#
+# The filter lives in the cache (updated on every feed page) and is copied to
+# SeenPostsFilter every SEEN_FILTER_PERSIST_EVERY new ids; losing the cache copy
+# forgets at most that many impressions. Concurrent tabs may drop each other's marks.
+
+_BITS = math.ceil(-SEEN_FILTER_CAPACITY * math.log(SEEN_FILTER_ERROR_RATE) / math.log(2) ** 2 / 8) * 8
+_BYTES = _BITS // 8
+_HASHES = max(1, round(_BITS / SEEN_FILTER_CAPACITY * math.log(2)))
+
+# format, bits per generation, ids in current, ids in older, ids not yet in the database
+_FORMAT = 1
+_HEADER = struct.Struct(">BIIII")
+
+_CACHE_KEY = "seen:{}"
+
+Cursor = TypeVar("Cursor")
+
+
+def _positions(post_id: int) -> List[int]:
+    """Bit positions of the id: double hashing over one 128-bit digest."""
+
+    digest = blake2b(post_id.to_bytes(8, "big", signed=True), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "big")
+    h2 = int.from_bytes(digest[8:], "big") | 1
+    return [(h1 + i * h2) % _BITS for i in range(_HASHES)]
+
+
+def _has(bits: bytearray, positions: List[int]) -> bool:
+    return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+
+class SeenFilter:
+    __slots__ = ("current", "older", "current_count", "older_count", "unsaved")
+
+    def __init__(
+        self,
+        current: Optional[bytearray] = None,
+        older: Optional[bytearray] = None,
+        current_count: int = 0,
+        older_count: int = 0,
+        unsaved: int = 0,
+    ):
+        self.current = current if current is not None else bytearray(_BYTES)
+        self.older = older if older is not None else bytearray(_BYTES)
+        self.current_count = current_count
+        self.older_count = older_count
+        self.unsaved = unsaved
+
+    def __contains__(self, post_id: int) -> bool:
+        positions = _positions(post_id)
+        return _has(self.current, positions) or _has(self.older, positions)
+
+    def add(self, post_id: int) -> bool:
+        """Remember the id; False if it was (or looks) already remembered."""
+
+        positions = _positions(post_id)
+        if _has(self.current, positions):
+            return False
+        for p in positions:
+            self.current[p >> 3] |= 1 << (p & 7)
+        self.current_count += 1
+        self.unsaved += 1
+        if self.current_count >= SEEN_FILTER_CAPACITY:
+            self.older, self.older_count = self.current, self.current_count
+            self.current, self.current_count = bytearray(_BYTES), 0
+        return True
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(_FORMAT, _BITS, self.current_count, self.older_count, self.unsaved)
+        return header + bytes(self.current) + bytes(self.older)
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "SeenFilter":
+        """Empty filter for missing data or data written with other sizing constants."""
+
+        if not data or len(data) != _HEADER.size + 2 * _BYTES:
+            return cls()
+        fmt, bits, current_count, older_count, unsaved = _HEADER.unpack_from(data)
+        if fmt != _FORMAT or bits != _BITS:
+            return cls()
+        body = bytearray(data[_HEADER.size:])
+        return cls(body[:_BYTES], body[_BYTES:], current_count, older_count, unsaved)
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+def load(user_id: int) -> SeenFilter:
+    """The user's filter: from the cache, else from the database copy."""
+
+    key = _CACHE_KEY.format(user_id)
+    data = cache.get(key)
+    if data is None:
+        data = SeenPostsFilter.objects.filter(user_id=user_id).values_list("data", flat=True).first()
+        if data is None:
+            return SeenFilter()
+        data = bytes(data)
+        cache.set(key, data, SEEN_FILTER_CACHE_TTL)
+    return SeenFilter.from_bytes(data)
+
+
+def save(user_id: int, seen: SeenFilter) -> None:
+    if seen.unsaved >= SEEN_FILTER_PERSIST_EVERY:
+        seen.unsaved = 0
+        SeenPostsFilter.objects.update_or_create(user_id=user_id, defaults={"data": seen.to_bytes()})
+    cache.set(_CACHE_KEY.format(user_id), seen.to_bytes(), SEEN_FILTER_CACHE_TTL)
+
+
+def mark(user_id: int, seen: SeenFilter, posts: Iterable[Post]) -> None:
+    """Record feed impressions (the user's own posts are not tracked) and store the filter."""
+
+    added = [seen.add(post.id) for post in posts if post.author_id != user_id]
+    if any(added):
+        save(user_id, seen)
+
+
+# ---------------------------------------------------------------------------
+# Feed pages
+# ---------------------------------------------------------------------------
+
+def unseen_page(
+    read: Callable[[Optional[Cursor], int], Tuple[List[Post], Optional[Cursor]]],
+    cursor: Optional[Cursor],
+    limit: int,
+    seen: SeenFilter,
+) -> Tuple[List[Post], Optional[Cursor]]:
+    """A feed page without already-shown posts.
+
+    `read(cursor, limit)` is one keyset read of the feed. Seen posts are skipped and the
+    feed is read further (at most SEEN_FILTER_MAX_READS times) to fill the page; the
+    returned cursor continues after everything scanned. If every scanned post was seen,
+    the first read is returned as is: the feed falls back to its usual order instead of
+    coming back empty (infinite scroll stops on empty pages).
+    """
+
+    first = read(cursor, limit)
+    posts = [post for post in first[0] if post.id not in seen]
+    cursor = first[1]
+    for _ in range(SEEN_FILTER_MAX_READS - 1):
+        if len(posts) >= limit or cursor is None:
+            break
+        batch, cursor = read(cursor, limit - len(posts))
+        posts.extend(post for post in batch if post.id not in seen)
+    return (posts, cursor) if posts else first
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import heapq
+import math
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.constants import (
+    FOLLOW_SUGGESTIONS_COMMUNITY_WEIGHT,
+    FOLLOW_SUGGESTIONS_MAX_COMMUNITY,
+    FOLLOW_SUGGESTIONS_SHOWN,
+    FOLLOW_SUGGESTIONS_STORED,
+    FOLLOW_SUGGESTIONS_TTL,
+)
+from core.models import CommunityMembership, FollowSuggestion, User
+from core.services import follow_graph
+from core.services.follow_graph import FollowGraph
+
+_BULK_BATCH_SIZE = 1000
+
+
+class Candidate(NamedTuple):
+    user_id: int
+    score: float
+    mutual_follows: int
+    shared_communities: int
+
+
+# ---------------------------------------------------------------------------
+# Batch computation (compute_follow_suggestions command)
+# ---------------------------------------------------------------------------
+
+class Signals:
+    """Everything the batch needs, loaded once: the follow graph and the membership lists."""
+
+    def __init__(self, graph: FollowGraph, memberships: Iterable[tuple]):
+        self.graph = graph
+        self.user_communities: Dict[int, List[int]] = defaultdict(list)
+        self.community_members: Dict[int, List[int]] = defaultdict(list)
+        for user_id, community_id in memberships:
+            self.user_communities[user_id].append(community_id)
+            self.community_members[community_id].append(user_id)
+
+    @classmethod
+    def from_db(cls) -> "Signals":
+        return cls(
+            FollowGraph.from_db(),
+            CommunityMembership.objects.values_list("user_id", "community_id").iterator(chunk_size=10000),
+        )
+
+
+def candidates(signals: Signals, user_id: int, limit: int = FOLLOW_SUGGESTIONS_STORED) -> List[Candidate]:
+    """Top `limit` people for the user to follow.
+
+    One sparse row of F·F + w·M·Mᵀ (F — follow adjacency, M — membership matrix), with
+    Adamic–Adar weights: a path through someone who follows everybody, or a shared
+    community of thousands, says little about the pair.
+    """
+
+    graph = signals.graph
+    following: Set[int] = set(graph.following(user_id))
+
+    scores: Dict[int, float] = defaultdict(float)
+    mutual: Dict[int, int] = defaultdict(int)
+    shared: Dict[int, int] = defaultdict(int)
+
+    for friend in following:
+        row = graph.following(friend)
+        weight = 1.0 / math.log(2 + len(row))
+        for candidate in row:
+            scores[candidate] += weight
+            mutual[candidate] += 1
+
+    for community_id in signals.user_communities.get(user_id, ()):
+        members = signals.community_members[community_id]
+        if len(members) > FOLLOW_SUGGESTIONS_MAX_COMMUNITY:
+            continue
+        weight = FOLLOW_SUGGESTIONS_COMMUNITY_WEIGHT / math.log(2 + len(members))
+        for candidate in members:
+            scores[candidate] += weight
+            shared[candidate] += 1
+
+    best = heapq.nlargest(
+        limit,
+        (
+            (score, mutual[cid], cid)
+            for cid, score in scores.items()
+            if cid != user_id and cid not in following
+        ),
+    )
+    return [Candidate(cid, score, mutual[cid], shared[cid]) for score, _, cid in best]
+
+
+def store(user_id: int, found: List[Candidate]) -> None:
+    """Replace the user's stored suggestions."""
+
+    expires_at = timezone.now() + timedelta(seconds=FOLLOW_SUGGESTIONS_TTL)
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id=user_id).delete()
+        FollowSuggestion.objects.bulk_create(
+            [
+                FollowSuggestion(
+                    user_id=user_id,
+                    suggested_id=c.user_id,
+                    score=c.score,
+                    mutual_follows=c.mutual_follows,
+                    shared_communities=c.shared_communities,
+                    expires_at=expires_at,
+                )
+                for c in found
+            ],
+            batch_size=_BULK_BATCH_SIZE,
+        )
+
+
+def compute(signals: Signals, user_ids: Iterable[int]) -> Iterator[int]:
+    """Recompute and store suggestions; yields the number stored for every user."""
+
+    for user_id in user_ids:
+        found = candidates(signals, user_id)
+        store(user_id, found)
+        yield len(found)
+
+
+# ---------------------------------------------------------------------------
+# Request path
+# ---------------------------------------------------------------------------
+
+def for_user(user: User, limit: int = FOLLOW_SUGGESTIONS_SHOWN) -> List[FollowSuggestion]:
+    """Fresh stored suggestions, best first (one read over follow_suggestion_user_idx).
+
+    People followed since the batch ran are dropped (follow_graph, no query once it is loaded).
+    """
+
+    if not user.is_authenticated:
+        return []
+
+    rows = list(
+        FollowSuggestion.objects.filter(user=user, expires_at__gt=timezone.now())
+        .select_related("suggested")
+        .order_by("-score")[:FOLLOW_SUGGESTIONS_STORED]
+    )
+    followed = follow_graph.following_among(user.id, [r.suggested_id for r in rows])
+    return [r for r in rows if r.suggested_id not in followed][:limit]
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import F, Max, QuerySet, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from core.models import Comment, Hashtag, Mention, MentionedPost, Post, PostHashtag, User
+from core.services.markup import render_markdown
+from core.services.pagination import Cursor, keyset_filter
+
+# The tag and mention links markup renders: whatever is not linked (code, link text,
+# headers, escapes) is not indexed either.
+_LINK_RE = re.compile(r'<a [^>]*class="(hashtag|mention)"[^>]*>[#@]([^<]+)</a>')
+
+
+def normalize_tag(name: str) -> str:
+    return (name or "").lstrip("#").lower().replace("ё", "е")
+
+
+def extract(html: str) -> Tuple[Set[str], Set[str]]:
+    """(normalized tags, usernames) linked in rendered markdown (render_markdown output)."""
+
+    tags: Set[str] = set()
+    usernames: Set[str] = set()
+    for kind, name in _LINK_RE.findall(html or ""):
+        if kind == "hashtag":
+            tags.add(normalize_tag(name))
+        else:
+            usernames.add(name)
+    return tags, usernames
+
+
+# ---------------------------------------------------------------------------
+# Index maintenance (signals, rebuild_hashtags command)
+# ---------------------------------------------------------------------------
+
+def _hashtag_ids(names: Set[str]) -> List[int]:
+    if not names:
+        return []
+    Hashtag.objects.bulk_create([Hashtag(name=name) for name in names], ignore_conflicts=True)
+    return list(Hashtag.objects.filter(name__in=names).values_list("id", flat=True))
+
+
+def _sync_mentioned(post_id: int, user_ids: Set[int]) -> None:
+    """MentionedPost of the users for the post: the latest of their Mention rows, or no row."""
+
+    if not user_ids:
+        return
+    latest = (
+        Mention.objects.filter(post_id=post_id, user_id__in=user_ids)
+        .values_list("user_id")
+        .annotate(last=Max("created_at"))
+        .order_by()
+    )
+    MentionedPost.objects.filter(post_id=post_id, user_id__in=user_ids).delete()
+    MentionedPost.objects.bulk_create(
+        [MentionedPost(user_id=uid, post_id=post_id, last_mentioned_at=last) for uid, last in latest],
+        ignore_conflicts=True,
+    )
+
+
+def _replace_mentions(post_id: int, comment_id: Optional[int], usernames: Set[str], created_at) -> None:
+    mentions = Mention.objects.filter(post_id=post_id, comment_id=comment_id)
+    old_ids = set(mentions.values_list("user_id", flat=True))
+    mentions.delete()
+    user_ids = set(User.objects.filter(username__in=usernames).values_list("id", flat=True)) if usernames else set()
+    Mention.objects.bulk_create(
+        [
+            Mention(user_id=uid, post_id=post_id, comment_id=comment_id, created_at=created_at)
+            for uid in user_ids
+        ]
+    )
+    _sync_mentioned(post_id, old_ids | user_ids)
+
+
+def index_post(post: Post) -> None:
+    """Sync the post's tag links (and tag counters) and @mentions with its text."""
+
+    names, usernames = extract(post.rendered_text)
+    with transaction.atomic():
+        wanted = set(_hashtag_ids(names))
+        current = set(PostHashtag.objects.filter(post=post).values_list("tag_id", flat=True))
+
+        # removed links are decremented by the PostHashtag post_delete signal
+        PostHashtag.objects.filter(post=post, tag_id__in=current - wanted).delete()
+        added = wanted - current
+        if added:
+            PostHashtag.objects.bulk_create(
+                [PostHashtag(tag_id=tag_id, post=post, created_at=post.created_at) for tag_id in added],
+                ignore_conflicts=True,
+            )
+            Hashtag.objects.filter(id__in=added).update(
+                posts_count=F("posts_count") + 1,
+                last_used_at=Greatest(Coalesce(F("last_used_at"), Value(post.created_at)), Value(post.created_at)),
+            )
+
+        _replace_mentions(post.id, None, usernames, post.created_at)
+
+
+def tag_unlinked(tag_id: int) -> None:
+    Hashtag.objects.filter(id=tag_id).update(posts_count=Greatest(F("posts_count") - 1, Value(0)))
+
+
+def mention_removed(post_id: int, user_id: int) -> None:
+    """A Mention went away with its comment: the post may leave the user's mentions page."""
+
+    with transaction.atomic():
+        _sync_mentioned(post_id, {user_id})
+
+
+def index_comment(comment: Comment) -> None:
+    """Comments are indexed for @mentions only; tag pages list posts."""
+
+    _, usernames = extract(render_markdown(comment.text))
+    with transaction.atomic():
+        _replace_mentions(comment.post_id, comment.id, usernames, comment.created_at)
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def _posts(rows, limit: int, queryset: Optional[QuerySet]) -> Tuple[List[Post], Optional[Cursor]]:
+    """rows: (timestamp, post_id), one per post, limit + 1 of them."""
+
+    page = rows[:limit]
+    next_cursor = page[-1] if len(rows) > limit else None
+    qs = queryset if queryset is not None else Post.objects.all()
+    by_id = qs.in_bulk([post_id for _, post_id in page])
+    return [by_id[post_id] for _, post_id in page if post_id in by_id], next_cursor
+
+
+def tag_page(
+    tag_id: int,
+    limit: int,
+    before: Optional[Cursor] = None,
+    queryset: Optional[QuerySet] = None,
+) -> Tuple[List[Post], Optional[Cursor]]:
+    """Posts with the tag, newest first: a range read over (tag, -created_at, -post)."""
+
+    links = keyset_filter(PostHashtag.objects.filter(tag_id=tag_id), before, id_field="post_id")
+    rows = list(links.order_by("-created_at", "-post_id").values_list("created_at", "post_id")[: limit + 1])
+    return _posts(rows, limit, queryset)
+
+
+def mentions_page(
+    user_id: int,
+    limit: int,
+    before: Optional[Cursor] = None,
+    queryset: Optional[QuerySet] = None,
+) -> Tuple[List[Post], Optional[Cursor]]:
+    """Posts where the user is mentioned (in the text or in comments), by their latest mention.
+
+    A range read over MentionedPost (user, -last_mentioned_at, -post): one row per post,
+    so a post mentioned many times is listed once. The cursor is (last_mentioned_at, post_id).
+    """
+
+    mentioned = keyset_filter(
+        MentionedPost.objects.filter(user_id=user_id), before, ts_field="last_mentioned_at", id_field="post_id"
+    )
+    rows = list(
+        mentioned.order_by("-last_mentioned_at", "-post_id").values_list("last_mentioned_at", "post_id")[: limit + 1]
+    )
+    return _posts(rows, limit, queryset)
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Tuple
+
+from django.db.models import Q, QuerySet
+
+from core.constants import FEED_FANOUT_MAX_AUDIENCE, TIMELINE_BACKFILL_POSTS
+from core.models import CommunityMembership, Follow, Post, TimelineEntry
+from core.services import ranking
+from core.services.pagination import Cursor, ScoreCursor, keyset_filter
+
+_BULK_BATCH_SIZE = 1000
+
+
+# ---------------------------------------------------------------------------
+# Fan-out on write
+# ---------------------------------------------------------------------------
+
+def _audience_exceeds_limit(qs: QuerySet) -> bool:
+    # COUNT over a LIMIT-ed subquery: stops scanning after limit + 1 rows.
+    return qs[: FEED_FANOUT_MAX_AUDIENCE + 1].count() > FEED_FANOUT_MAX_AUDIENCE
+
+
+def _insert_entries(user_ids: Iterable[int], posts: Iterable[Tuple[int, datetime]]) -> None:
+    posts = [(post_id, created_at, ranking.provisional_score(created_at)) for post_id, created_at in posts]
+    batch: List[TimelineEntry] = []
+    for user_id in user_ids:
+        for post_id, created_at, score in posts:
+            batch.append(TimelineEntry(user_id=user_id, post_id=post_id, created_at=created_at, score=score))
+            if len(batch) >= _BULK_BATCH_SIZE:
+                TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_post(post: Post) -> None:
+    """Write a freshly created post into the home timelines of its audience.
+
+    Audience = the author + followers of the author + members of the post's community.
+    Authors/communities with a huge audience are skipped here and merged in on read.
+    """
+
+    recipients: Set[int] = {int(post.author_id)}
+
+    followers = Follow.objects.filter(following_id=post.author_id)
+    if not _audience_exceeds_limit(followers):
+        recipients.update(followers.values_list("follower_id", flat=True).iterator())
+
+    if post.community_id:
+        members = CommunityMembership.objects.filter(community_id=post.community_id)
+        if not _audience_exceeds_limit(members):
+            recipients.update(members.values_list("user_id", flat=True).iterator())
+
+    _insert_entries(recipients, [(post.id, post.created_at)])
+
+
+def _recent_posts(qs: QuerySet) -> List[Tuple[int, datetime]]:
+    return list(qs.order_by("-created_at", "-id").values_list("id", "created_at")[:TIMELINE_BACKFILL_POSTS])
+
+
+def backfill_author(user_id: int, author_id: int) -> None:
+    """After a follow: put the author's latest posts into the follower's timeline."""
+
+    if _audience_exceeds_limit(Follow.objects.filter(following_id=author_id)):
+        return  # pulled on read
+    _insert_entries([user_id], _recent_posts(Post.objects.filter(author_id=author_id)))
+
+
+def drop_author(user_id: int, author_id: int) -> None:
+    """After an unfollow: remove the author's posts unless they came via a joined community."""
+
+    member_community_ids = CommunityMembership.objects.filter(user_id=user_id).values("community_id")
+    (
+        TimelineEntry.objects.filter(user_id=user_id, post__author_id=author_id)
+        .exclude(post__community_id__in=member_community_ids)
+        .delete()
+    )
+
+
+def backfill_community(user_id: int, community_id: int) -> None:
+    """After joining a community: put its latest posts into the member's timeline."""
+
+    if _audience_exceeds_limit(CommunityMembership.objects.filter(community_id=community_id)):
+        return  # pulled on read
+    _insert_entries([user_id], _recent_posts(Post.objects.filter(community_id=community_id)))
+
+
+def drop_community(user_id: int, community_id: int) -> None:
+    """After leaving a community: remove its posts unless the author is followed (or is the user)."""
+
+    following_ids = Follow.objects.filter(follower_id=user_id).values("following_id")
+    (
+        TimelineEntry.objects.filter(user_id=user_id, post__community_id=community_id)
+        .exclude(post__author_id=user_id)
+        .exclude(post__author_id__in=following_ids)
+        .delete()
+    )
+
+
+def rebuild_for_user(user_id: int, depth: int) -> None:
+    """Recreate the user's timeline from the Follow/CommunityMembership graphs."""
+
+    author_ids, community_ids = pulled_sources(user_id)
+    following_ids = (
+        Follow.objects.filter(follower_id=user_id)
+        .exclude(following_id__in=author_ids)
+        .values("following_id")
+    )
+    member_ids = (
+        CommunityMembership.objects.filter(user_id=user_id)
+        .exclude(community_id__in=community_ids)
+        .values("community_id")
+    )
+    posts = (
+        Post.objects.filter(
+            Q(author_id=user_id) | Q(author_id__in=following_ids) | Q(community_id__in=member_ids)
+        )
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at")[:depth]
+    )
+
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    _insert_entries([user_id], list(posts))
+
+
+# ---------------------------------------------------------------------------
+# Read path (entries + fan-out-on-read merge)
+# ---------------------------------------------------------------------------
+
+def pulled_sources(user_id: int) -> Tuple[List[int], List[int]]:
+    """Followed authors / joined communities that are too big for fan-out."""
+
+    author_ids = list(
+        Follow.objects.filter(
+            follower_id=user_id, following__followers_count__gt=FEED_FANOUT_MAX_AUDIENCE
+        ).values_list("following_id", flat=True)
+    )
+    community_ids = list(
+        CommunityMembership.objects.filter(
+            user_id=user_id, community__members_count__gt=FEED_FANOUT_MAX_AUDIENCE
+        ).values_list("community_id", flat=True)
+    )
+    return author_ids, community_ids
+
+
+def read_timeline(
+    user_id: int,
+    limit: int,
+    before: Optional[Cursor] = None,
+    queryset: Optional[QuerySet] = None,
+) -> Tuple[List[Post], Optional[Cursor]]:
+    """Return one page of the home timeline and the cursor of the next page (or None).
+
+    One indexed range read over TimelineEntry, plus one range read over Post
+    for "pulled" authors/communities when the user follows any.
+    """
+
+    entries = keyset_filter(TimelineEntry.objects.filter(user_id=user_id), before, id_field="post_id")
+    rows = list(entries.order_by("-created_at", "-post_id").values_list("created_at", "post_id")[: limit + 1])
+
+    author_ids, community_ids = pulled_sources(user_id)
+    if author_ids or community_ids:
+        pulled = keyset_filter(
+            Post.objects.filter(Q(author_id__in=author_ids) | Q(community_id__in=community_ids)),
+            before,
+        )
+        rows.extend(pulled.order_by("-created_at", "-id").values_list("created_at", "id")[: limit + 1])
+        rows = sorted(set(rows), reverse=True)
+
+    page = rows[:limit]
+    next_cursor = page[-1] if len(rows) > limit else None
+
+    qs = queryset if queryset is not None else Post.objects.all()
+    by_id = qs.in_bulk([post_id for _, post_id in page])
+    posts = [by_id[post_id] for _, post_id in page if post_id in by_id]
+    return posts, next_cursor
+
+
+def read_ranked(
+    user_id: int,
+    limit: int,
+    after: Optional[ScoreCursor] = None,
+    queryset: Optional[QuerySet] = None,
+) -> Tuple[List[Post], Optional[ScoreCursor]]:
+    """One page of the ranked home timeline: keyset over stored (score, post_id).
+
+    Scores come from rank_timelines, so the page is a range read over
+    timeline_user_rank_idx; nothing is sorted per request.
+    """
+
+    entries = TimelineEntry.objects.filter(user_id=user_id)
+    if after is not None:
+        score, last_id = after
+        entries = entries.filter(Q(score__lt=score) | Q(score=score, post_id__lt=last_id))
+    rows = list(entries.order_by("-score", "-post_id").values_list("score", "post_id")[: limit + 1])
+
+    page = rows[:limit]
+    next_cursor = page[-1] if len(rows) > limit else None
+
+    qs = queryset if queryset is not None else Post.objects.all()
+    by_id = qs.in_bulk([post_id for _, post_id in page])
+    posts = [by_id[post_id] for _, post_id in page if post_id in by_id]
+    return posts, next_cursor
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import re
+from typing import List
+
+# Tokens: runs of Cyrillic/Latin letters and digits; "ё" is folded into "е".
+_TOKEN_RE = re.compile(r"[0-9a-zа-я]+")
+
+MAX_TERM_LENGTH = 64
+
+STOPWORDS = frozenset(
+    """
+    а без более бы был была были было быть в вам вас весь во вот все всего всех вы где да даже для
+    до его ее ей ему если есть еще же за здесь и из или им их к как ко когда кто ли либо мне мое
+    может мои мой моя мы на над надо наш не него нее нет ни них но ну о об однако он она они оно от
+    очень по под при с свое свои свой своя со так также такой там твое твои твой твоя те тем то того
+    тоже той только том ты у уже хотя чего чей чем что чтобы чье чья эта эти это я
+    a an and are as at be but by for from has have i in is it of on or that the this to was were
+    will with
+    """.split()
+)
+
+# ---------------------------------------------------------------------------
+# Russian stemmer (Snowball "russian" algorithm, compact form)
+# ---------------------------------------------------------------------------
+
+_VOWELS = "аеиоуыэюя"
+
+# (endings, need preceding "а"/"я") — the preceding letter itself is kept
+_PERFECTIVE_GERUND = (
+    (("в", "вши", "вшись"), True),
+    (("ив", "ивши", "ившись", "ыв", "ывши", "ывшись"), False),
+)
+_ADJECTIVE = (
+    (
+        (
+            "ее", "ие", "ые", "ое", "ими", "ыми", "ей", "ий", "ый", "ой", "ем", "им", "ым", "ом",
+            "его", "ого", "ему", "ому", "их", "ых", "ую", "юю", "ая", "яя", "ою", "ею",
+        ),
+        False,
+    ),
+)
+_PARTICIPLE = (
+    (("ем", "нн", "вш", "ющ", "щ"), True),
+    (("ивш", "ывш", "ующ"), False),
+)
+_REFLEXIVE = ((("ся", "сь"), False),)
+_VERB = (
+    (("ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но", "ет", "ют", "ны", "ть", "ешь", "нно"), True),
+    (
+        (
+            "ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей", "уй", "ил", "ыл", "им", "ым",
+            "ен", "ило", "ыло", "ено", "ят", "ует", "уют", "ит", "ыт", "ены", "ить", "ыть", "ишь", "ую", "ю",
+        ),
+        False,
+    ),
+)
+_NOUN = (
+    (
+        (
+            "а", "ев", "ов", "ие", "ье", "е", "иями", "ями", "ами", "еи", "ии", "и", "ией", "ей", "ой",
+            "ий", "й", "иям", "ям", "ием", "ем", "ам", "ом", "о", "у", "ах", "иях", "ях", "ы", "ь", "ию",
+            "ью", "ю", "ия", "ья", "я",
+        ),
+        False,
+    ),
+)
+_SUPERLATIVE = ((("ейше", "ейш"), False),)
+_DERIVATIONAL = ((("ость", "ост"), False),)
+
+
+def _strip(word: str, start: int, groups) -> str | None:
+    """Remove the longest matching ending that lies inside word[start:], or return None."""
+
+    candidates = sorted(
+        ((ending, needs_a) for endings, needs_a in groups for ending in endings),
+        key=lambda x: len(x[0]),
+        reverse=True,
+    )
+    for ending, needs_a in candidates:
+        if not word.endswith(ending):
+            continue
+        cut = len(word) - len(ending)
+        if cut < start:
+            continue
+        if needs_a and not (cut - 1 >= start and word[cut - 1] in "ая"):
+            continue
+        return word[:cut]
+    return None
+
+
+def _region_after_vc(word: str, start: int) -> int:
+    # position after the first non-vowel that follows a vowel, searching from `start`
+    for i in range(start + 1, len(word)):
+        if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+            return i + 1
+    return len(word)
+
+
+def stem(word: str) -> str:
+    rv = next((i + 1 for i, ch in enumerate(word) if ch in _VOWELS), len(word))
+    if rv >= len(word):
+        return word
+    r2 = _region_after_vc(word, _region_after_vc(word, 0))
+
+    # Step 1
+    stripped = _strip(word, rv, _PERFECTIVE_GERUND)
+    if stripped is not None:
+        word = stripped
+    else:
+        word = _strip(word, rv, _REFLEXIVE) or word
+        stripped = _strip(word, rv, _ADJECTIVE)
+        if stripped is not None:
+            word = _strip(stripped, rv, _PARTICIPLE) or stripped
+        else:
+            word = _strip(word, rv, _VERB) or _strip(word, rv, _NOUN) or word
+
+    # Step 2
+    if word.endswith("и") and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Step 3
+    word = _strip(word, max(r2, rv), _DERIVATIONAL) or word
+
+    # Step 4
+    if word.endswith("нн") and len(word) - 1 >= rv:
+        return word[:-1]
+    stripped = _strip(word, rv, _SUPERLATIVE)
+    if stripped is not None:
+        word = stripped[:-1] if stripped.endswith("нн") else stripped
+    elif word.endswith("ь") and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Text -> index terms: lowercased, stopwords dropped, Russian words stemmed."""
+
+    terms = []
+    for token in _TOKEN_RE.findall((text or "").lower().replace("ё", "е")):
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        terms.append(stem(token)[:MAX_TERM_LENGTH])
+    return terms
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import heapq
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.constants import (
+    TRENDING_HALF_LIFE_HOURS,
+    TRENDING_ROLLUP_BATCH,
+    TRENDING_ROLLUP_LAG,
+    TRENDING_SHOWN,
+    TRENDING_STORED,
+    TRENDING_WINDOW_HOURS,
+)
+from core.models import (
+    Comment,
+    Community,
+    CommunityMembership,
+    Like,
+    Post,
+    RollupWatermark,
+    TrendingBucket,
+    TrendingItem,
+)
+
+POST = TrendingBucket.KIND_POST
+COMMUNITY = TrendingBucket.KIND_COMMUNITY
+
+# (kind, object_id, hour) -> counter field -> delta
+Deltas = Dict[Tuple[str, int, datetime], Counter]
+
+_BULK_BATCH_SIZE = 1000
+
+
+def _hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+# ---------------------------------------------------------------------------
+# Sources: every row becomes +1 in one or two buckets
+# ---------------------------------------------------------------------------
+
+def _likes(rows, deltas: Deltas) -> None:
+    for created_at, post_id, community_id in rows:
+        deltas[(POST, post_id, _hour(created_at))]["likes"] += 1
+        if community_id:
+            deltas[(COMMUNITY, community_id, _hour(created_at))]["likes"] += 1
+
+
+def _comments(rows, deltas: Deltas) -> None:
+    for created_at, post_id, community_id in rows:
+        deltas[(POST, post_id, _hour(created_at))]["comments"] += 1
+        if community_id:
+            deltas[(COMMUNITY, community_id, _hour(created_at))]["comments"] += 1
+
+
+def _members(rows, deltas: Deltas) -> None:
+    for joined_at, community_id in rows:
+        deltas[(COMMUNITY, community_id, _hour(joined_at))]["members"] += 1
+
+
+def _posts(rows, deltas: Deltas) -> None:
+    for created_at, community_id in rows:
+        if community_id:
+            deltas[(COMMUNITY, community_id, _hour(created_at))]["posts"] += 1
+
+
+# source -> (queryset, timestamp field, fields after it, accumulator)
+SOURCES = {
+    "like": (Like.objects.all(), "created_at", ("post_id", "post__community_id"), _likes),
+    "comment": (Comment.objects.all(), "created_at", ("post_id", "post__community_id"), _comments),
+    "membership": (CommunityMembership.objects.all(), "joined_at", ("community_id",), _members),
+    "post": (Post.objects.all(), "created_at", ("community_id",), _posts),
+}
+
+
+# ---------------------------------------------------------------------------
+# Rollup (rollup_trending command)
+# ---------------------------------------------------------------------------
+
+def _apply(deltas: Deltas) -> None:
+    """Add the deltas to TrendingBucket: one read of the touched rows, one bulk update, one bulk insert."""
+
+    by_kind: Dict[str, set] = defaultdict(set)
+    for kind, object_id, _ in deltas:
+        by_kind[kind].add(object_id)
+    hours = {hour for _, _, hour in deltas}
+
+    existing = {}
+    for kind, ids in by_kind.items():
+        for bucket in TrendingBucket.objects.filter(kind=kind, object_id__in=ids, hour__in=hours):
+            existing[(bucket.kind, bucket.object_id, bucket.hour)] = bucket
+
+    changed, created = [], []
+    for key, counts in deltas.items():
+        bucket = existing.get(key)
+        if bucket is None:
+            kind, object_id, hour = key
+            created.append(TrendingBucket(kind=kind, object_id=object_id, hour=hour, **counts))
+            continue
+        for field, delta in counts.items():
+            setattr(bucket, field, getattr(bucket, field) + delta)
+        changed.append(bucket)
+
+    TrendingBucket.objects.bulk_update(
+        changed, ["likes", "comments", "members", "posts"], batch_size=_BULK_BATCH_SIZE
+    )
+    TrendingBucket.objects.bulk_create(created, batch_size=_BULK_BATCH_SIZE)
+
+
+def rollup_source(source: str, until: datetime, since: datetime) -> int:
+    """Fold the source's rows after its watermark into buckets; returns the number of rows read.
+
+    Rows are read in (timestamp, id) order and the watermark is the last (timestamp, id)
+    folded, so a row is counted once its timestamp is older than `until`, whatever its id:
+    a row that was still inside the lag when a newer id was folded is not skipped. Every
+    batch and the watermark move in one transaction, so a crash never counts a row twice.
+    A row whose timestamp is already behind the watermark when it commits (older than
+    TRENDING_ROLLUP_LAG) is not counted. Rows older than the window are not read.
+    """
+
+    queryset, ts_field, fields, accumulate = SOURCES[source]
+    total = 0
+    while True:
+        with transaction.atomic():
+            watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(source=source)
+            after = Q()
+            if watermark.last_ts is not None:
+                after = Q(**{f"{ts_field}__gt": watermark.last_ts}) | Q(
+                    **{ts_field: watermark.last_ts, "id__gt": watermark.last_id}
+                )
+            rows = list(
+                queryset.filter(after, **{f"{ts_field}__gte": since, f"{ts_field}__lt": until})
+                .order_by(ts_field, "id")
+                .values_list("id", ts_field, *fields)[:TRENDING_ROLLUP_BATCH]
+            )
+            if not rows:
+                return total
+
+            deltas: Deltas = defaultdict(Counter)
+            accumulate((row[1:] for row in rows), deltas)
+            _apply(deltas)
+
+            watermark.last_id, watermark.last_ts = rows[-1][0], rows[-1][1]
+            watermark.save(update_fields=["last_id", "last_ts", "updated_at"])
+        total += len(rows)
+
+
+def rollup(now: Optional[datetime] = None) -> Dict[str, int]:
+    now = now or timezone.now()
+    until = now - timedelta(seconds=TRENDING_ROLLUP_LAG)
+    since = _hour(now - timedelta(hours=TRENDING_WINDOW_HOURS))
+    return {source: rollup_source(source, until, since) for source in SOURCES}
+
+
+def _weight(kind: str, likes: int, comments: int, members: int, posts: int) -> float:
+    if kind == POST:
+        return likes + 2 * comments
+    return 3 * members + 2 * posts + likes + comments
+
+
+def recompute(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Drop buckets that left the window and replace the materialized top lists.
+
+    score = Σ weight · 2^(-age / half-life) over the buckets of the window.
+    """
+
+    now = now or timezone.now()
+    since = _hour(now - timedelta(hours=TRENDING_WINDOW_HOURS))
+    TrendingBucket.objects.filter(hour__lt=since).delete()
+
+    scores: Dict[str, Dict[int, float]] = {POST: defaultdict(float), COMMUNITY: defaultdict(float)}
+    for kind, object_id, hour, likes, comments, members, posts in TrendingBucket.objects.values_list(
+        "kind", "object_id", "hour", "likes", "comments", "members", "posts"
+    ):
+        age_hours = max((now - hour).total_seconds() / 3600.0, 0.0)
+        decay = 0.5 ** (age_hours / TRENDING_HALF_LIFE_HOURS)
+        scores[kind][object_id] += _weight(kind, likes, comments, members, posts) * decay
+
+    items = []
+    for kind, by_id in scores.items():
+        best = heapq.nlargest(TRENDING_STORED, ((score, object_id) for object_id, score in by_id.items()))
+        items.extend(
+            TrendingItem(kind=kind, object_id=object_id, rank=rank, score=score, computed_at=now)
+            for rank, (score, object_id) in enumerate(best, start=1)
+        )
+
+    with transaction.atomic():
+        TrendingItem.objects.all().delete()
+        TrendingItem.objects.bulk_create(items)
+    return {kind: sum(1 for item in items if item.kind == kind) for kind in scores}
+
+
+# ---------------------------------------------------------------------------
+# Request path
+# ---------------------------------------------------------------------------
+
+def _resolve(queryset, ids: Iterable[int]) -> List:
+    ids = list(ids)
+    by_id = queryset.in_bulk(ids)
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def for_widget(limit: int = TRENDING_SHOWN) -> Dict[str, List]:
+    """{"posts": [...], "communities": [...]} from the materialized rows (no aggregation)."""
+
+    ids: Dict[str, List[int]] = {POST: [], COMMUNITY: []}
+    for kind, object_id in TrendingItem.objects.filter(rank__lte=limit).order_by("kind", "rank").values_list(
+        "kind", "object_id"
+    ):
+        ids[kind].append(object_id)
+
+    return {
+        "posts": _resolve(Post.objects.select_related("author", "community"), ids[POST]),
+        "communities": _resolve(Community.objects.all(), ids[COMMUNITY]),
+    }
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import re
+from typing import Set
+
+_WORD_RE = re.compile(r"[0-9a-zа-я]+")
+
+
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm-style trigrams: every word padded as "  word " and cut into 3-char windows."""
+
+    grams: Set[str] = set()
+    for word in _WORD_RE.findall((text or "").lower().replace("ё", "е")):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(shared: int, size_a: int, size_b: int) -> float:
+    """Dice coefficient of two trigram sets: 2|A∩B| / (|A| + |B|), in [0, 1]."""
+
+    total = size_a + size_b
+    return 2 * shared / total if total else 0.0
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, List, Set, TypedDict
+
+from core.models import Comment, CommentLike, CommunityMembership, Like, Post
+from core.services import follow_graph
+
+
+class ViewerState(TypedDict):
+    """What the current user has done to the objects on the page (template context)."""
+
+    liked_posts_ids: Set[int]
+    liked_comment_ids: Set[int]
+    following_ids: Set[int]
+    admin_community_ids: Set[int]
+    member_community_ids: Set[int]
+
+
+def empty_state() -> ViewerState:
+    return {
+        "liked_posts_ids": set(),
+        "liked_comment_ids": set(),
+        "following_ids": set(),
+        "admin_community_ids": set(),
+        "member_community_ids": set(),
+    }
+
+
+def _walk(comments: Iterable[Comment]) -> Iterator[Comment]:
+    # comment_tree / tree_children as set up by core.services.comments
+    for c in comments:
+        yield c
+        yield from _walk(getattr(c, "tree_children", ()))
+
+
+def resolve(
+    user: Any,
+    posts: Iterable[Post] = (),
+    comments: Iterable[Comment] = (),
+    community_ids: Iterable[int] = (),
+    users: Iterable[Any] = (),
+) -> ViewerState:
+    """Viewer state scoped to what is being rendered.
+
+    Every lookup is filtered by the ids on the page, so the cost depends on the page
+    size and not on how many likes/follows the user has ever made. Resolve once per
+    request for all posts/comments and pass the result down to every render.
+    """
+
+    state = empty_state()
+    if not user.is_authenticated:
+        return state
+
+    posts = list(posts)
+    page_comments: List[Comment] = list(_walk(comments))
+    for p in posts:
+        page_comments.extend(_walk(getattr(p, "comment_tree", ())))
+
+    post_ids = {p.id for p in posts}
+    author_ids = ({p.author_id for p in posts} | {u.id for u in users}) - {user.id}
+    comment_ids = {c.id for c in page_comments}
+    communities = {p.community_id for p in posts if p.community_id} | set(community_ids)
+
+    if post_ids:
+        state["liked_posts_ids"] = set(
+            Like.objects.filter(user=user, post_id__in=post_ids).values_list("post_id", flat=True)
+        )
+    if comment_ids:
+        state["liked_comment_ids"] = set(
+            CommentLike.objects.filter(user=user, comment_id__in=comment_ids).values_list("comment_id", flat=True)
+        )
+    if author_ids:
+        state["following_ids"] = follow_graph.following_among(user.id, author_ids)
+    if communities:
+        for community_id, is_admin in CommunityMembership.objects.filter(
+            user=user, community_id__in=communities
+        ).values_list("community_id", "is_admin"):
+            state["member_community_ids"].add(community_id)
+            if is_admin:
+                state["admin_community_ids"].add(community_id)
+
+    return state
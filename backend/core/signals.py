@@ -4,15 +4,33 @@ from typing import Any, Dict
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.template.loader import render_to_string
 from django.test.client import RequestFactory
-from django.db.models import F
+from django.db.models import F, QuerySet
 from django.db import transaction
 
 from core.consumers import user_group_name
-from core.models import Chat, ChatMember, ChatMessage
+from core.models import (
+    Chat,
+    ChatMember,
+    ChatMessage,
+    Comment,
+    CommentLike,
+    Community,
+    CommunityMembership,
+    Follow,
+    Hashtag,
+    Like,
+    Mention,
+    Post,
+    PostAttachment,
+    PostHashtag,
+    SearchPosting,
+    User,
+)
+from core.services import counters, duplicates, follow_graph, fragments, search, tags, timeline
 from core.services.messages import build_threads_for_user, get_other_user_for_dm, get_unread_total
 
 _rf = RequestFactory()
@@ -114,3 +132,293 @@ def chat_message_created_notify(sender, instance: ChatMessage, created: bool, **
             _send_to_user(user.id, payload)
 
     transaction.on_commit(_notify)
+
+
+# ---------------------------------------------------------------------------
+# Home timeline (fan-out-on-write)
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Post)
+def post_created_fan_out(sender, instance: Post, created: bool, **kwargs: Any) -> None:
+    """Deliver a new post into the home timelines of followers and community members."""
+
+    if not created:
+        return
+    transaction.on_commit(lambda: timeline.fan_out_post(instance))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created_backfill(sender, instance: Follow, created: bool, **kwargs: Any) -> None:
+    if created:
+        timeline.backfill_author(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted_drop(sender, instance: Follow, **kwargs: Any) -> None:
+    timeline.drop_author(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=CommunityMembership)
+def membership_created_backfill(sender, instance: CommunityMembership, created: bool, **kwargs: Any) -> None:
+    if created:
+        timeline.backfill_community(instance.user_id, instance.community_id)
+
+
+@receiver(post_delete, sender=CommunityMembership)
+def membership_deleted_drop(sender, instance: CommunityMembership, **kwargs: Any) -> None:
+    timeline.drop_community(instance.user_id, instance.community_id)
+
+
+# ---------------------------------------------------------------------------
+# Denormalized like/comment counters
+# ---------------------------------------------------------------------------
+
+def _origin_model(kwargs: Dict[str, Any]):
+    """Model whose deletion triggered this cascade (Django passes origin to post_delete)."""
+
+    origin = kwargs.get("origin")
+    if isinstance(origin, QuerySet):
+        return origin.model
+    return type(origin) if origin is not None else None
+
+
+@receiver(post_save, sender=Like)
+def like_created_count(sender, instance: Like, created: bool, **kwargs: Any) -> None:
+    if created:
+        post_id = instance.post_id
+        transaction.on_commit(lambda: counters.bump_post(post_id, likes=1))
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted_count(sender, instance: Like, **kwargs: Any) -> None:
+    if _origin_model(kwargs) is Post:
+        return  # the post itself is going away
+    post_id = instance.post_id
+    transaction.on_commit(lambda: counters.bump_post(post_id, likes=-1))
+
+
+@receiver(post_save, sender=Comment)
+def comment_created_count(sender, instance: Comment, created: bool, **kwargs: Any) -> None:
+    if not created:
+        return
+    post_id, parent_id = instance.post_id, instance.parent_id
+
+    def _bump() -> None:
+        counters.bump_post(post_id, comments=1, top_comments=0 if parent_id else 1)
+        if parent_id:
+            counters.bump_comment(parent_id, replies=1)
+
+    transaction.on_commit(_bump)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted_count(sender, instance: Comment, **kwargs: Any) -> None:
+    if _origin_model(kwargs) is Post:
+        return
+    post_id, parent_id = instance.post_id, instance.parent_id
+
+    def _bump() -> None:
+        counters.bump_post(post_id, comments=-1, top_comments=0 if parent_id else -1)
+        if parent_id:
+            counters.bump_comment(parent_id, replies=-1)
+
+    transaction.on_commit(_bump)
+
+
+@receiver(post_save, sender=CommentLike)
+def comment_like_created_count(sender, instance: CommentLike, created: bool, **kwargs: Any) -> None:
+    if created:
+        comment_id = instance.comment_id
+        transaction.on_commit(lambda: counters.bump_comment(comment_id, likes=1))
+
+
+@receiver(post_delete, sender=CommentLike)
+def comment_like_deleted_count(sender, instance: CommentLike, **kwargs: Any) -> None:
+    if _origin_model(kwargs) in (Post, Comment):
+        return  # the liked comment is deleted as well
+    comment_id = instance.comment_id
+    transaction.on_commit(lambda: counters.bump_comment(comment_id, likes=-1))
+
+
+@receiver(post_save, sender=CommunityMembership)
+def membership_created_count(sender, instance: CommunityMembership, created: bool, **kwargs: Any) -> None:
+    if created:
+        community_id = instance.community_id
+        transaction.on_commit(lambda: counters.bump_community_members(community_id, 1))
+
+
+@receiver(post_delete, sender=CommunityMembership)
+def membership_deleted_count(sender, instance: CommunityMembership, **kwargs: Any) -> None:
+    if _origin_model(kwargs) is Community:
+        return
+    community_id = instance.community_id
+    transaction.on_commit(lambda: counters.bump_community_members(community_id, -1))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created_count(sender, instance: Follow, created: bool, **kwargs: Any) -> None:
+    if created:
+        follower_id, following_id = instance.follower_id, instance.following_id
+        transaction.on_commit(lambda: counters.bump_follow(follower_id, following_id, 1))
+        transaction.on_commit(lambda: follow_graph.publish(follower_id, following_id, True))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted_count(sender, instance: Follow, **kwargs: Any) -> None:
+    # при удалении пользователя строка одной из сторон уже исчезла — UPDATE её просто не найдёт
+    follower_id, following_id = instance.follower_id, instance.following_id
+    transaction.on_commit(lambda: counters.bump_follow(follower_id, following_id, -1))
+    transaction.on_commit(lambda: follow_graph.publish(follower_id, following_id, False))
+
+
+@receiver(post_save, sender=Post)
+def author_post_created_count(sender, instance: Post, created: bool, **kwargs: Any) -> None:
+    if created:
+        author_id = instance.author_id
+        transaction.on_commit(lambda: counters.bump_user_posts(author_id, 1))
+
+
+@receiver(post_delete, sender=Post)
+def author_post_deleted_count(sender, instance: Post, **kwargs: Any) -> None:
+    if _origin_model(kwargs) is User:
+        return
+    author_id = instance.author_id
+    transaction.on_commit(lambda: counters.bump_user_posts(author_id, -1))
+
+
+@receiver(post_save, sender=Post)
+def community_post_created_count(sender, instance: Post, created: bool, **kwargs: Any) -> None:
+    if created and instance.community_id:
+        community_id, created_at = instance.community_id, instance.created_at
+        transaction.on_commit(lambda: counters.community_post_added(community_id, created_at))
+
+
+@receiver(post_delete, sender=Post)
+def community_post_deleted_count(sender, instance: Post, **kwargs: Any) -> None:
+    if instance.community_id:
+        community_id = instance.community_id
+        transaction.on_commit(lambda: counters.community_post_removed(community_id))
+
+
+# ---------------------------------------------------------------------------
+# Кэш фрагментов карточек постов (core/services/fragments.py)
+# Версия меняется после коммита: иначе параллельный запрос может успеть
+# закэшировать старый текст под новой версией.
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Post)
+def post_saved_invalidate_fragments(sender, instance: Post, created: bool, **kwargs: Any) -> None:
+    if created:
+        return
+    post_id = instance.id
+    transaction.on_commit(lambda: fragments.invalidate(post_id))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted_forget_fragments(sender, instance: Post, **kwargs: Any) -> None:
+    post_id = instance.id
+    transaction.on_commit(lambda: fragments.forget(post_id))
+
+
+@receiver(post_save, sender=PostAttachment)
+@receiver(post_delete, sender=PostAttachment)
+def attachment_changed_invalidate_fragments(sender, instance: PostAttachment, **kwargs: Any) -> None:
+    if _origin_model(kwargs) is Post:
+        return  # the whole post is being deleted
+    post_id = instance.post_id
+    transaction.on_commit(lambda: fragments.invalidate(post_id))
+
+
+# ---------------------------------------------------------------------------
+# Поисковый индекс (core/services/search.py)
+# ---------------------------------------------------------------------------
+
+def _touches(kwargs: Dict[str, Any], fields: set) -> bool:
+    update_fields = kwargs.get("update_fields")
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver(post_save, sender=Post)
+def post_saved_index(sender, instance: Post, created: bool, **kwargs: Any) -> None:
+    if created or _touches(kwargs, {"text"}):
+        transaction.on_commit(lambda: search.index_post(instance))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted_unindex(sender, instance: Post, **kwargs: Any) -> None:
+    post_id = instance.id
+    transaction.on_commit(lambda: search.remove_document(SearchPosting.KIND_POST, post_id))
+
+
+@receiver(post_save, sender=User)
+def user_saved_index(sender, instance: User, created: bool, **kwargs: Any) -> None:
+    # login() saves only last_login — no need to touch the index
+    if created or _touches(kwargs, {"username", "display_name", "bio"}):
+        transaction.on_commit(lambda: search.index_user(instance))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted_unindex(sender, instance: User, **kwargs: Any) -> None:
+    user_id = instance.id
+    transaction.on_commit(lambda: search.remove_document(SearchPosting.KIND_USER, user_id))
+
+
+@receiver(post_save, sender=Community)
+def community_saved_index(sender, instance: Community, created: bool, **kwargs: Any) -> None:
+    if created or _touches(kwargs, {"name", "slug", "description"}):
+        transaction.on_commit(lambda: search.index_community(instance))
+
+
+@receiver(post_delete, sender=Community)
+def community_deleted_unindex(sender, instance: Community, **kwargs: Any) -> None:
+    community_id = instance.id
+    transaction.on_commit(lambda: search.remove_document(SearchPosting.KIND_COMMUNITY, community_id))
+
+
+# ---------------------------------------------------------------------------
+# Сигнатуры почти-дублей (core/services/duplicates.py); удаляются каскадом
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Post)
+def post_saved_sketch(sender, instance: Post, created: bool, **kwargs: Any) -> None:
+    if created or _touches(kwargs, {"text"}):
+        transaction.on_commit(lambda: duplicates.remember_post(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved_sketch(sender, instance: Comment, created: bool, **kwargs: Any) -> None:
+    if created or _touches(kwargs, {"text"}):
+        transaction.on_commit(lambda: duplicates.remember_comment(instance))
+
+
+# ---------------------------------------------------------------------------
+# Хэштеги и упоминания (core/services/tags.py)
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Post)
+def post_saved_tags(sender, instance: Post, created: bool, **kwargs: Any) -> None:
+    if created or _touches(kwargs, {"text"}):
+        transaction.on_commit(lambda: tags.index_post(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved_mentions(sender, instance: Comment, created: bool, **kwargs: Any) -> None:
+    if created or _touches(kwargs, {"text"}):
+        transaction.on_commit(lambda: tags.index_comment(instance))
+
+
+@receiver(post_delete, sender=Mention)
+def mention_deleted_sync(sender, instance: Mention, **kwargs: Any) -> None:
+    # только удаление комментария: пост уносит свои MentionedPost сам, правки текста синхронизирует tags
+    if _origin_model(kwargs) is not Comment:
+        return
+    post_id, user_id = instance.post_id, instance.user_id
+    transaction.on_commit(lambda: tags.mention_removed(post_id, user_id))
+
+
+@receiver(post_delete, sender=PostHashtag)
+def post_hashtag_deleted_count(sender, instance: PostHashtag, **kwargs: Any) -> None:
+    if _origin_model(kwargs) is Hashtag:
+        return
+    tag_id = instance.tag_id
+    transaction.on_commit(lambda: tags.tag_unlinked(tag_id))
@@ -1,6 +1,6 @@
 (function () {
   function initMembers() {
-    const btn = document.getElementById("members-load-more");
+    const btn = document.getElementById("community-members-more");
     const list = document.getElementById("community-members-list");
     let loading = false;
 
@@ -8,12 +8,13 @@
       if (!btn || !list || loading) return;
       loading = true;
 
+      // cursor — непрозрачная граница (is_admin, joined_at, id) следующей страницы
       const url = btn.dataset.url;
-      let offset = parseInt(btn.dataset.offset || "0", 10);
-      if (!url) { loading = false; return; }
+      const cursor = btn.dataset.cursor || "";
+      if (!url || !cursor) { loading = false; return; }
 
       try {
-        const resp = await fetch(url + "?offset=" + offset, {
+        const resp = await fetch(url + "?cursor=" + encodeURIComponent(cursor), {
           headers: { "X-Requested-With": "XMLHttpRequest" },
           credentials: "same-origin",
           cache: "no-store",
@@ -23,8 +24,8 @@
         const data = await resp.json();
         if (data.html) list.insertAdjacentHTML("beforeend", data.html);
 
-        btn.dataset.offset = String(data.next_offset || (offset + 7));
-        if (!data.has_more) btn.remove();
+        btn.dataset.cursor = data.next_cursor || "";
+        if (!data.has_more || !data.next_cursor) btn.remove();
       } catch (e) {
         console.error("members load error:", e);
       } finally {
@@ -825,11 +825,15 @@ function removeFile(index) {
         if (!btn) return;
 
         const hiddenCount = items.filter(el => el.classList.contains("batch-hidden")).length;
-        if (hiddenCount <= 0) {
-            btn.remove();
-        } else {
+        if (hiddenCount > 0) {
             btn.textContent = "Показать ещё (" + hiddenCount + ")";
             placeCommentsMoreButton(body, btn);
+        } else if (body.dataset.nextCursor) {
+            // локально всё показано, но на сервере есть ещё
+            btn.textContent = "Показать ещё";
+            placeCommentsMoreButton(body, btn);
+        } else {
+            btn.remove();
         }
     }
 
@@ -840,14 +844,61 @@ function removeFile(index) {
         if (!btn) return;
 
         const hiddenCount = items.filter(el => el.classList.contains("batch-hidden")).length;
-        if (hiddenCount <= 0) {
-            btn.remove();
-        } else {
+        if (hiddenCount > 0) {
             btn.textContent = "Показать ещё (" + hiddenCount + ")";
             placeRepliesMoreButton(block, btn);
+        } else if (block.dataset.nextCursor) {
+            btn.textContent = "Показать ещё ответы";
+            placeRepliesMoreButton(block, btn);
+        } else {
+            btn.remove();
         }
     }
 
+    // ===== Догрузка комментариев/ответов с сервера (курсор в data-next-cursor) =====
+    function appendCommentsPage(container, html) {
+        const tpl = document.createElement("template");
+        tpl.innerHTML = html;
+
+        // уже показанные (например, только что отправленный ответ) не дублируем
+        Array.from(tpl.content.children).forEach(function (el) {
+            const id = el.dataset ? el.dataset.commentId : null;
+            if (id && container.querySelector('.comment-item[data-comment-id="' + id + '"]')) el.remove();
+        });
+
+        // страница приходит от новых к старым — добавляем после уже показанных
+        const items = directChildren(container, ".comment-item");
+        const last = items[items.length - 1];
+        if (last) last.after(tpl.content);
+        else container.prepend(tpl.content);
+    }
+
+    function loadCommentsPage(container) {
+        if (!container || !container.dataset.commentsUrl) return Promise.resolve();
+        if (container.dataset.loading === "1") return Promise.resolve();
+
+        const url = new URL(container.dataset.commentsUrl, window.location.href);
+        if (container.dataset.nextCursor) url.searchParams.set("cursor", container.dataset.nextCursor);
+
+        container.dataset.loading = "1";
+        return fetch(url.toString(), {
+            headers: {
+                "X-Requested-With": "XMLHttpRequest",
+            },
+        })
+            .then(r => r.json())
+            .then(function (data) {
+                if (!data || !data.success) return;
+                appendCommentsPage(container, data.html || "");
+                container.dataset.nextCursor = data.has_next && data.next_page ? data.next_page : "";
+                initPostTextCollapsing(container);
+            })
+            .catch(err => console.error("load comments error:", err))
+            .finally(function () {
+                container.dataset.loading = "0";
+            });
+    }
+
     function initCommentsBatchingForBody(body) {
         if (!body) return;
 
@@ -860,7 +911,7 @@ function removeFile(index) {
         }
 
         const items = directChildren(body, ".comment-item");
-        if (items.length <= COMMENTS_BATCH_SIZE) {
+        if (items.length <= COMMENTS_BATCH_SIZE && !body.dataset.nextCursor) {
             body.dataset.batchInited = "1";
             return;
         }
@@ -873,10 +924,10 @@ function removeFile(index) {
         const btn = document.createElement("button");
         btn.type = "button";
         btn.className = "comments-more-btn";
-        btn.textContent = "Показать ещё (" + (items.length - COMMENTS_BATCH_SIZE) + ")";
 
         placeCommentsMoreButton(body, btn);
         body.dataset.batchInited = "1";
+        updateCommentsMoreButton(body);
     }
 
     function initRepliesBatchingForBlock(block) {
@@ -891,7 +942,7 @@ function removeFile(index) {
         }
 
         const items = directChildren(block, ".comment-item");
-        if (items.length <= REPLIES_BATCH_SIZE) {
+        if (items.length <= REPLIES_BATCH_SIZE && !block.dataset.nextCursor) {
             block.dataset.batchInited = "1";
             return;
         }
@@ -903,10 +954,10 @@ function removeFile(index) {
         const btn = document.createElement("button");
         btn.type = "button";
         btn.className = "replies-more-btn";
-        btn.textContent = "Показать ещё (" + (items.length - REPLIES_BATCH_SIZE) + ")";
 
         placeRepliesMoreButton(block, btn);
         block.dataset.batchInited = "1";
+        updateRepliesMoreButton(block);
     }
 
     // ==========================
@@ -1102,7 +1153,10 @@ function removeFile(index) {
             ajaxPost(form.action, form)
                 .then(r => r.json())
                 .then(data => {
-                    if (!data.html) return;
+                    if (!data.html) {
+                        if (data.message) alert(data.message);
+                        return;
+                    }
 
                     const pid = data.post_id || postId;
                     const body = document.querySelector('.comments-body[data-post-id="' + pid + '"]');
@@ -1157,7 +1211,10 @@ function removeFile(index) {
             ajaxPost(form.action, form)
                 .then(r => r.json())
                 .then(data => {
-                    if (!data.html) return;
+                    if (!data.html) {
+                        if (data.message) alert(data.message);
+                        return;
+                    }
 
                     const pid = data.post_id || postId;
                     const pId = data.parent_id || parentId;
@@ -1460,6 +1517,10 @@ if (attToggle) {
 
             const items = directChildren(body, ".comment-item");
             const hidden = items.filter(el => el.classList.contains("batch-hidden"));
+            if (!hidden.length && body.dataset.nextCursor) {
+                loadCommentsPage(body).then(() => updateCommentsMoreButton(body));
+                return;
+            }
             const toShow = hidden.slice(0, COMMENTS_BATCH_SIZE);
             toShow.forEach(el => el.classList.remove("batch-hidden"));
             updateCommentsMoreButton(body);
@@ -1474,6 +1535,10 @@ if (attToggle) {
 
             const items = directChildren(block, ".comment-item");
             const hidden = items.filter(el => el.classList.contains("batch-hidden"));
+            if (!hidden.length && block.dataset.nextCursor) {
+                loadCommentsPage(block).then(() => updateRepliesMoreButton(block));
+                return;
+            }
             const toShow = hidden.slice(0, REPLIES_BATCH_SIZE);
             toShow.forEach(el => el.classList.remove("batch-hidden"));
             updateRepliesMoreButton(block);
@@ -1567,7 +1632,12 @@ if (attToggle) {
             if (block) {
                 block.classList.toggle("hidden");
                 const isHidden = block.classList.contains("hidden");
-                if (!isHidden) {
+                if (!isHidden && block.dataset.lazy === "1") {
+                    // ответы не пришли с карточкой — первая страница с сервера
+                    block.dataset.lazy = "0";
+                    ensureNewestFirstReplies(block);
+                    loadCommentsPage(block).then(() => initRepliesBatchingForBlock(block));
+                } else if (!isHidden) {
                     // Инициализируем свёртку текста + батчинг только после открытия ответов
                     initPostTextCollapsing(block);
                     initRepliesBatchingForBlock(block);
@@ -1660,7 +1730,9 @@ if (attToggle) {
 
         let isLoading = false;
         let hasNext = container.dataset.hasNext === "1";
-        let nextPage = parseInt(container.dataset.nextPage || "0", 10) || 0;
+        // next_page — непрозрачный курсор (created_at, id) следующей страницы
+        let nextPage = container.dataset.nextPage || "";
+        if (nextPage === "0") nextPage = "";
 
         const loader = document.getElementById("feed-loading");
 
@@ -1672,7 +1744,7 @@ if (attToggle) {
 
             try {
                 const url = new URL(window.location.href);
-                url.searchParams.set("page", String(nextPage));
+                url.searchParams.set("cursor", String(nextPage));
 
                 const response = await fetch(url.toString(), {
                     headers: {
@@ -1685,18 +1757,21 @@ if (attToggle) {
                 }
 
                 const data = await response.json();
-                if (!data || !data.success || !data.html) {
+                if (!data || !data.success) {
                     return;
                 }
 
-                // Добавляем новые посты в конец списка
-                container.insertAdjacentHTML("beforeend", data.html);
+                // Пустая страница (например, всё уже показано) — курсор всё равно двигаем
+                if (data.html) {
+                    // Добавляем новые посты в конец списка
+                    container.insertAdjacentHTML("beforeend", data.html);
 
-                // Инициализируем функционал для новых постов
-                initPostTextCollapsing(container);
-                initVideoPlayers(container);
-                initAudioPlayers(container);
-                initSmartGalleries(container);
+                    // Инициализируем функционал для новых постов
+                    initPostTextCollapsing(container);
+                    initVideoPlayers(container);
+                    initAudioPlayers(container);
+                    initSmartGalleries(container);
+                }
 
                 hasNext = !!data.has_next;
                 if (hasNext && data.next_page) {
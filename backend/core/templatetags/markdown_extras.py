@@ -1,12 +1,11 @@
-import markdown
 from django import template
 from django.utils.safestring import mark_safe
 
+from core.services.markup import render_markdown
+
 register = template.Library()
 
 @register.filter
 def md(text):
-    return mark_safe(markdown.markdown(
-        text,
-        extensions=["fenced_code", "codehilite"]
-    ))
+    # Посты хранят готовый HTML (Post.rendered_text); фильтр — для прочих мест
+    return mark_safe(render_markdown(text))
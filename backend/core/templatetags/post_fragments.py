@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.services import fragments
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_body(post):
+    """Текст + вложения поста из кэша фрагментов (core/services/fragments.py)."""
+    return mark_safe(fragments.render_body(post))
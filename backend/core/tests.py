@@ -1,3 +1,727 @@
-from django.test import TestCase
+import math
+import re
+import threading
+from collections import Counter
+from datetime import timedelta
+from difflib import SequenceMatcher
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.constants import (
+    COMMENT_MAX_DEPTH,
+    FOLLOW_SUGGESTIONS_COMMUNITY_WEIGHT,
+    POST_COUNTER_FOLD_AFTER,
+    SEEN_FILTER_CAPACITY,
+    TRENDING_HALF_LIFE_HOURS,
+)
+from core.models import (
+    Comment,
+    Community,
+    CommunityMembership,
+    Follow,
+    Like,
+    Post,
+    PostCounterShard,
+    PostViewSketch,
+    SearchPosting,
+    TextSketch,
+    TimelineEntry,
+    TrendingBucket,
+    TrendingItem,
+    User,
+)
+from core.services import (
+    communities,
+    community_recs,
+    counters,
+    duplicates,
+    follow_graph,
+    post_views,
+    ranking,
+    search,
+    seen,
+    suggestions,
+    trending,
+)
+from core.services.follow_graph import FollowGraph
+from core.services.markup import render_markdown
+from core.services.tags import extract
+from core.services.tokenizer import stem, tokenize
+
+
+class PostCounterTests(TestCase):
+    """Sharded like/comment counters (core/services/counters.py)."""
+
+    def setUp(self):
+        self.post = Post.objects.create(author=User.objects.create_user("alice"), text="пост")
+
+    def test_pending_shards_are_counted_and_folded(self):
+        for _ in range(5):
+            counters.bump_post(self.post.id, likes=1)
+        counters.bump_post(self.post.id, likes=-1, comments=1, top_comments=1)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(counters.post_counts(self.post.id)["likes_count"], 4)
+
+        self.assertEqual(counters.fold_post_shards(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count, self.post.top_comments_count), (4, 1, 1))
+        self.assertFalse(PostCounterShard.objects.exists())
+
+    def test_fold_thread_is_woken_after_enough_deltas(self):
+        wake = threading.Event()
+        running = mock.Mock(is_alive=mock.Mock(return_value=True))
+        with mock.patch.multiple(counters, _wake=wake, _folder=running, _bumps=0):
+            for _ in range(POST_COUNTER_FOLD_AFTER - 1):
+                counters._note_bump()
+            self.assertFalse(wake.is_set())
+            counters._note_bump()
+            self.assertTrue(wake.is_set())
+
+
+
+class CommentTreeTests(TestCase):
+    """Materialized comment paths capped at COMMENT_MAX_DEPTH (Comment.save, add_reply)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="x")
+        self.post = Post.objects.create(author=self.user, text="пост")
+        self.chain = []
+        parent = None
+        for i in range(COMMENT_MAX_DEPTH + 1):
+            parent = Comment.objects.create(post=self.post, author=self.user, parent=parent, text=f"уровень {i}")
+            self.chain.append(parent)
+
+    def test_reply_below_max_depth_keeps_parent(self):
+        parent = self.chain[COMMENT_MAX_DEPTH - 1]
+        reply = Comment.objects.create(post=self.post, author=self.user, parent=parent, text="ответ")
+        self.assertEqual((reply.parent_id, reply.depth), (parent.id, COMMENT_MAX_DEPTH))
+        self.assertEqual(reply.path_ids, [c.id for c in self.chain[:COMMENT_MAX_DEPTH]] + [reply.id])
+
+    def test_reply_at_max_depth_moves_to_grandparent(self):
+        deepest = self.chain[COMMENT_MAX_DEPTH]
+        self.assertEqual(deepest.depth, COMMENT_MAX_DEPTH)
+        with CaptureQueriesContext(connection) as queries:
+            reply = Comment.objects.create(post=self.post, author=self.user, parent=deepest, text="ответ")
+        # родитель родителя не читается: его id и путь уже есть у родителя
+        self.assertFalse([q for q in queries if q["sql"].startswith("SELECT") and '"core_comment"' in q["sql"]])
+
+        reply = Comment.objects.get(id=reply.id)
+        self.assertEqual(reply.parent_id, self.chain[COMMENT_MAX_DEPTH - 1].id)
+        self.assertEqual(reply.depth, COMMENT_MAX_DEPTH)
+        self.assertEqual(reply.path_ids, [c.id for c in self.chain[:COMMENT_MAX_DEPTH]] + [reply.id])
+
+    def test_add_reply_reports_effective_parent(self):
+        self.client.login(username="alice", password="x")
+        deepest = self.chain[COMMENT_MAX_DEPTH]
+        data = self.client.post(
+            reverse("add_reply", args=[deepest.id]),
+            {"text": "ответ на самой глубине"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        ).json()
+        self.assertEqual(data["parent_id"], self.chain[COMMENT_MAX_DEPTH - 1].id)
+        self.assertEqual(Comment.objects.get(id=data["comment_id"]).depth, COMMENT_MAX_DEPTH)
+
+
+
+class TokenizerTests(SimpleTestCase):
+    """Index terms: Snowball Russian stems, stopwords out, ё folded (core/services/tokenizer.py)."""
+
+    def test_russian_stems(self):
+        cases = {
+            "книги": "книг",
+            "книгами": "книг",
+            "красивая": "красив",
+            "красивый": "красив",
+            "программированию": "программирован",
+            "котиков": "котик",
+            "нежность": "нежност",
+            "важнейший": "важн",
+            "читали": "чита",
+        }
+        self.assertEqual({word: stem(word) for word in cases}, cases)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Ёжики и КОТЫ в the доме, x"), ["ежик", "кот", "дом"])
+
+
+class SearchTests(TestCase):
+    """BM25 over the inverted index (core/services/search.py)."""
+
+    POST = SearchPosting.KIND_POST
+
+    def setUp(self):
+        cache.clear()
+        texts = {
+            1: "Питон, питон и Django",
+            2: "Питон — это язык, на котором пишут сайты, скрипты и игры",
+            3: "Django и фреймворки",
+        }
+        for object_id, text in texts.items():
+            search.index_document(self.POST, object_id, Counter(tokenize(text)))
+
+    def test_bm25_score(self):
+        # N=3, df(питон)=2, длины 3/7/2 (средняя 4); документ 1: tf=2, длина 3
+        idf = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+        expected = idf * 2 * (search.K1 + 1) / (2 + search.K1 * (1 - search.B + search.B * 3 / 4))
+        scores = search.score(self.POST, ["питон"])
+        self.assertEqual(set(scores), {1, 2})
+        self.assertAlmostEqual(scores[1], expected)
+
+    def test_ranking_and_pages(self):
+        # словоформа запроса находит документы по основе; больше вхождений в коротком тексте — выше
+        page, cursor = search.search(self.POST, "питоны", limit=1)
+        self.assertEqual([object_id for object_id, _ in page], [1])
+        page, cursor = search.search(self.POST, "питоны", limit=1, after=cursor)
+        self.assertEqual(([object_id for object_id, _ in page], cursor), ([2], None))
+
+        # оба терма запроса важнее одного
+        page, _ = search.search(self.POST, "django питон", limit=10)
+        self.assertEqual([object_id for object_id, _ in page][0], 1)
+
+    def test_document_frequencies_follow_edits(self):
+        search.index_document(self.POST, 2, Counter(tokenize("про Django")))
+        search.remove_document(self.POST, 3)
+        self.assertEqual(
+            search.document_frequencies(self.POST, ["питон", "django", "фреймворк"]), {"питон": 1, "django": 2}
+        )
+
+    def test_similar_posts(self):
+        # у документа 1 оба терма встречаются дважды (одинаковый idf), поэтому
+        # похожесть = Σ w₁(t)·wᵢ(t) / Σ w₁(t)²; вес — нормированный 1 + ln tf
+        own = search.term_weights(Counter(["питон", "питон", "django"]))
+        self.assertAlmostEqual(sum(w * w for w in own.values()), 1.0)
+        expected = {
+            3: own["django"] / math.sqrt(2),  # django, фреймворк
+            2: own["питон"] / math.sqrt(7),  # питон и ещё шесть термов
+        }
+        page, cursor = search.similar(self.POST, 1, limit=10)
+        self.assertIsNone(cursor)
+        self.assertEqual([object_id for object_id, _ in page], [3, 2])
+        for object_id, value in page:
+            self.assertAlmostEqual(value, expected[object_id], places=5)
+
+        # «фреймворк» есть только в документе 3 и ничего не добавляет
+        self.assertEqual(set(search.similar_scores(self.POST, 3)), {1})
+
+
+
+class CommunityFuzzySearchTests(TestCase):
+    """Typo-tolerant community search (core/services/communities.py).
+
+    The result must match the SequenceMatcher scan it replaced (_full_scan) for every
+    query that shares a trigram with the community it should find.
+    """
+
+    QUERIES = [
+        "ктоты", "котк", "pyton", "фотограыия", "програмирование", "фмузкыа", "втубол",
+        "кулинраия", "шахмтаы", "linx", "джанго", "погода",
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner")
+        for name, description in [
+            ("Программирование", "Сообщество разработчиков: код, архитектура, карьера"),
+            ("Python", "Всё о языке Python и его библиотеках"),
+            ("Котики", "Фото и видео котов"),
+            ("Фотография", "Фотография, обработка, техника съёмки"),
+            ("Музыка", "Новые релизы и обсуждения"),
+            ("Футбол", "Матчи, трансферы, обсуждения"),
+            ("Кулинария", "Рецепты на каждый день"),
+            ("Книги", "Что почитать и обсудить"),
+            ("Дизайн", "UI/UX, графика, типографика"),
+            ("Хайкинг", "Походы и горы"),
+            ("Шахматы", "Партии, задачи, турниры"),
+            ("Linux", "Дистрибутивы, консоль, администрирование"),
+            ("Rust", "Системное программирование на Rust"),
+            ("Психология", "Саморазвитие и отношения"),
+        ]:
+            Community.objects.create(name=name, description=description, created_by=owner)
+
+    def _full_scan(self, query):
+        scored = []
+        for c in Community.objects.all():
+            ns = SequenceMatcher(None, query.lower(), c.name.lower()).ratio()
+            ds = SequenceMatcher(None, query.lower(), c.description.lower()).ratio()
+            if max(ns * 1.25, ds) >= 0.60:
+                scored.append((max(ns * 1.25, ds), ns, ds, c.id))
+        return [community_id for *_, community_id in sorted(scored, reverse=True)]
+
+    def _names(self, ids):
+        names = dict(Community.objects.values_list("id", "name"))
+        return [names[community_id] for community_id in ids]
+
+    def test_typos_find_what_the_scan_found(self):
+        for query in self.QUERIES:
+            with self.subTest(query=query):
+                self.assertEqual(communities.fuzzy_search(query), self._full_scan(query))
+
+    def test_short_typos(self):
+        self.assertEqual(self._names(communities.fuzzy_search("ктоты")), ["Котики"])
+        self.assertEqual(self._names(communities.fuzzy_search("pyton")), ["Python"])
+        # прежний скан добавлял и «Дизайн» (0.68), у которого с запросом нет общих триграмм
+        self.assertEqual(self._names(communities.fuzzy_search("айинг")), ["Хайкинг"])
+        self.assertEqual(communities.fuzzy_search("погода"), [])
+
+    def test_no_shared_trigram_is_not_found(self):
+        # известное ограничение: «нгии» не делит с «книги» ни одной триграммы
+        self.assertTrue(self._full_scan("нгии"))
+        self.assertEqual(communities.fuzzy_search("нгии"), [])
+
+
+
+class CommunityDirectoryTests(TestCase):
+    """Keyset pages of the communities directory (communities.directory_page, communities_view)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner")
+        start = timezone.now() - timedelta(days=30)
+        for i in range(11):
+            c = Community.objects.create(name=f"Сообщество {i}", slug=f"c{i}", created_by=owner)
+            # у трёх одинаковое время последнего поста, у двух — время создания
+            last_post_at = start + timedelta(days=i // 3) if i % 2 else None
+            created_at = start + timedelta(hours=i // 2)
+            Community.objects.filter(id=c.id).update(
+                has_posts=last_post_at is not None, last_post_at=last_post_at, created_at=created_at
+            )
+
+    def _expected(self):
+        rows = list(Community.objects.all())
+        with_posts = sorted((c for c in rows if c.has_posts), key=lambda c: (c.last_post_at, c.created_at, c.id))
+        without = sorted((c for c in rows if not c.has_posts), key=lambda c: (c.created_at, c.id))
+        return [c.id for c in reversed(with_posts)] + [c.id for c in reversed(without)]
+
+    def test_pages_cover_the_directory_once_in_order(self):
+        seen, cursor = [], None
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                page, cursor = communities.directory_page(Community.objects.all(), 3, cursor)
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn("COUNT(", queries[0]["sql"])
+            self.assertNotIn("OFFSET", queries[0]["sql"])
+            seen += [c.id for c in page]
+            if cursor is None:
+                break
+        self.assertEqual(seen, self._expected())
+
+    def test_view_cursor(self):
+        seen, cursor = [], ""
+        while cursor is not None:
+            data = self.client.get(
+                reverse("communities"), {"cursor": cursor}, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+            ).json()
+            seen += re.findall(r'data-href="/communities/(c\d+)/"', data["html"])
+            cursor = data["next_page"]
+        slugs = dict(Community.objects.values_list("id", "slug"))
+        self.assertEqual(seen, [slugs[community_id] for community_id in self._expected()])
+
+    def test_search_results_page_by_rank(self):
+        # совпадение в названии (rank 0) раньше совпадения в описании (rank 2), внутри — порядок каталога
+        for slug in ("c0", "c3", "c6", "c9"):
+            Community.objects.filter(slug=slug).update(name=f"котики {slug}")
+        Community.objects.filter(slug__in=["c1", "c2", "c5", "c7"]).update(description="про котиков")
+        seen, cursor = [], ""
+        while cursor is not None:
+            data = self.client.get(
+                reverse("communities"), {"q": "котик", "cursor": cursor}, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+            ).json()
+            seen += re.findall(r'data-href="/communities/(c\d+)/"', data["html"])
+            cursor = data["next_page"]
+        slugs = [Community.objects.get(id=community_id).slug for community_id in self._expected()]
+        by_name = [slug for slug in slugs if slug in ("c0", "c3", "c6", "c9")]
+        by_description = [slug for slug in slugs if slug in ("c1", "c2", "c5", "c7")]
+        self.assertEqual(seen, by_name + by_description)
+
+class FollowGraphTests(TestCase):
+    """CSR follow graph and the per-process copy kept current by the change log (follow_graph)."""
+
+    EDGES = [(1, 2), (1, 3), (2, 1), (3, 1), (3, 2), (4, 1)]
+
+    def test_rows_and_membership(self):
+        graph = FollowGraph(reversed(self.EDGES))
+        self.assertEqual(graph.following(1), [2, 3])
+        self.assertEqual(graph.followers(1), [2, 3, 4])
+        self.assertEqual(graph.friends(1), [2, 3])
+        self.assertTrue(graph.is_mutual(1, 3))
+        self.assertFalse(graph.is_mutual(3, 2))
+        self.assertEqual(graph.following_among(3, [1, 2, 4, 99]), {1, 2})
+
+        graph.add(2, 3)
+        graph.remove(1, 2)
+        graph.add(1, 2)
+        graph.remove(4, 1)
+        self.assertEqual(graph.following(2), [1, 3])
+        self.assertEqual(graph.followers(1), [2, 3])
+        self.assertEqual((graph.following_count(1), graph.followers_count(3)), (2, 2))
+        self.assertEqual(graph.stats()["edges"], 6)
+
+    def setUp(self):
+        cache.clear()
+        alice, bob, carol = (User.objects.create_user(name) for name in ("alice", "bob", "carol"))
+        self.alice, self.bob, self.carol = alice, bob, carol
+        Follow.objects.create(follower=alice, following=bob)
+        # процесс сервера, но без фоновой загрузки: граф грузим сами
+        loader = mock.Mock(is_alive=mock.Mock(return_value=True))
+        patcher = mock.patch.multiple(follow_graph, _enabled=True, _graph=None, _applied=0, _loader=loader)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_follow_checks_come_from_the_graph(self):
+        self.assertTrue(follow_graph.follows(self.alice.id, self.bob.id))  # ещё не загружен: из таблицы
+        follow_graph.load()
+        self.client.force_login(self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("follow_user", args=["carol"]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("unfollow_user", args=["bob"]))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(follow_graph.following_among(self.alice.id, [self.bob.id, self.carol.id]), {self.carol.id})
+            self.assertFalse(follow_graph.follows(self.alice.id, self.bob.id))
+
+    def test_falls_back_to_follow_on_a_gap_or_a_dropped_log(self):
+        follow_graph.load()
+        Follow.objects.create(follower=self.alice, following=self.carol)
+        follow_graph.publish(self.alice.id, self.carol.id, True)
+        cache.delete(follow_graph._EVENT_KEY.format(cache.get(follow_graph._VERSION_KEY)))
+        with self.assertNumQueries(1):
+            self.assertTrue(follow_graph.follows(self.alice.id, self.carol.id))
+
+        follow_graph.load()
+        follow_graph.reload_everywhere()
+        Follow.objects.filter(follower=self.alice, following=self.bob).delete()
+        follow_graph.publish(self.alice.id, self.bob.id, False)
+        # новый журнал начинается далеко впереди: процесс не проигрывает его поверх старого
+        self.assertIsNone(follow_graph.current())
+        self.assertFalse(follow_graph.follows(self.alice.id, self.bob.id))
+
+
+class FollowSuggestionTests(SimpleTestCase):
+    """Adamic–Adar candidates over follows and shared communities (suggestions.candidates)."""
+
+    def setUp(self):
+        edges = [(1, 2), (1, 3), (2, 1), (2, 3), (2, 4), (2, 5)]
+        edges += [(3, uid) for uid in range(4, 15) if uid != 5]
+        memberships = [(1, 100), (6, 100), (15, 100)]
+        # слишком большое сообщество ничего не даёт
+        memberships += [(uid, 200) for uid in (1, 16, *range(1000, 2000))]
+        self.signals = suggestions.Signals(FollowGraph(edges), memberships)
+
+    def test_ranking(self):
+        found = suggestions.candidates(self.signals, 1, limit=100)
+        # 4 — через обоих друзей; 6 — через друга «на всех» и общее сообщество; 7..14 — поровну, старшие id первыми
+        self.assertEqual([c.user_id for c in found], [4, 6, 5, 14, 13, 12, 11, 10, 9, 8, 7, 15])
+        via_2, via_3 = 1 / math.log(2 + 4), 1 / math.log(2 + 10)
+        community = FOLLOW_SUGGESTIONS_COMMUNITY_WEIGHT / math.log(2 + 3)
+        self.assertEqual(found[0], suggestions.Candidate(4, via_2 + via_3, 2, 0))
+        self.assertAlmostEqual(found[1].score, via_3 + community)
+        self.assertEqual((found[1].mutual_follows, found[1].shared_communities), (1, 1))
+        self.assertAlmostEqual(found[-1].score, community)
+        self.assertEqual([c.user_id for c in suggestions.candidates(self.signals, 1, limit=3)], [4, 6, 5])
+
+
+class CommunityNeighborTests(TestCase):
+    """Cosine neighbors of communities over shared members (community_recs)."""
+
+    # сообщество -> участники (номера пользователей)
+    MEMBERS = {"a": {1, 2, 3, 4}, "b": {1, 2, 3}, "c": set(range(4, 13)), "d": {5, 6}}
+
+    def setUp(self):
+        users = {i: User.objects.create_user(f"u{i}") for i in range(1, 13)}
+        self.users = users
+        self.c = {}
+        for slug, members in self.MEMBERS.items():
+            self.c[slug] = Community.objects.create(name=slug, slug=slug, created_by=users[1])
+            CommunityMembership.objects.bulk_create(
+                [CommunityMembership(community=self.c[slug], user=users[i]) for i in members]
+            )
+        self.matrix = community_recs.Memberships.from_db()
+
+    def test_neighbors_by_cosine(self):
+        c = {slug: community.id for slug, community in self.c.items()}
+        # |A∩B| / sqrt(|A|·|B|): a–b 3/√12, a–c 1/√36; d не пересекается с a
+        self.assertEqual(self.matrix.neighbors(c["a"]), [(c["b"], 3 / math.sqrt(12)), (c["c"], 1 / 6)])
+        self.assertEqual(self.matrix.neighbors(c["c"]), [(c["d"], 2 / math.sqrt(18)), (c["a"], 1 / 6)])
+        self.assertEqual(self.matrix.neighbors(c["a"], k=1), [(c["b"], 3 / math.sqrt(12))])
+
+    def test_recommendations_sum_stored_neighbors(self):
+        community_recs.recompute(self.matrix, community_recs.stale_ids())
+        self.assertEqual(community_recs.stale_ids(), [])
+        # u4 в a и c: b — сосед a, d — сосед c; свои сообщества не предлагаются
+        self.assertEqual(community_recs.for_user(self.users[4]), [self.c["b"], self.c["d"]])
+        self.assertEqual(community_recs.for_user(self.users[1]), [self.c["c"]])
+
+
+class TimelineRankTests(TestCase):
+    """Scores of the ranked home timeline (ranking.rank_users)."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        author, self.reader = User.objects.create_user("author"), User.objects.create_user("reader")
+        self.fresh = Post.objects.create(author=author, text="свежий")
+        self.old = Post.objects.create(author=author, text="старый", likes_count=3)
+        for post, age in ((self.fresh, timedelta(minutes=10)), (self.old, timedelta(hours=10))):
+            TimelineEntry.objects.create(user=self.reader, post=post, created_at=self.now - age)
+
+    def _scores(self):
+        ranking.rank_users([self.reader.id], self.now)
+        return dict(TimelineEntry.objects.values_list("post_id", "score"))
+
+    def test_engagement_and_recency(self):
+        scores = self._scores()
+        self.assertAlmostEqual(
+            scores[self.fresh.id], ranking.score(ranking.recency(self.now - timedelta(minutes=10), self.now))
+        )
+        self.assertAlmostEqual(
+            scores[self.old.id], ranking.score(ranking.recency(self.now - timedelta(hours=10), self.now), likes=3)
+        )
+        self.assertGreater(scores[self.fresh.id], scores[self.old.id])
+
+    def test_likes_still_in_shards_count(self):
+        before = self._scores()[self.fresh.id]
+        counters.bump_post(self.fresh.id, likes=1)
+        counters.bump_post(self.fresh.id, comments=1)
+        self.assertEqual(Post.objects.get(id=self.fresh.id).likes_count, 0)
+        after = self._scores()[self.fresh.id]
+        self.assertGreater(after, before)
+        recency = ranking.recency(self.now - timedelta(minutes=10), self.now)
+        self.assertAlmostEqual(after, ranking.score(recency, likes=1, comments=1))
+
+
+class NearDuplicateTests(TestCase):
+    """MinHash signatures and the LSH lookup of near-duplicate texts (core/services/duplicates.py)."""
+
+    TEXT = "Сегодня ходили в горы, видели орла и целый час сидели у озера, было очень красиво"
+    COPY = "сегодня ходили в горы: видели орла и целый час сидели у озера. Было очень красиво!!"
+    EDITED = "Сегодня ходили в горы, видели орла и целый час сидели у озера, было красиво"
+    OTHER = "Купил новый велосипед, завтра поеду кататься по набережной с друзьями"
+
+    @staticmethod
+    def _jaccard(a: str, b: str) -> float:
+        def shingles(text):
+            norm = duplicates.normalize(text)
+            return {norm[i:i + 5] for i in range(len(norm) - 4)}
+
+        x, y = shingles(a), shingles(b)
+        return len(x & y) / len(x | y)
+
+    def test_estimate_is_within_its_error(self):
+        sig = duplicates.signature(self.TEXT)
+        self.assertEqual(duplicates.similarity(sig, duplicates.signature(self.COPY)), 1.0)
+        self.assertIsNone(duplicates.signature("+1 согласен"))
+        for other in (self.EDITED, self.OTHER):
+            exact = self._jaccard(self.TEXT, other)
+            # стандартная ошибка оценки по 64 значениям: sqrt(J(1 - J) / 64)
+            bound = 3 * math.sqrt(max(exact * (1 - exact), 0.01) / len(sig))
+            self.assertAlmostEqual(duplicates.similarity(sig, duplicates.signature(other)), exact, delta=bound)
+
+    def test_lookup_by_author_and_copies_of_others(self):
+        alice, bob = User.objects.create_user("alice"), User.objects.create_user("bob")
+        post = Post.objects.create(author=alice, text=self.TEXT)
+        duplicates.remember_post(post)
+
+        match = duplicates.find_own(self.COPY, alice.id)
+        self.assertEqual((match.post_id, match.author_id, match.similarity), (post.id, alice.id, 1.0))
+        self.assertGreaterEqual(duplicates.find_own(self.EDITED, alice.id).similarity, 0.8)
+        self.assertIsNone(duplicates.find_own(self.OTHER, alice.id))
+        self.assertIsNone(duplicates.find_own(self.COPY, bob.id))
+
+        # чужую копию не останавливаем, но помечаем для модерации
+        copy = Post.objects.create(author=bob, text=self.COPY)
+        duplicates.remember_post(copy)
+        sketch = TextSketch.objects.get(post=copy)
+        self.assertEqual((sketch.duplicate_of_id, sketch.similarity), (TextSketch.objects.get(post=post).id, 1.0))
+
+
+class TrendingRollupTests(TestCase):
+    """Hourly activity buckets behind a (timestamp, id) watermark and the trending top (trending)."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.users = [User.objects.create_user(f"u{i}") for i in range(4)]
+        self.hot = Post.objects.create(author=self.users[0], text="горячий")
+        self.calm = Post.objects.create(author=self.users[0], text="спокойный")
+
+    def _like(self, user, post, age):
+        like = Like.objects.create(user=user, post=post)
+        Like.objects.filter(id=like.id).update(created_at=self.now - age)
+
+    def _bucket_likes(self, post):
+        buckets = TrendingBucket.objects.filter(kind=trending.POST, object_id=post.id)
+        return sum(buckets.values_list("likes", flat=True))
+
+    def test_row_inside_the_lag_is_counted_on_a_later_run(self):
+        # меньший id, но ещё внутри лага: его обгоняет строка с большим id и более ранним временем
+        self._like(self.users[1], self.hot, timedelta(seconds=10))
+        self._like(self.users[2], self.hot, timedelta(minutes=30))
+        self._like(self.users[3], self.hot, timedelta(days=2))  # вне окна
+
+        self.assertEqual(trending.rollup(self.now)["like"], 1)
+        self.assertEqual(self._bucket_likes(self.hot), 1)
+
+        later = self.now + timedelta(minutes=2)
+        self.assertEqual(trending.rollup(later)["like"], 1)
+        self.assertEqual(trending.rollup(later)["like"], 0)
+        self.assertEqual(self._bucket_likes(self.hot), 2)
+
+    def test_top_is_weighted_and_decays(self):
+        for user in self.users[1:3]:
+            self._like(user, self.hot, timedelta(hours=1))
+        Comment.objects.create(post=self.calm, author=self.users[1], text="давно")
+        Comment.objects.filter(post=self.calm).update(created_at=self.now - timedelta(hours=20))
+        trending.rollup(self.now)
+
+        trending.recompute(self.now)
+        top = list(
+            TrendingItem.objects.filter(kind=trending.POST).order_by("rank").values_list("object_id", "score")
+        )
+        self.assertEqual([object_id for object_id, _ in top], [self.hot.id, self.calm.id])
+
+        # два лайка час назад против комментария (вес 2) двадцать часов назад
+        def decay(age):
+            hours = (self.now - trending._hour(self.now - age)).total_seconds() / 3600
+            return 0.5 ** (hours / TRENDING_HALF_LIFE_HOURS)
+
+        top = dict(top)
+        self.assertAlmostEqual(top[self.hot.id], 2 * decay(timedelta(hours=1)))
+        self.assertAlmostEqual(top[self.calm.id], 2 * decay(timedelta(hours=20)))
+
+
+class PostViewsTests(TestCase):
+    """HyperLogLog unique-viewer estimates and their batched write (core/services/post_views.py)."""
+
+    # 3 стандартные ошибки HLL при 2^12 регистрах: 3 · 1.04 / √4096
+    ERROR = 3 * 1.04 / 64
+
+    @staticmethod
+    def _hashes(start, stop):
+        return [post_views.viewer_hash(f"u{i}") for i in range(start, stop)]
+
+    def test_estimate_within_error(self):
+        for n in (50, 3000, 50000):
+            registers = post_views.empty()
+            for hashed in self._hashes(0, n):
+                post_views.add(registers, hashed)
+            # повторные просмотры не считаются
+            for hashed in self._hashes(0, min(n, 1000)):
+                post_views.add(registers, hashed)
+            self.assertAlmostEqual(post_views.estimate(registers), n, delta=max(n * self.ERROR, 2))
+
+    def test_flushes_merge_into_the_stored_sketch(self):
+        author = User.objects.create_user("author")
+        post, other = (Post.objects.create(author=author, text=t) for t in ("пост", "другой"))
+
+        # два процесса видели пересекающихся зрителей: 0..5999 и 4000..9999
+        first = {(post.id, hashed) for hashed in self._hashes(0, 6000)} | {(other.id, self._hashes(0, 1)[0])}
+        with mock.patch.object(post_views, "_pending", first):
+            self.assertEqual(post_views.flush(), 2)
+        self.assertEqual(post_views.write((post.id, hashed) for hashed in self._hashes(4000, 10000)), 1)
+
+        post.refresh_from_db()
+        self.assertAlmostEqual(post.views_count, 10000, delta=10000 * self.ERROR)
+        self.assertEqual(Post.objects.get(id=other.id).views_count, 1)
+        self.assertEqual(len(PostViewSketch.objects.get(post=post).registers), 4096)
+
+
+class SeenFilterTests(SimpleTestCase):
+    """Rolling two-generation Bloom filter of shown feed posts (core/services/seen.py)."""
+
+    @staticmethod
+    def _fill_generation(seen_filter, start):
+        """Add ids from `start` until the current generation rolls over; returns them."""
+
+        ids, post_id = [], start
+        while seen_filter.current_count or not ids:
+            if seen_filter.add(post_id):  # False — ложное срабатывание, id не считается
+                ids.append(post_id)
+            post_id += 1
+        return ids
+
+    def test_generations_roll_over(self):
+        seen_filter = seen.SeenFilter()
+        first = self._fill_generation(seen_filter, 0)
+        self.assertEqual(len(first), SEEN_FILTER_CAPACITY)
+        self.assertEqual((seen_filter.older_count, seen_filter.current_count), (SEEN_FILTER_CAPACITY, 0))
+        self.assertTrue(all(post_id in seen_filter for post_id in first))
+
+        second = self._fill_generation(seen_filter, 100000)
+        self.assertTrue(all(post_id in seen_filter for post_id in second))
+        # первое поколение забыто, кроме ложных срабатываний (~1% на поколение)
+        still_seen = sum(post_id in seen_filter for post_id in first)
+        self.assertLess(still_seen / len(first), 0.02)
+
+        unseen = range(10**6, 10**6 + 5000)
+        self.assertLess(sum(post_id in seen_filter for post_id in unseen) / len(unseen), 0.02)
+
+    def test_bytes_round_trip(self):
+        seen_filter = seen.SeenFilter()
+        for post_id in range(1, 301):
+            seen_filter.add(post_id)
+        restored = seen.SeenFilter.from_bytes(seen_filter.to_bytes())
+        self.assertEqual(restored.to_bytes(), seen_filter.to_bytes())
+        self.assertTrue(all(post_id in restored for post_id in range(1, 301)))
+        self.assertFalse(restored.add(150))
+        self.assertEqual(restored.current_count, 300)
+        # данные с другими размерами — пустой фильтр, а не ошибка
+        truncated = seen.SeenFilter.from_bytes(seen_filter.to_bytes()[:-1])
+        self.assertEqual(truncated.to_bytes(), seen.SeenFilter().to_bytes())
+
+    def test_unseen_page_reads_further(self):
+        feed = [Post(id=post_id, author_id=1) for post_id in range(20, 0, -1)]
+
+        def read(cursor, limit):
+            start = cursor or 0
+            page = feed[start:start + limit]
+            return page, (start + limit if start + limit < len(feed) else None)
+
+        seen_filter = seen.SeenFilter()
+        for post_id in (20, 19, 17, 16, 15):
+            seen_filter.add(post_id)
+        posts, cursor = seen.unseen_page(read, None, 3, seen_filter)
+        # четыре чтения: 20 19 [18] | 17 16 | 15 [14] | [13]
+        self.assertEqual(([p.id for p in posts], cursor), ([18, 14, 13], 8))
+
+
+class TagLinkRenderTests(SimpleTestCase):
+    """#tags and @mentions in rendered markdown (core/services/markup.py)."""
+
+    def test_tag_and_mention_are_linked(self):
+        html = render_markdown("#python и @alice")
+        self.assertIn('<a class="hashtag" href="/tag/python/">#python</a>', html)
+        self.assertIn('<a class="mention" href="/u/alice/">@alice</a>', html)
+
+    def test_tag_inside_emphasis_is_linked_once(self):
+        html = render_markdown("**#жирный** и *@alice*")
+        self.assertEqual(html.count("<a "), 2)
+        self.assertIn('<strong><a class="hashtag"', html)
+        self.assertIn('<em><a class="mention" href="/u/alice/">@alice</a></em>', html)
+
+    def test_no_link_inside_link_text(self):
+        html = render_markdown("[про #python и @alice тут](https://example.com)")
+        self.assertEqual(html, '<p><a href="https://example.com">про #python и @alice тут</a></p>')
+
+    def test_code_and_headers_are_not_tags(self):
+        self.assertEqual(render_markdown("`#include`"), "<p><code>#include</code></p>")
+        self.assertEqual(render_markdown("# Заголовок"), "<h1>Заголовок</h1>")
+        self.assertNotIn("<a ", render_markdown("    #include <stdio.h>"))
+
+
+class TagExtractTests(SimpleTestCase):
+    """The index holds exactly the tags and mentions markup links (core/services/tags.py)."""
+
+    def test_extract_matches_rendered_links(self):
+        html = render_markdown("#Python и @alice, **#Ёжик**")
+        self.assertEqual(extract(html), ({"python", "ежик"}, {"alice"}))
+
+    def test_code_and_link_text_are_not_indexed(self):
+        text = "текст\n\n    #include <stdio.h>\n    @decorator\n\n`#код` и [про #ссылку](https://example.com)"
+        self.assertEqual(extract(render_markdown(text)), (set(), set()))
@@ -13,6 +13,7 @@ from .views import (
     # комментарии
     add_comment,
     add_reply,
+    post_comments,
     toggle_comment_like,
     delete_comment,
 
@@ -44,8 +45,14 @@ from .views import (
     # подписки
     follow_user,
     unfollow_user,
+    follow_list,
+
+    # теги и упоминания
+    hashtag_feed,
+    user_mentions,
 
     # прочее
+    search_view,
     communities_view,
     community_create,
     community_detail,
@@ -72,6 +79,7 @@ urlpatterns = [
 
     # комментарии
     path("post/<int:post_id>/comment/", add_comment, name="add_comment"),
+    path("post/<int:post_id>/comments/", post_comments, name="post_comments"),
     path(
         "comment/<int:comment_id>/reply/",
         add_reply,
@@ -116,8 +124,13 @@ urlpatterns = [
     # подписки
     path("u/<str:username>/follow/", follow_user, name="follow_user"),
     path("u/<str:username>/unfollow/", unfollow_user, name="unfollow_user"),
+    path("u/<str:username>/followers/", follow_list, {"kind": "followers"}, name="user_followers"),
+    path("u/<str:username>/following/", follow_list, {"kind": "following"}, name="user_following"),
+    path("u/<str:username>/mentions/", user_mentions, name="user_mentions"),
+    path("tag/<str:name>/", hashtag_feed, name="hashtag"),
 
     # прочее
+    path("search/", search_view, name="search"),
     path("communities/", communities_view, name="communities"),
     path("communities/create/", community_create, name="community_create"),
     path("communities/<str:slug>/", community_detail, name="community_detail"),
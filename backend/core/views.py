@@ -1,20 +1,15 @@
 from __future__ import annotations
 
-from difflib import SequenceMatcher
-
-from typing import Any, List, TypedDict
-
 from django.http import HttpRequest
 
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Count, Case, When, Value, IntegerField, Max
+from django.db.models import Q, Case, When, Value, IntegerField
 from django.db import transaction
 from django.shortcuts import render, redirect, get_object_or_404
 from django.template.loader import render_to_string
-from django.core.paginator import Paginator
 from django.core.exceptions import PermissionDenied
 from django.http import JsonResponse, HttpResponseForbidden, HttpResponse
 from django.utils.text import slugify
@@ -27,6 +22,36 @@ from django.test.client import RequestFactory
 
 from core.consumers import user_group_name
 
+from core.services import (
+    comments,
+    communities,
+    community_recs,
+    counters,
+    duplicates,
+    follow_graph,
+    follows,
+    fragments,
+    post_views,
+    search,
+    seen,
+    suggestions,
+    tags,
+    timeline,
+    trending,
+    viewer,
+)
+from core.services.pagination import (
+    decode_cursor,
+    decode_directory_cursor,
+    decode_member_cursor,
+    decode_score_cursor,
+    encode_cursor,
+    encode_directory_cursor,
+    encode_member_cursor,
+    encode_score_cursor,
+    keyset_page,
+)
+from core.services.viewer import ViewerState
 from core.services.messages import (
     build_threads_for_user,
     get_or_create_dm_chat,
@@ -38,7 +63,15 @@ from core.services.messages import (
 
 
 from .forms import RegisterForm, PostForm, PostEditForm, MessageForm, GroupChatCreateForm, ProfileForm, CommunityForm, CommunityPostForm
-from .constants import MAX_ATTACHMENTS_PER_POST
+from .constants import (
+    COMMUNITIES_PAGE_SIZE,
+    COMMUNITY_MEMBERS_PAGE_SIZE,
+    FEED_PAGE_SIZE,
+    FOLLOW_LIST_PAGE_SIZE,
+    MAX_ATTACHMENTS_PER_POST,
+    SEARCH_PAGE_SIZE,
+    SIMILAR_POSTS_SHOWN,
+)
 from .models import (
     Post,
     User,
@@ -54,49 +87,18 @@ from .models import (
     PostAttachment,
     Community,
     CommunityMembership,
+    Hashtag,
+    SearchPosting,
 )
 
 
-class UserState(TypedDict):
-    liked_posts_ids: List[int]
-    liked_comment_ids: List[int]
-    following_ids: List[int]
-    admin_community_ids: List[int]
-    member_community_ids: List[int]
+# Ответ на почти-дубль собственного недавнего поста/комментария (core/services/duplicates.py)
+DUPLICATE_TEXT_ERROR = "Вы недавно уже публиковали почти такой же текст."
 
 
-
-def get_user_state(user: Any) -> UserState:
-    if not user.is_authenticated:
-        return {
-            "liked_posts_ids": [],
-            "liked_comment_ids": [],
-            "following_ids": [],
-            "admin_community_ids": [],
-            "member_community_ids": [],
-        }
-
-    return {
-        "liked_posts_ids": list(
-            Like.objects.filter(user=user).values_list("post_id", flat=True)
-        ),
-        "liked_comment_ids": list(
-            CommentLike.objects.filter(user=user).values_list("comment_id", flat=True)
-        ),
-        "following_ids": list(
-            Follow.objects.filter(follower=user).values_list("following_id", flat=True)
-        ),
-        "admin_community_ids": list(
-            CommunityMembership.objects.filter(user=user, is_admin=True).values_list("community_id", flat=True)
-        ),
-        "member_community_ids": list(
-            CommunityMembership.objects.filter(user=user).values_list("community_id", flat=True)
-        ),
-    }
-
-
-def render_post_html(post: Post, request: HttpRequest) -> str:
-    state = get_user_state(request.user)
+def render_post_html(post: Post, request: HttpRequest, state: ViewerState | None = None) -> str:
+    if state is None:
+        state = viewer.resolve(request.user, posts=[post])
 
     return render_to_string(
         "core/partials/post.html",
@@ -109,8 +111,9 @@ def render_post_html(post: Post, request: HttpRequest) -> str:
     )
 
 
-def render_comment_html(comment: Comment, request: HttpRequest, level: int) -> str:
-    state = get_user_state(request.user)
+def render_comment_html(comment: Comment, request: HttpRequest, level: int, state: ViewerState | None = None) -> str:
+    if state is None:
+        state = viewer.resolve(request.user, comments=[comment])
     return render_to_string(
         "core/partials/comment.html",
         {
@@ -124,71 +127,104 @@ def render_comment_html(comment: Comment, request: HttpRequest, level: int) -> s
 
 
 def feed(request: HttpRequest) -> HttpResponse:
+    form = PostForm()
+
+    # обычная отправка формы без JS; с JS посты создаются через create_post
+    if request.method == "POST" and not request.headers.get("x-requested-with"):
+        if not request.user.is_authenticated:
+            messages.error(request, "Чтобы написать пост — войдите.")
+            return redirect("login")
+
+        form = PostForm(request.POST)
+        if form.is_valid():
+            # те же правила, что и в create_post (core/services/duplicates.py)
+            if duplicates.find_own(form.cleaned_data["text"], request.user.id) is not None:
+                messages.error(request, DUPLICATE_TEXT_ERROR)
+                return redirect("feed")
+            p = form.save(commit=False)
+            p.author = request.user
+            p.save()
+            return redirect("feed")
+
     base_qs = (
         Post.objects
         .select_related("author", "community")
-        .prefetch_related(
-            "likes",
-            "comments__author",
-            "comments__likes",
-            "comments__replies",
-        )
-        .annotate(
-            top_comments_count=Count(
-                "comments",
-                filter=Q(comments__parent__isnull=True),
-            )
-        )
+        .prefetch_related("attachments")
         .order_by("-created_at")
     )
 
-    paginator = Paginator(base_qs, 7)
+    # "following" — материализованная домашняя лента (подписки + сообщества),
+    # "ranked" — она же, упорядоченная по сохранённой оценке (команда rank_timelines)
+    feed_mode = request.GET.get("feed") if request.user.is_authenticated else None
+    if feed_mode not in ("following", "ranked"):
+        feed_mode = "all"
 
-    page_param = request.GET.get("page")
-    try:
-        page_number = int(page_param)
-        if page_number < 1:
-            page_number = 1
-    except (TypeError, ValueError):
-        page_number = 1
+    # Keyset-пагинация: непрозрачный курсор (created_at, id) или (score, id), без COUNT(*) и OFFSET
+    if feed_mode == "ranked":
+        cursor = decode_score_cursor(request.GET.get("cursor"))
+
+        def read(after, limit):
+            return timeline.read_ranked(request.user.id, limit, after=after, queryset=base_qs)
+    elif feed_mode == "following":
+        cursor = decode_cursor(request.GET.get("cursor"))
+
+        def read(before, limit):
+            return timeline.read_timeline(request.user.id, limit, before=before, queryset=base_qs)
+    else:
+        cursor = decode_cursor(request.GET.get("cursor"))
+
+        def read(before, limit):
+            return keyset_page(base_qs, limit, before)
 
-    page_obj = paginator.get_page(page_number)
+    # личные ленты пропускают уже показанные посты; «Все» остаётся полной хронологией
+    seen_posts = seen.load(request.user.id) if feed_mode != "all" else None
+    if seen_posts is not None:
+        posts, next_cursor = seen.unseen_page(read, cursor, FEED_PAGE_SIZE, seen_posts)
+    else:
+        posts, next_cursor = read(cursor, FEED_PAGE_SIZE)
+
+    counters.apply_pending(posts)
+    # в карточке только превью комментариев, остальное — через post_comments
+    comments.attach_previews(posts)
+    # тела карточек из кэша фрагментов — одним запросом к кэшу на страницу
+    fragments.prime(posts)
+
+    has_next = next_cursor is not None
+    if not has_next:
+        next_page = None
+    elif feed_mode == "ranked":
+        next_page = encode_score_cursor(next_cursor)
+    else:
+        next_page = encode_cursor(next_cursor)
 
-    state = get_user_state(request.user)
+    # лайки/подписки зрителя — только по объектам этой страницы, одним набором запросов
+    state = viewer.resolve(request.user, posts=posts)
+    # показы — в буфер процесса, в БД уходят пачкой (post_views)
+    post_views.record(request, posts)
+    if seen_posts is not None:
+        seen.mark(request.user.id, seen_posts, posts)
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         posts_html = "".join(
-            render_post_html(post, request) for post in page_obj.object_list
+            render_post_html(post, request, state) for post in posts
         )
         return JsonResponse(
             {
                 "success": True,
                 "html": posts_html,
-                "has_next": page_obj.has_next(),
-                "next_page": page_obj.next_page_number() if page_obj.has_next() else None,
+                "has_next": has_next,
+                "next_page": next_page,
             }
         )
 
-    form = PostForm()
-
-    if request.method == "POST" and not request.headers.get("x-requested-with"):
-        if not request.user.is_authenticated:
-            messages.error(request, "Чтобы написать пост — войдите.")
-            return redirect("login")
-
-        form = PostForm(request.POST)
-        if form.is_valid():
-            p = form.save(commit=False)
-            p.author = request.user
-            p.save()
-            return redirect("feed")
-
     context = {
-        "posts": page_obj.object_list,
+        "posts": posts,
         "form": form,
-        "page_obj": page_obj,
-        "has_next": page_obj.has_next(),
-        "next_page": page_obj.next_page_number() if page_obj.has_next() else None,
+        "feed_mode": feed_mode,
+        "follow_suggestions": suggestions.for_user(request.user),
+        "trending": trending.for_widget(),
+        "has_next": has_next,
+        "next_page": next_page,
         **state,
     }
 
@@ -231,6 +267,13 @@ def create_post(request):
         # для не-AJAX просто возвращаемся в ленту
         return redirect("feed")
 
+    # тот же автор недавно публиковал почти такой же текст (core/services/duplicates.py)
+    if duplicates.find_own(form.cleaned_data["text"], request.user.id) is not None:
+        if is_ajax:
+            return JsonResponse({"success": False, "error": DUPLICATE_TEXT_ERROR}, status=409)
+        messages.error(request, DUPLICATE_TEXT_ERROR)
+        return redirect("feed")
+
     with transaction.atomic():
         post = form.save(commit=False)
         post.author = request.user
@@ -347,7 +390,8 @@ def edit_post(request, pk):
         return redirect(request.META.get("HTTP_REFERER", "feed"))
 
     with transaction.atomic():
-        form.save()
+        # только текст: счётчики (лайки, комментарии) в загруженном посте могли устареть
+        form.save(commit=False).save(update_fields=form.Meta.fields)
 
         if delete_ids:
             PostAttachment.objects.filter(post=post, id__in=delete_ids).delete()
@@ -366,6 +410,8 @@ def edit_post(request, pk):
         .prefetch_related("attachments")
         .get(pk=post.pk)
     )
+    counters.apply_pending([post])
+    comments.attach_previews([post])
 
     if is_ajax:
         html = render_post_html(post, request)
@@ -386,7 +432,7 @@ def toggle_like(request, pk):
     if request.headers.get("x-requested-with"):
         return JsonResponse({
             "liked": liked,
-            "likes_count": post.likes.count()
+            "likes_count": counters.post_counts(post.id)["likes_count"],
         })
 
     return redirect("feed")
@@ -405,6 +451,12 @@ def add_comment(request, post_id):
             return JsonResponse({"error": "empty"}, status=400)
         return redirect("feed")
 
+    if duplicates.find_own(text, request.user.id) is not None:
+        if request.headers.get("x-requested-with"):
+            return JsonResponse({"error": "duplicate", "message": DUPLICATE_TEXT_ERROR}, status=409)
+        messages.error(request, DUPLICATE_TEXT_ERROR)
+        return redirect("feed")
+
     c = Comment.objects.create(
         post=post,
         author=request.user,
@@ -417,7 +469,7 @@ def add_comment(request, post_id):
             "html": html,
             "post_id": post.id,
             "comment_id": c.id,
-            "comments_count": post.comments.count(),
+            "comments_count": counters.post_counts(post.id)["comments_count"],
         })
 
     return redirect("feed")
@@ -433,6 +485,12 @@ def add_reply(request, comment_id):
             return JsonResponse({"error": "empty"}, status=400)
         return redirect("feed")
 
+    if duplicates.find_own(text, request.user.id) is not None:
+        if request.headers.get("x-requested-with"):
+            return JsonResponse({"error": "duplicate", "message": DUPLICATE_TEXT_ERROR}, status=409)
+        messages.error(request, DUPLICATE_TEXT_ERROR)
+        return redirect("feed")
+
     reply = Comment.objects.create(
         post=parent.post,
         author=request.user,
@@ -445,14 +503,44 @@ def add_reply(request, comment_id):
         return JsonResponse({
             "html": html,
             "post_id": parent.post.id,
-            "parent_id": parent.id,
+            # на предельной глубине ответ прикрепляется к родителю родителя (Comment.save)
+            "parent_id": reply.parent_id,
             "comment_id": reply.id,
-            "comments_count": parent.post.comments.count(),
+            "comments_count": counters.post_counts(parent.post_id)["comments_count"],
         })
 
     return redirect("feed")
 
 
+def post_comments(request, post_id):
+    """Догрузка комментариев поста (или ответов на ?parent=<id>) — от новых к старым, по курсору."""
+    post = get_object_or_404(Post.objects.only("id"), pk=post_id)
+
+    parent = None
+    parent_id = request.GET.get("parent", "")
+    if parent_id:
+        if not parent_id.isdigit():
+            return JsonResponse({"success": False, "error": "bad parent"}, status=400)
+        parent = get_object_or_404(Comment.objects.select_related("author"), pk=int(parent_id), post_id=post.id)
+
+    items, next_cursor = comments.comments_page(
+        post.id,
+        parent=parent,
+        before=decode_cursor(request.GET.get("cursor")),
+    )
+
+    state = viewer.resolve(request.user, comments=items)
+    level = parent.depth + 1 if parent else 0
+    html = "".join(render_comment_html(c, request, level=level, state=state) for c in items)
+
+    return JsonResponse({
+        "success": True,
+        "html": html,
+        "has_next": next_cursor is not None,
+        "next_page": encode_cursor(next_cursor) if next_cursor else None,
+    })
+
+
 @login_required
 def delete_comment(request, comment_id):
     c = get_object_or_404(Comment, pk=comment_id)
@@ -481,9 +569,10 @@ def toggle_comment_like(request, comment_id):
         like.delete()
 
     if request.headers.get("x-requested-with"):
+        c.refresh_from_db(fields=["likes_count"])
         return JsonResponse({
             "liked": liked,
-            "likes_count": c.likes.count()
+            "likes_count": c.likes_count,
         })
 
     return redirect("feed")
@@ -497,48 +586,37 @@ def profile_view(request):
 def user_profile(request, username):
     profile_user = get_object_or_404(User, username=username)
 
-    posts = (
+    # keyset по индексу (author, -created_at, -id); догрузка — ?cursor= из posts.js
+    posts, next_cursor = keyset_page(
         Post.objects.filter(author=profile_user)
-        .prefetch_related(
-            "likes",
-            "comments__author",
-            "comments__likes",
-            "comments__replies",
-        )
-        .annotate(
-            top_comments_count=Count(
-                "comments", filter=Q(comments__parent__isnull=True)
-            )
-        )
-        .order_by("-created_at")
+        .select_related("author", "community")
+        .prefetch_related("attachments"),
+        FEED_PAGE_SIZE,
+        decode_cursor(request.GET.get("cursor")),
     )
+    counters.apply_pending(posts)
+    comments.attach_previews(posts)
+    fragments.prime(posts)
+
+    has_next = next_cursor is not None
+    next_page = encode_cursor(next_cursor) if has_next else None
+
+    if request.method == "GET" and request.headers.get("x-requested-with") == "XMLHttpRequest":
+        state = viewer.resolve(request.user, posts=posts)
+        return JsonResponse({
+            "success": True,
+            "html": "".join(render_post_html(post, request, state) for post in posts),
+            "has_next": has_next,
+            "next_page": next_page,
+        })
 
     is_owner = request.user.is_authenticated and request.user == profile_user
 
     is_following = False
     if request.user.is_authenticated and not is_owner:
-        is_following = Follow.objects.filter(
-            follower=request.user,
-            following=profile_user,
-        ).exists()
-
-    liked_posts_ids = []
-    liked_comment_ids = []
-    following_ids = []
+        is_following = follow_graph.follows(request.user.id, profile_user.id)
 
-    if request.user.is_authenticated:
-        liked_posts_ids = list(
-            Like.objects.filter(user=request.user)
-            .values_list("post_id", flat=True)
-        )
-        liked_comment_ids = list(
-            CommentLike.objects.filter(user=request.user)
-            .values_list("comment_id", flat=True)
-        )
-        following_ids = list(
-            Follow.objects.filter(follower=request.user)
-            .values_list("following_id", flat=True)
-        )
+    state = viewer.resolve(request.user, posts=posts)
 
     form = None
     if is_owner:
@@ -549,7 +627,8 @@ def user_profile(request, username):
                 instance=profile_user,
             )
             if form.is_valid():
-                form.save()
+                # только поля формы: счётчики в загруженном объекте могли устареть
+                form.save(commit=False).save(update_fields=form.Meta.fields)
                 messages.success(request, "Профиль обновлён.")
                 return redirect("profile")
         else:
@@ -561,12 +640,13 @@ def user_profile(request, username):
         {
             "profile_user": profile_user,
             "posts": posts,
+            "has_next": has_next,
+            "next_page": next_page,
             "is_owner": is_owner,
             "is_following": is_following,
+            "follow_suggestions": suggestions.for_user(request.user) if is_owner else [],
             "form": form,
-            "liked_posts_ids": liked_posts_ids,
-            "liked_comment_ids": liked_comment_ids,
-            "following_ids": following_ids,
+            **state,
         },
     )
 
@@ -582,7 +662,7 @@ def follow_user(request, username):
         return JsonResponse({
             "ok": True,
             "following": True,
-            "followers_count": Follow.objects.filter(following=target).count()
+            "followers_count": User.objects.values_list("followers_count", flat=True).get(id=target.id),
         })
 
     return redirect("user_profile", username=username)
@@ -599,24 +679,129 @@ def unfollow_user(request, username):
         return JsonResponse({
             "ok": True,
             "following": False,
-            "followers_count": Follow.objects.filter(following=target).count()
+            "followers_count": User.objects.values_list("followers_count", flat=True).get(id=target.id),
         })
 
     return redirect("user_profile", username=username)
 
 
+# kind -> выборка списка (keyset по индексам follow_followers_idx / follow_following_idx)
+FOLLOW_LISTS = {
+    "followers": follows.followers_page,
+    "following": follows.following_page,
+}
+
+
+def follow_list(request, username, kind):
+    """Подписчики / подписки пользователя: курсор (created_at, id) вместо offset + count()."""
+    profile_user = get_object_or_404(User, username=username)
+
+    users, next_cursor = FOLLOW_LISTS[kind](
+        profile_user.id,
+        FOLLOW_LIST_PAGE_SIZE,
+        decode_cursor(request.GET.get("cursor")),
+    )
+    has_next = next_cursor is not None
+    next_page = encode_cursor(next_cursor) if has_next else None
+
+    # «подписан ли я» — одним запросом на всю страницу
+    state = viewer.resolve(request.user, users=users)
+
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        html = render_to_string(
+            "core/partials/follow_list_items.html",
+            {"users": users, "user": request.user, **state},
+            request=request,
+        )
+        return JsonResponse({
+            "success": True,
+            "html": html,
+            "has_next": has_next,
+            "next_page": next_page,
+        })
+
+    return render(request, "core/follow_list.html", {
+        "profile_user": profile_user,
+        "kind": kind,
+        "users": users,
+        "has_next": has_next,
+        "next_page": next_page,
+        **state,
+    })
+
+
+def _post_stream(request, template_name: str, page, context: dict):
+    """Страница постов из индекса тегов/упоминаний: первая — шаблоном, следующие — XHR для posts.js."""
+    posts, next_cursor = page
+    counters.apply_pending(posts)
+    comments.attach_previews(posts)
+    fragments.prime(posts)
+
+    has_next = next_cursor is not None
+    next_page = encode_cursor(next_cursor) if has_next else None
+    state = viewer.resolve(request.user, posts=posts)
+
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return JsonResponse({
+            "success": True,
+            "html": "".join(render_post_html(post, request, state) for post in posts),
+            "has_next": has_next,
+            "next_page": next_page,
+        })
+
+    return render(request, template_name, {
+        **context,
+        "posts": posts,
+        "has_next": has_next,
+        "next_page": next_page,
+        **state,
+    })
+
+
+def hashtag_feed(request, name):
+    """Посты с #тегом: диапазон по (tag, -created_at, -post), текст постов не сканируется."""
+    tag = get_object_or_404(Hashtag, name=tags.normalize_tag(name))
+    page = tags.tag_page(
+        tag.id,
+        FEED_PAGE_SIZE,
+        decode_cursor(request.GET.get("cursor")),
+        queryset=Post.objects.select_related("author", "community").prefetch_related("attachments"),
+    )
+    return _post_stream(request, "core/hashtag.html", page, {"tag": tag})
+
+
+def user_mentions(request, username):
+    """Посты, где пользователя упомянули (в тексте или в комментариях), по свежести упоминания."""
+    profile_user = get_object_or_404(User, username=username)
+    page = tags.mentions_page(
+        profile_user.id,
+        FEED_PAGE_SIZE,
+        decode_cursor(request.GET.get("cursor")),
+        queryset=Post.objects.select_related("author", "community").prefetch_related("attachments"),
+    )
+    return _post_stream(request, "core/mentions.html", page, {"profile_user": profile_user})
+
+
 def post_detail(request, pk):
     post = get_object_or_404(
-        Post.objects.select_related("author", "community")
-        .prefetch_related("likes", "comments__author", "comments__likes"),
+        Post.objects.select_related("author", "community"),
         pk=pk
     )
+    counters.apply_pending([post])
+    comments.attach_threads([post])
+    post_views.record(request, [post])
+
+    state = viewer.resolve(request.user, posts=[post])
 
-    state = get_user_state(request.user)
+    # похожие посты: TF-IDF по поисковому индексу (search.similar)
+    hits, _ = search.similar(SearchPosting.KIND_POST, post.id, SIMILAR_POSTS_SHOWN)
+    by_id = Post.objects.select_related("author", "community").in_bulk([i for i, _ in hits])
+    similar_posts = [by_id[i] for i, _ in hits if i in by_id]
 
     return render(request, "core/post_detail.html", {
         "post": post,
         "posts": [post],
+        "similar_posts": similar_posts,
         **state
     })
 
@@ -1678,22 +1863,87 @@ def logout_view(request):
     return redirect("feed")
 
 
+# ?type= -> вид документа в поисковом индексе
+SEARCH_TYPES = {
+    "posts": SearchPosting.KIND_POST,
+    "users": SearchPosting.KIND_USER,
+    "communities": SearchPosting.KIND_COMMUNITY,
+}
+
+
+def search_view(request):
+    """Поиск по постам / людям / сообществам: инвертированный индекс + BM25, курсор (score, id).
+
+    ?similar=<id> (посты) — вместо текста запроса посты, похожие на данный (TF-IDF).
+    """
+    q = (request.GET.get("q") or "").strip()
+    search_type = request.GET.get("type") if request.GET.get("type") in SEARCH_TYPES else "posts"
+    similar_post = None
+    if search_type == "posts" and (request.GET.get("similar") or "").isdigit():
+        similar_post = Post.objects.select_related("author").filter(id=int(request.GET["similar"])).first()
+
+    after = decode_score_cursor(request.GET.get("cursor"))
+    if similar_post is not None:
+        hits, next_cursor = search.similar(SearchPosting.KIND_POST, similar_post.id, SEARCH_PAGE_SIZE, after=after)
+    else:
+        hits, next_cursor = search.search(SEARCH_TYPES[search_type], q, SEARCH_PAGE_SIZE, after=after)
+    ids = [object_id for object_id, _ in hits]
+
+    if search_type == "posts":
+        by_id = (
+            Post.objects.select_related("author", "community")
+            .prefetch_related("attachments")
+            .in_bulk(ids)
+        )
+        results = [by_id[i] for i in ids if i in by_id]
+        counters.apply_pending(results)
+        comments.attach_previews(results)
+        fragments.prime(results)
+        state = viewer.resolve(request.user, posts=results)
+    elif search_type == "users":
+        by_id = User.objects.in_bulk(ids)
+        results = [by_id[i] for i in ids if i in by_id]
+        state = viewer.resolve(request.user, users=results)
+    else:
+        by_id = Community.objects.in_bulk(ids)
+        results = [by_id[i] for i in ids if i in by_id]
+        state = viewer.resolve(request.user, community_ids=ids)
+
+    has_next = next_cursor is not None
+    next_page = encode_score_cursor(next_cursor) if has_next else None
+
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        html = render_to_string(
+            "core/partials/search_results.html",
+            {"results": results, "search_type": search_type, "user": request.user, **state},
+            request=request,
+        )
+        return JsonResponse({
+            "success": True,
+            "html": html,
+            "has_next": has_next,
+            "next_page": next_page,
+        })
+
+    return render(request, "core/search.html", {
+        "q": q,
+        "search_type": search_type,
+        "similar_post": similar_post,
+        "results": results,
+        "has_next": has_next,
+        "next_page": next_page,
+        **state,
+    })
+
+
 def communities_view(request):
     q = (request.GET.get("q") or "").strip()
     tokens = [t for t in q.split() if t]
 
-    qs = (
-        Community.objects.all()
-        .annotate(members_total=Count("memberships"))
-        .annotate(last_post_at=Max("posts__created_at"))
-        .annotate(
-            has_posts=Case(
-                When(last_post_at__isnull=False, then=Value(0)),
-                default=Value(1),
-                output_field=IntegerField(),
-            )
-        )
-    )
+    # members_count / has_posts / last_post_at хранятся в Community (см. counters.py),
+    # каталог листается курсором по индексу community_directory_idx (communities.directory_page)
+    qs = Community.objects.all()
+    ranked = False
 
     def apply_smart_contains_search(base_qs):
         f = Q()
@@ -1724,73 +1974,33 @@ def communities_view(request):
         )
 
     if tokens:
+        ranked = True
         filtered = apply_smart_contains_search(qs)
         if filtered.exists():
-            qs = filtered.order_by("search_rank", "has_posts", "-last_post_at", "-created_at")
+            qs = filtered
         else:
-            query_lower = q.lower()
-            items = list(
-                Community.objects.values("id", "name", "description").all()
-            )
-
-            scored = []
-            for it in items:
-                name = (it["name"] or "").lower()
-                desc = (it["description"] or "").lower()
-
-                name_score = SequenceMatcher(None, query_lower, name).ratio()
-                desc_score = SequenceMatcher(None, query_lower, desc).ratio()
-
-                score = max(name_score * 1.25, desc_score)
-
-                if score >= 0.60:
-                    scored.append((it["id"], score, name_score, desc_score))
-
-            scored.sort(key=lambda x: (x[1], x[2], x[3]), reverse=True)
-            ids = [x[0] for x in scored[:200]]
+            # нечёткий поиск по триграммному индексу (опечатки, часть слова)
+            ids = communities.fuzzy_search(q)
 
             if ids:
                 order = Case(*[When(id=cid, then=Value(i)) for i, cid in enumerate(ids)], output_field=IntegerField())
-                qs = (
-                    Community.objects.filter(id__in=ids)
-                    .annotate(members_total=Count("memberships"))
-                    .annotate(last_post_at=Max("posts__created_at"))
-                    .annotate(
-                        has_posts=Case(
-                            When(last_post_at__isnull=False, then=Value(0)),
-                            default=Value(1),
-                            output_field=IntegerField(),
-                        )
-                    )
-                    .annotate(search_rank=order)
-                    .order_by("search_rank", "has_posts", "-last_post_at", "-created_at")
-                )
+                qs = Community.objects.filter(id__in=ids).annotate(search_rank=order)
             else:
                 qs = Community.objects.none()
-    else:
-        qs = qs.order_by("has_posts", "-last_post_at", "-created_at")
-
-    paginator = Paginator(qs, 7)
-    page_param = request.GET.get("page")
-    try:
-        page_number = int(page_param)
-        if page_number < 1:
-            page_number = 1
-    except (TypeError, ValueError):
-        page_number = 1
+                ranked = False
 
-    page_obj = paginator.get_page(page_number)
+    page, next_cursor = communities.directory_page(
+        qs,
+        COMMUNITIES_PAGE_SIZE,
+        decode_directory_cursor(request.GET.get("cursor")),
+        ranked=ranked,
+    )
+    has_next = next_cursor is not None
+    next_page = encode_directory_cursor(next_cursor) if has_next else None
 
-    is_auth = request.user.is_authenticated
-    member_ids = set()
-    admin_ids = set()
-    if is_auth:
-        member_ids = set(
-            CommunityMembership.objects.filter(user=request.user).values_list("community_id", flat=True)
-        )
-        admin_ids = set(
-            CommunityMembership.objects.filter(user=request.user, is_admin=True).values_list("community_id", flat=True)
-        )
+    state = viewer.resolve(request.user, community_ids=[c.id for c in page])
+    member_ids = state["member_community_ids"]
+    admin_ids = state["admin_community_ids"]
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         html = "".join(
@@ -1799,23 +2009,23 @@ def communities_view(request):
                 {"c": c, "user": request.user, "member_community_ids": member_ids, "admin_community_ids": admin_ids},
                 request=request,
             )
-            for c in page_obj.object_list
+            for c in page
         )
         return JsonResponse({
             "success": True,
             "html": html,
-            "has_next": page_obj.has_next(),
-            "next_page": page_obj.next_page_number() if page_obj.has_next() else None,
+            "has_next": has_next,
+            "next_page": next_page,
         })
 
     return render(request, "core/communities.html", {
-        "communities": page_obj.object_list,
+        "communities": page,
+        "recommended_communities": community_recs.for_user(request.user) if not q else [],
         "q": q,
         "member_community_ids": member_ids,
         "admin_community_ids": admin_ids,
-        "page_obj": page_obj,
-        "has_next": page_obj.has_next(),
-        "next_page": page_obj.next_page_number() if page_obj.has_next() else None,
+        "has_next": has_next,
+        "next_page": next_page,
     })
 
 
@@ -1850,6 +2060,32 @@ def community_create(request):
 def community_detail(request, slug):
     community = get_object_or_404(Community, slug=slug)
 
+    # Лента сообщества: keyset по индексу (community, -created_at, -id),
+    # на сервере рендерится только первая страница, дальше — ?cursor= из posts.js
+    posts, next_cursor = keyset_page(
+        Post.objects.filter(community=community)
+        .select_related("author", "community")
+        .prefetch_related("attachments"),
+        FEED_PAGE_SIZE,
+        decode_cursor(request.GET.get("cursor")),
+    )
+    counters.apply_pending(posts)
+    comments.attach_previews(posts)
+    fragments.prime(posts)
+
+    has_next = next_cursor is not None
+    next_page = encode_cursor(next_cursor) if has_next else None
+
+    state = viewer.resolve(request.user, posts=posts, community_ids=[community.id])
+
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return JsonResponse({
+            "success": True,
+            "html": "".join(render_post_html(post, request, state) for post in posts),
+            "has_next": has_next,
+            "next_page": next_page,
+        })
+
     is_member = False
     is_admin = False
     if request.user.is_authenticated:
@@ -1857,24 +2093,7 @@ def community_detail(request, slug):
         is_member = bool(m)
         is_admin = bool(m and m.is_admin)
 
-    members_qs = (
-        CommunityMembership.objects
-        .filter(community=community)
-        .select_related("user")
-        .order_by("-is_admin", "-joined_at", "user__username")
-    )
-    memberships = list(members_qs[:7])
-    members_total = members_qs.count()
-    members_has_more = members_total > 7
-
-    posts_qs = (
-        Post.objects.filter(community=community)
-        .select_related("author", "community")
-        .prefetch_related("likes", "comments", "attachments")
-        .order_by("-created_at")
-    )
-
-    state = get_user_state(request.user)
+    memberships, members_cursor = communities.members_page(community.id, COMMUNITY_MEMBERS_PAGE_SIZE)
 
     post_form = None
     if request.user.is_authenticated and is_member:
@@ -1885,9 +2104,12 @@ def community_detail(request, slug):
         "is_member": is_member,
         "is_admin": is_admin,
         "memberships": memberships,
-        "members_total": members_total,
-        "members_has_more": members_has_more,
-        "posts": posts_qs,
+        "members_total": community.members_count,
+        "members_has_more": members_cursor is not None,
+        "members_next_cursor": encode_member_cursor(members_cursor) if members_cursor else "",
+        "posts": posts,
+        "has_next": has_next,
+        "next_page": next_page,
         "post_form": post_form,
         **state,
     })
@@ -1939,7 +2161,8 @@ def community_edit(request, slug):
     if request.method == "POST":
         form = CommunityForm(request.POST, request.FILES, instance=community)
         if form.is_valid():
-            form.save()
+            # счётчики сообщества не перезаписываем значениями из загруженного объекта
+            form.save(commit=False).save(update_fields=[*form.Meta.fields, "updated_at"])
             return redirect("community_detail", slug=community.slug)
     else:
         form = CommunityForm(instance=community)
@@ -1974,34 +2197,21 @@ def community_create_post(request, slug):
 def community_members_chunk(request, slug):
     community = get_object_or_404(Community, slug=slug)
 
-    try:
-        offset = int(request.GET.get("offset", "0"))
-    except ValueError:
-        offset = 0
-
-    limit = 7
-
-    qs = (
-        CommunityMembership.objects
-        .filter(community=community)
-        .select_related("user")
-        .order_by("-is_admin", "-joined_at", "user__username")
+    chunk, next_cursor = communities.members_page(
+        community.id,
+        COMMUNITY_MEMBERS_PAGE_SIZE,
+        decode_member_cursor(request.GET.get("cursor")),
     )
 
-    total = qs.count()
-    chunk = list(qs[offset:offset + limit])
-
     html = render_to_string(
         "core/partials/community_members_chunk.html",
         {"memberships": chunk},
         request=request
     )
 
-    next_offset = offset + len(chunk)
-
     return JsonResponse({
         "html": html,
-        "next_offset": next_offset,
-        "has_more": next_offset < total,
-        "total": total,
+        "next_cursor": encode_member_cursor(next_cursor) if next_cursor else None,
+        "has_more": next_cursor is not None,
+        "total": community.members_count,
     })
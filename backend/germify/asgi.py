@@ -17,6 +17,10 @@ from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 
 import germify.routing
+from core.services import follow_graph
+
+# follow checks are answered from an in-memory graph; it loads in the background
+follow_graph.start()
 
 application = ProtocolTypeRouter(
     {
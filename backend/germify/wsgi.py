@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'germify.settings')
 
 application = get_wsgi_application()
+
+from core.services import follow_graph  # noqa: E402
+
+# follow checks are answered from an in-memory graph; it loads in the background
+follow_graph.start()